@@ -29,6 +29,7 @@ class RateLimits:
     
     # Important - potentially expensive reads
     DEVICE_CREATE = "100/hour"
+    RULE_BACKTEST = "30/hour"
     
     # Generous - normal operations
     STANDARD_READ = "5000/minute"
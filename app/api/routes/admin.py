@@ -0,0 +1,29 @@
+# app/api/routes/admin.py
+from fastapi import APIRouter, Query
+from app.db import session
+from app.db.pool import pool_wait_stats
+from app.services.evaluation_profiler import get_evaluation_profiler
+from app.services.evaluation_scheduler import get_evaluation_debouncer
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/evaluation/debounce")
+def get_evaluation_debounce_stats():
+    """Get evaluation debounce counters (scheduled, coalesced, runs, idle trailing checks)"""
+    return get_evaluation_debouncer().get_stats()
+
+@router.get("/evaluation/profile")
+def get_evaluation_profile(limit: int = Query(default=10, ge=1, le=100)):
+    """Get the most expensive rules and devices by sampled evaluation time"""
+    profiler = get_evaluation_profiler()
+    profiler.flush()  # include this process's pending samples
+    return profiler.top(limit)
+
+@router.get("/db/pool")
+def get_db_pool_stats():
+    """Get this API process's connection pool state and checkout wait times"""
+    return {
+        "role": session.engine_role,
+        "pool": session.engine.pool.status(),
+        "checkout": pool_wait_stats.snapshot(),
+    }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.api.rate_limits import RateLimits, limiter
@@ -29,9 +29,13 @@ def create_device(request: Request, project_id: int, payload: DeviceCreate, db:
     )
 
 @router.get("", response_model=list[DeviceOut], status_code=200)
-def list_devices(project_id: int, db: Session = Depends(get_db)):
-    """List all devices in the project"""
-    return list_devices_service(db, project_id=project_id)
+def list_devices(
+    project_id: int,
+    tag: str | None = Query(None, description="Only devices carrying this tag"),
+    db: Session = Depends(get_db),
+):
+    """List all devices in the project, optionally filtered by tag"""
+    return list_devices_service(db, project_id=project_id, tag=tag)
 
 @router.get("/{device_id}", response_model=DeviceOut, status_code=200)
 def get_device(project_id: int, device_id: int, db: Session = Depends(get_db)):
@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.api.rate_limits import RateLimits, limiter
-from app.schemas.rule import RuleCreate, RuleOut, RuleAssignDevices, RuleUpdate
+from app.schemas.rule import RuleCreate, RuleOut, RuleAssignDevices, RuleUpdate, RuleBacktestRequest, RuleBacktestOut
+from app.services.backtest_service import run_backtest_service
 from app.services.rule_service import create_rule_service, delete_rule_service, get_rule_service, list_enabled_rules_for_project_service, list_rules_service, assign_rule_devices_service, update_rule_service
 
 router = APIRouter(tags=["rules"])
@@ -20,6 +21,12 @@ def list_rules(project_id: int, db: Session = Depends(get_db)):
     """List all rules for a specific project"""
     return list_rules_service(db, project_id=project_id)
 
+@router.post("/projects/{project_id}/rules/backtest", response_model=RuleBacktestOut)
+@limiter.limit(RateLimits.RULE_BACKTEST)
+def backtest_rule(request: Request, project_id: int, payload: RuleBacktestRequest, db: Session = Depends(get_db)):
+    """Replay a candidate rule over historical telemetry and report the alerts it would have fired"""
+    return run_backtest_service(db, project_id=project_id, data=payload)
+
 @router.get("/rules/{rule_id}", response_model=RuleOut)
 def get_rule(rule_id: int, db: Session = Depends(get_db)):
     """Get details of a specific rule by its ID"""
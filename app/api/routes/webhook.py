@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.api.rate_limits import RateLimits, limiter
 from app.schemas.webhook import WebhookCreate, WebhookOut
-from app.services.webhook_service import create_webhook_service, get_circuit_status_service, get_webhook_by_id_service, list_webhooks_service, disable_webhook_service
+from app.services.webhook_service import create_webhook_service, get_circuit_status_service, get_webhook_by_id_service, get_webhook_stats_service, list_webhooks_service, disable_webhook_service
 
 router = APIRouter(tags=["webhooks"])
 
@@ -11,7 +11,16 @@ router = APIRouter(tags=["webhooks"])
 @limiter.limit(RateLimits.WEBHOOK_CREATE)
 def create_webhook(request: Request, project_id: int, payload: WebhookCreate, db: Session = Depends(get_db)):
     """Create a new webhook for a project"""
-    return create_webhook_service(db, project_id=project_id, url=str(payload.url), secret=payload.secret)
+    return create_webhook_service(
+        db,
+        project_id=project_id,
+        url=str(payload.url),
+        secret=payload.secret,
+        batch_max_items=payload.batch_max_items,
+        batch_max_wait_ms=payload.batch_max_wait_ms,
+        max_in_flight=payload.max_in_flight,
+        max_rps=payload.max_rps,
+    )
 
 @router.get("/projects/{project_id}/webhooks", response_model=list[WebhookOut])
 def list_webhooks(project_id: int, db: Session = Depends(get_db)):
@@ -31,4 +40,9 @@ def get_webhook(webhook_id: int, db: Session = Depends(get_db)):
 @router.get("/webhooks/{webhook_id}/circuit-status")
 def get_circuit_status(webhook_id: int, db: Session = Depends(get_db)):
     """Get the current circuit breaker status for a specific webhook by its ID"""
-    return get_circuit_status_service(db, webhook_id)
\ No newline at end of file
+    return get_circuit_status_service(db, webhook_id)
+
+@router.get("/webhooks/{webhook_id}/stats")
+def get_webhook_stats(webhook_id: int, db: Session = Depends(get_db)):
+    """Get rolling delivery stats for a specific webhook by its ID, served from Redis"""
+    return get_webhook_stats_service(db, webhook_id)
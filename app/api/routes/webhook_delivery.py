@@ -1,9 +1,11 @@
+from datetime import datetime
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import select, desc
 from app.api.deps import get_db, get_project_id_from_api_key
 from app.db.models.webhook_delivery import WebhookDelivery
-from app.schemas.webhook_delivery import WebhookDeliveryOut, WebhookDeliveryStatus
+from app.schemas.webhook_delivery import WebhookDeliveryOut, WebhookDeliveryStatus, WebhookReplayCreate, WebhookReplayOut
+from app.services.webhook_replay_service import get_replay_service, list_dead_letters_service, start_replay_service
 
 router = APIRouter(tags=["webhook-deliveries"])
 
@@ -25,3 +27,38 @@ def list_deliveries(
 
     q = q.order_by(desc(WebhookDelivery.created_at)).limit(limit)
     return list(db.execute(q).scalars().all())
+
+@router.get("/projects/{project_id}/webhook-deliveries/dead-letter", response_model=list[WebhookDeliveryOut])
+def list_dead_letters(
+    project_id: int,
+    webhook_id: int | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    auth_project_id: int = Depends(get_project_id_from_api_key),
+):
+    """List failed (dead-lettered) webhook deliveries, optionally by webhook and creation time range"""
+    return list_dead_letters_service(
+        db, project_id, auth_project_id, webhook_id=webhook_id, since=since, until=until, limit=limit
+    )
+
+@router.post("/projects/{project_id}/webhook-deliveries/replay", response_model=WebhookReplayOut, status_code=202)
+def replay_deliveries(
+    project_id: int,
+    payload: WebhookReplayCreate,
+    db: Session = Depends(get_db),
+    auth_project_id: int = Depends(get_project_id_from_api_key),
+):
+    """Re-queue the selected deliveries in throttled batches; poll the replay for progress"""
+    return start_replay_service(db, project_id, auth_project_id, payload)
+
+@router.get("/projects/{project_id}/webhook-deliveries/replay/{replay_id}", response_model=WebhookReplayOut)
+def get_replay(
+    project_id: int,
+    replay_id: str,
+    db: Session = Depends(get_db),
+    auth_project_id: int = Depends(get_project_id_from_api_key),
+):
+    """Progress of a replay"""
+    return get_replay_service(db, project_id, auth_project_id, replay_id)
@@ -0,0 +1,35 @@
+# app/db/async_session.py
+"""
+Async engine for the asyncio webhook delivery worker (requires the [async] extra:
+asyncpg and SQLAlchemy's greenlet-based asyncio extension).
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from app.db.pool import pool_options
+from app.settings import settings
+
+def async_database_url(url: str) -> str:
+    """The same database through the asyncpg driver."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+# Lazy-initialized engine, created inside the worker's event loop
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker | None = None
+
+def get_async_sessionmaker(pool_size: int = 20) -> async_sessionmaker:
+    global _async_engine, _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+            # Many deliveries in flight on one event loop: sized like the API, not a prefork child
+            **pool_options("api", pool_size=pool_size, is_async=True),
+        )
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+    return _AsyncSessionLocal
+
+async def dispose_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _AsyncSessionLocal = None
@@ -0,0 +1,30 @@
+"""webhook endpoint limits
+
+Revision ID: 120460a45239
+Revises: 23116c487708
+Create Date: 2026-10-19 10:45:31.513078
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '120460a45239'
+down_revision: Union[str, Sequence[str], None] = '23116c487708'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('webhook_subscriptions', sa.Column('max_in_flight', sa.Integer(), nullable=True))
+    op.add_column('webhook_subscriptions', sa.Column('max_rps', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('webhook_subscriptions', 'max_rps')
+    op.drop_column('webhook_subscriptions', 'max_in_flight')
@@ -0,0 +1,31 @@
+"""compound rules
+
+Revision ID: 1b9f79d18870
+Revises: a9a592936c50
+Create Date: 2026-10-19 10:18:11.842031
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b9f79d18870'
+down_revision: Union[str, Sequence[str], None] = 'a9a592936c50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rules', sa.Column('conditions', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('rules', sa.Column('combinator', sa.String(length=3), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('rules', 'combinator')
+    op.drop_column('rules', 'conditions')
@@ -0,0 +1,36 @@
+"""webhook retry schedule
+
+Revision ID: 23116c487708
+Revises: 3c900037309f
+Create Date: 2026-10-19 10:41:39.665831
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '23116c487708'
+down_revision: Union[str, Sequence[str], None] = '3c900037309f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('webhook_deliveries', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_delivery_due',
+        'webhook_deliveries',
+        ['next_attempt_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'retrying', 'sending')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_delivery_due', table_name='webhook_deliveries')
+    op.drop_column('webhook_deliveries', 'next_attempt_at')
@@ -0,0 +1,32 @@
+"""webhook batching
+
+Revision ID: 3c900037309f
+Revises: 9b01bc7ec6de
+Create Date: 2026-10-19 10:33:35.080973
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c900037309f'
+down_revision: Union[str, Sequence[str], None] = '9b01bc7ec6de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('webhook_subscriptions', sa.Column('batch_max_items', sa.Integer(), nullable=True))
+    op.add_column('webhook_subscriptions', sa.Column('batch_max_wait_ms', sa.Integer(), server_default='1000', nullable=False))
+    op.add_column('webhook_deliveries', sa.Column('batch_id', sa.String(length=36), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('webhook_deliveries', 'batch_id')
+    op.drop_column('webhook_subscriptions', 'batch_max_wait_ms')
+    op.drop_column('webhook_subscriptions', 'batch_max_items')
@@ -0,0 +1,28 @@
+"""webhook delivery duration
+
+Revision ID: 54a0a6d94032
+Revises: b334c62df545
+Create Date: 2026-10-19 10:58:11.773776
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '54a0a6d94032'
+down_revision: Union[str, Sequence[str], None] = 'b334c62df545'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('webhook_deliveries', sa.Column('last_duration_ms', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('webhook_deliveries', 'last_duration_ms')
@@ -0,0 +1,28 @@
+"""rules window_seconds
+
+Revision ID: 914f66aa060c
+Revises: 93f3c78a14c1
+Create Date: 2026-10-19 10:06:34.027363
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '914f66aa060c'
+down_revision: Union[str, Sequence[str], None] = '93f3c78a14c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rules', sa.Column('window_seconds', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('rules', 'window_seconds')
@@ -0,0 +1,28 @@
+"""devices tags gin index
+
+Revision ID: 93f3c78a14c1
+Revises: 1e67dc3a2804
+Create Date: 2026-10-19 10:01:56.230127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '93f3c78a14c1'
+down_revision: Union[str, Sequence[str], None] = '1e67dc3a2804'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Re-create the GIN index dropped in bc0c2b9de666; serves `tags @> '["tag"]'` lookups
+    op.create_index('ix_devices_tags_gin', 'devices', ['tags'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_devices_tags_gin', table_name='devices', postgresql_using='gin')
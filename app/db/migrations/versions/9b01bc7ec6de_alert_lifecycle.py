@@ -0,0 +1,54 @@
+"""alert lifecycle
+
+Revision ID: 9b01bc7ec6de
+Revises: 1b9f79d18870
+Create Date: 2026-10-19 10:22:18.708794
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b01bc7ec6de'
+down_revision: Union[str, Sequence[str], None] = '1b9f79d18870'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rules', sa.Column('stateful', sa.Boolean(), server_default='false', nullable=False))
+    op.add_column('rules', sa.Column('resolve_k', sa.Integer(), nullable=True))
+    op.add_column('alerts', sa.Column('status', sa.String(length=16), nullable=True))
+    op.add_column('alerts', sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        'alert_states',
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('rule_id', sa.Integer(), nullable=False),
+        sa.Column('alert_id', sa.Integer(), nullable=False),
+        sa.Column('opened_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['rule_id'], ['rules.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['alert_id'], ['alerts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('device_id', 'rule_id'),
+        sa.UniqueConstraint('alert_id'),
+    )
+    op.add_column('webhook_deliveries', sa.Column('event', sa.String(length=32), server_default='alert.triggered', nullable=False))
+    op.drop_constraint('uq_delivery_alert_webhook', 'webhook_deliveries', type_='unique')
+    op.create_unique_constraint('uq_delivery_alert_webhook_event', 'webhook_deliveries', ['alert_id', 'webhook_id', 'event'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM webhook_deliveries WHERE event <> 'alert.triggered'")
+    op.drop_constraint('uq_delivery_alert_webhook_event', 'webhook_deliveries', type_='unique')
+    op.create_unique_constraint('uq_delivery_alert_webhook', 'webhook_deliveries', ['alert_id', 'webhook_id'])
+    op.drop_column('webhook_deliveries', 'event')
+    op.drop_table('alert_states')
+    op.drop_column('alerts', 'resolved_at')
+    op.drop_column('alerts', 'status')
+    op.drop_column('rules', 'resolve_k')
+    op.drop_column('rules', 'stateful')
@@ -0,0 +1,36 @@
+"""heartbeat rules
+
+Revision ID: a9a592936c50
+Revises: 914f66aa060c
+Create Date: 2026-10-19 10:09:29.711457
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9a592936c50'
+down_revision: Union[str, Sequence[str], None] = '914f66aa060c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rules', sa.Column('kind', sa.String(length=16), server_default='THRESHOLD', nullable=False))
+    op.add_column('rules', sa.Column('heartbeat_seconds', sa.Integer(), nullable=True))
+    op.alter_column('rules', 'metric', existing_type=sa.String(length=64), nullable=True)
+    op.alter_column('rules', 'threshold', existing_type=sa.Float(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Heartbeat rules cannot be expressed without kind; keep them (alerts reference them) but disabled
+    op.execute("UPDATE rules SET metric = '', threshold = 0, enabled = false WHERE kind = 'HEARTBEAT'")
+    op.alter_column('rules', 'threshold', existing_type=sa.Float(), nullable=False)
+    op.alter_column('rules', 'metric', existing_type=sa.String(length=64), nullable=False)
+    op.drop_column('rules', 'heartbeat_seconds')
+    op.drop_column('rules', 'kind')
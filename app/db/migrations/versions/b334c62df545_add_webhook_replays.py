@@ -0,0 +1,53 @@
+"""add webhook replays
+
+Revision ID: b334c62df545
+Revises: 120460a45239
+Create Date: 2026-10-19 10:53:41.117668
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b334c62df545'
+down_revision: Union[str, Sequence[str], None] = '120460a45239'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'webhook_replays',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('filters', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('queued', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_webhook_replays_project_id'), 'webhook_replays', ['project_id'], unique=False)
+    op.add_column('webhook_deliveries', sa.Column('replay_id', sa.String(length=36), nullable=True))
+    op.create_index(
+        'ix_delivery_replay',
+        'webhook_deliveries',
+        ['replay_id'],
+        unique=False,
+        postgresql_where=sa.text('replay_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_delivery_replay', table_name='webhook_deliveries')
+    op.drop_column('webhook_deliveries', 'replay_id')
+    op.drop_index(op.f('ix_webhook_replays_project_id'), table_name='webhook_replays')
+    op.drop_table('webhook_replays')
@@ -6,7 +6,9 @@ from .api_key import ApiKey
 from .rule import Rule
 from .rule_device import RuleDevice
 from .alert import Alert
+from .alert_state import AlertState
 from .webhook_subscription import WebhookSubscription
 from .webhook_delivery import WebhookDelivery
+from .webhook_replay import WebhookReplay
 
-__all__ = ["Org", "Project", "Device", "TelemetryEvent", "ApiKey", "Rule", "RuleDevice", "Alert", "WebhookSubscription", "WebhookDelivery"]
+__all__ = ["Org", "Project", "Device", "TelemetryEvent", "ApiKey", "Rule", "RuleDevice", "Alert", "AlertState", "WebhookSubscription", "WebhookDelivery", "WebhookReplay"]
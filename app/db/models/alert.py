@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 from app.db.base import Base
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import ForeignKey, Integer, DateTime, Index
+from sqlalchemy import ForeignKey, Integer, DateTime, Index, String
 
 class Alert(Base):
     __tablename__ = "alerts"
@@ -17,3 +17,6 @@ class Alert(Base):
     rule_id: Mapped[int] = mapped_column(ForeignKey("rules.id"), nullable=False, index=True)
     triggered_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     details: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # Stateful rules only: OPEN while the condition holds, then RESOLVED (NULL for cooldown alerts)
+    status: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,14 @@
+# app/db/models/alert_state.py
+from datetime import datetime
+from app.db.base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, DateTime
+
+class AlertState(Base):
+    """One row per (device, stateful rule) with an OPEN alert; deleted when it resolves."""
+    __tablename__ = "alert_states"
+
+    device_id: Mapped[int] = mapped_column(ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True)
+    rule_id: Mapped[int] = mapped_column(ForeignKey("rules.id", ondelete="CASCADE"), primary_key=True)
+    alert_id: Mapped[int] = mapped_column(ForeignKey("alerts.id", ondelete="CASCADE"), nullable=False, unique=True)
+    opened_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
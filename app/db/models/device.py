@@ -10,6 +10,7 @@ class Device(Base):
         UniqueConstraint("project_id", "external_id", name="uq_device_project_external"),
         Index("ix_devices_project_id", "project_id"),
         Index("ix_devices_project_external", "project_id", "external_id"),
+        Index("ix_devices_tags_gin", "tags", postgresql_using="gin"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -3,6 +3,7 @@ from app.db.base import Base
 from typing import Literal
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import Float, ForeignKey, Index, Integer, String, Boolean
+from sqlalchemy.dialects.postgresql import JSONB
 
 class Rule(Base):
     __tablename__ = "rules"
@@ -14,12 +15,21 @@ class Rule(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
-    metric: Mapped[str] = mapped_column(String(64), nullable=False)
+    kind: Mapped[Literal["THRESHOLD", "HEARTBEAT"]] = mapped_column(String(16), nullable=False, default="THRESHOLD", server_default="THRESHOLD")
+    metric: Mapped[str | None] = mapped_column(String(64), nullable=True)
     operator: Mapped[str] = mapped_column(String(4), nullable=False, default=">")
-    threshold: Mapped[float] = mapped_column(Float, nullable=False)
+    threshold: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Compound rules: [{"metric", "operator", "threshold"}, ...] combined per event with AND/OR
+    conditions: Mapped[list | None] = mapped_column(JSONB, nullable=True)
+    combinator: Mapped[Literal["AND", "OR"] | None] = mapped_column(String(3), nullable=True)
     window_n: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    window_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    heartbeat_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
     required_k: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     cooldown_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=300)
+    # Stateful rules: one OPEN alert while match_count >= required_k, RESOLVED once it drops to resolve_k
+    stateful: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default="false")
+    resolve_k: Mapped[int | None] = mapped_column(Integer, nullable=True)
     enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
     scope: Mapped[Literal["ALL", "EXPLICIT", "TAG"]] = mapped_column(String(16), nullable=False, default="ALL")
     tag: Mapped[str | None] = mapped_column(String(64), nullable=True)
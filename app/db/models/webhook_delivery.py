@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from sqlalchemy import (
-    DateTime, ForeignKey, Integer, String, UniqueConstraint, Index, Text
+    DateTime, ForeignKey, Integer, String, UniqueConstraint, Index, Text, text
 )
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
@@ -8,10 +8,17 @@ from app.db.base import Base
 class WebhookDelivery(Base):
     __tablename__ = "webhook_deliveries"
     __table_args__ = (
-        UniqueConstraint("alert_id", "webhook_id", name="uq_delivery_alert_webhook"),
+        UniqueConstraint("alert_id", "webhook_id", "event", name="uq_delivery_alert_webhook_event"),
         Index("ix_delivery_project_created", "project_id", "created_at"),
         Index("ix_delivery_project_status", "project_id", "status"),
         Index("ix_delivery_alert_id", "alert_id"),
+        # Due scan of the retry dispatcher; terminal rows (success/failed) are left out
+        Index(
+            "ix_delivery_due",
+            "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'retrying', 'sending')"),
+        ),
+        Index("ix_delivery_replay", "replay_id", postgresql_where=text("replay_id IS NOT NULL")),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -19,12 +26,23 @@ class WebhookDelivery(Base):
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
     alert_id: Mapped[int] = mapped_column(ForeignKey("alerts.id"), nullable=False)
     webhook_id: Mapped[int] = mapped_column(ForeignKey("webhook_subscriptions.id"), nullable=False)
+    # alert.triggered (new or opened alert) | alert.resolved
+    event: Mapped[str] = mapped_column(String(32), nullable=False, default="alert.triggered", server_default="alert.triggered")
 
     status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    # Batched subscriptions: the POST (batch) that carried the latest attempt
+    batch_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
     attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # When the retry dispatcher should (re)send it: the backoff of a retry, or the lease
+    # of an attempt in flight. NULL for deliveries waiting on their first attempt.
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # The latest bulk replay (webhook_replays.id) that re-queued this delivery
+    replay_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
 
     last_status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
     last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Duration of the latest attempt's HTTP request
+    last_duration_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,23 @@
+# app/db/models/webhook_replay.py
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class WebhookReplay(Base):
+    """A bulk replay of dead-lettered deliveries; replayed rows carry its id as replay_id."""
+    __tablename__ = "webhook_replays"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Selection: {"webhook_id", "statuses", "since", "until"}
+    filters: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+    # running -> done; total is counted when the replay starts, queued grows batch by batch
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="running")
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    queued: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
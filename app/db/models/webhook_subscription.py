@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Boolean, Index
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 
@@ -15,5 +15,12 @@ class WebhookSubscription(Base):
     url: Mapped[str] = mapped_column(String(500), nullable=False)
     secret: Mapped[str | None] = mapped_column(String(200), nullable=True)
 
+    # Batching (opt-in): up to batch_max_items alerts per POST, sent at most batch_max_wait_ms after the first
+    batch_max_items: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    batch_max_wait_ms: Mapped[int] = mapped_column(Integer, nullable=False, default=1000, server_default="1000")
+    # Endpoint limits; NULL uses WEBHOOK_MAX_IN_FLIGHT_PER_ENDPOINT / WEBHOOK_MAX_RPS_PER_ENDPOINT
+    max_in_flight: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    max_rps: Mapped[float | None] = mapped_column(Float, nullable=True)
+
     enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
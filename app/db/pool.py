@@ -0,0 +1,97 @@
+# app/db/pool.py
+"""
+Connection pool options per process role, and checkout wait instrumentation.
+
+- api: one process serving many concurrent requests (DB_POOL_SIZE_API + DB_MAX_OVERFLOW_API).
+- worker: a Celery prefork child runs one task at a time, so it needs a connection or two
+  (DB_POOL_SIZE_WORKER + DB_MAX_OVERFLOW_WORKER); the total is N children x that.
+
+With DB_PGBOUNCER=true the application does not pool at all (NullPool): PgBouncer in
+transaction mode owns the server connections, and asyncpg's named prepared statements,
+which outlive a transaction, are turned off.
+"""
+import threading
+import time
+from uuid import uuid4
+
+import structlog
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from app.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+class PoolWaitStats:
+    """In-process totals of the time spent waiting for a pooled connection."""
+
+    def __init__(self, warn_ms: float = 100.0):
+        self.warn_ms = warn_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.slow = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, wait_ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_ms += wait_ms
+            self.max_ms = max(self.max_ms, wait_ms)
+            if wait_ms > self.warn_ms:
+                self.slow += 1
+        if wait_ms > self.warn_ms:
+            logger.warning("slow_pool_checkout", wait_ms=round(wait_ms, 3))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow": self.slow,
+                "avg_wait_ms": round(self.total_ms / self.checkouts, 3) if self.checkouts else None,
+                "max_wait_ms": round(self.max_ms, 3),
+            }
+
+pool_wait_stats = PoolWaitStats(warn_ms=settings.DB_POOL_WAIT_WARN_MS)
+
+class _TimedCheckout:
+    """Pool mixin: time each checkout (waiting for a free connection, or opening an overflow one)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_stats.record((time.perf_counter() - start) * 1000)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class AsyncTimedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+def pool_options(role: str = "api", pool_size: int | None = None, is_async: bool = False) -> dict:
+    """create_engine() pool arguments for a process role ("api" or "worker")."""
+    if settings.DB_PGBOUNCER:
+        options = {"poolclass": NullPool}
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    if role == "worker":
+        size, overflow = settings.DB_POOL_SIZE_WORKER, settings.DB_MAX_OVERFLOW_WORKER
+    else:
+        size, overflow = settings.DB_POOL_SIZE_API, settings.DB_MAX_OVERFLOW_API
+    return {
+        "poolclass": AsyncTimedQueuePool if is_async else TimedQueuePool,
+        "pool_pre_ping": True,
+        "pool_size": pool_size if pool_size is not None else size,
+        "max_overflow": overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": 3600,
+    }
@@ -1,35 +1,116 @@
 # app/db/repositories/alert_repo.py
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, insert, update, delete, exists, values, column, Integer, DateTime
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from app.db.models.alert import Alert
+from app.db.models.alert_state import AlertState
+from app.db.models.rule import Rule
 
-def get_latest_alert_time(db: Session, device_id: int, rule_id: int) -> datetime | None:
+def create_alerts_outside_cooldown(db: Session, rows: list[dict]) -> list[tuple[int, int]]:
     """
-    Get the most recent Alert.triggered_at for this device and rule.
-    Returns None if no such alert exists.
+    Insert several alerts in one INSERT ... SELECT statement.
+    Each row holds device_id, rule_id, triggered_at, details and cooldown_cutoff; a row is
+    skipped if an alert for the same (device, rule) was triggered after its cooldown_cutoff,
+    or if the rule was deleted or disabled since the caller loaded it.
+    Returns (alert_id, rule_id) pairs for the inserted rows. The caller must commit.
     """
-    q = (
-        select(Alert.triggered_at)
-        .where(Alert.device_id == device_id, Alert.rule_id == rule_id)
-        .order_by(desc(Alert.triggered_at))
-        .limit(1)
+    if not rows:
+        return []
+
+    v = values(
+        column("device_id", Integer),
+        column("rule_id", Integer),
+        column("triggered_at", DateTime(timezone=True)),
+        column("details", JSONB),
+        column("cooldown_cutoff", DateTime(timezone=True)),
+        name="candidates",
+    ).data([
+        (r["device_id"], r["rule_id"], r["triggered_at"], r["details"], r["cooldown_cutoff"])
+        for r in rows
+    ])
+
+    recent_alert = exists().where(
+        Alert.device_id == v.c.device_id,
+        Alert.rule_id == v.c.rule_id,
+        Alert.triggered_at > v.c.cooldown_cutoff,
+    )
+    rule_enabled = exists().where(Rule.id == v.c.rule_id, Rule.enabled.is_(True))
+    stmt = (
+        insert(Alert)
+        .from_select(
+            ["device_id", "rule_id", "triggered_at", "details"],
+            select(v.c.device_id, v.c.rule_id, v.c.triggered_at, v.c.details).where(~recent_alert, rule_enabled),
+        )
+        .returning(Alert.id, Alert.rule_id)
     )
-    return db.execute(q).scalars().first()
+    return [(row.id, row.rule_id) for row in db.execute(stmt).all()]
 
-def create_alert(db: Session, alert: Alert, commit: bool = True) -> Alert:
+def get_open_alert_states(db: Session, device_id: int) -> dict[int, int]:
+    """Map rule_id -> open alert_id for the stateful rules currently OPEN on a device."""
+    q = select(AlertState.rule_id, AlertState.alert_id).where(AlertState.device_id == device_id)
+    return {row.rule_id: row.alert_id for row in db.execute(q).all()}
+
+def open_alerts(db: Session, rows: list[dict]) -> list[tuple[int, int]]:
     """
-    Persist an Alert.
-    If commit=False, the caller must commit the transaction.
+    Insert OPEN alerts for stateful rules and claim their (device, rule) state rows.
+    Each row holds device_id, rule_id, triggered_at and details. A state row that already
+    exists (a concurrent evaluation opened it first) keeps its alert; the duplicate alert
+    inserted here is deleted again in the same transaction.
+    Returns (alert_id, rule_id) pairs for the alerts that were opened. The caller must commit.
     """
-    db.add(alert)
-    if commit:
-        db.commit()
-        db.refresh(alert)
-    else:
-        db.flush()
-        db.refresh(alert)
-    return alert
+    if not rows:
+        return []
+
+    inserted = db.execute(
+        insert(Alert)
+        .values([
+            {
+                "device_id": r["device_id"],
+                "rule_id": r["rule_id"],
+                "triggered_at": r["triggered_at"],
+                "details": r["details"],
+                "status": "OPEN",
+            }
+            for r in rows
+        ])
+        .returning(Alert.id, Alert.device_id, Alert.rule_id, Alert.triggered_at)
+    ).all()
+
+    claimed = set(db.execute(
+        pg_insert(AlertState)
+        .values([
+            {"device_id": a.device_id, "rule_id": a.rule_id, "alert_id": a.id, "opened_at": a.triggered_at}
+            for a in inserted
+        ])
+        .on_conflict_do_nothing(index_elements=["device_id", "rule_id"])
+        .returning(AlertState.alert_id)
+    ).scalars().all())
+
+    lost = [a.id for a in inserted if a.id not in claimed]
+    if lost:
+        db.execute(delete(Alert).where(Alert.id.in_(lost)))
+    return [(a.id, a.rule_id) for a in inserted if a.id in claimed]
+
+def resolve_open_alerts(db: Session, device_id: int, rule_ids: list[int], resolved_at: datetime) -> list[int]:
+    """
+    Drop the state rows of the given rules on a device and mark their alerts RESOLVED.
+    Returns the resolved alert IDs (only rules that were still OPEN). The caller must commit.
+    """
+    if not rule_ids:
+        return []
+    alert_ids = list(db.execute(
+        delete(AlertState)
+        .where(AlertState.device_id == device_id, AlertState.rule_id.in_(rule_ids))
+        .returning(AlertState.alert_id)
+    ).scalars().all())
+    if alert_ids:
+        db.execute(
+            update(Alert)
+            .where(Alert.id.in_(alert_ids))
+            .values(status="RESOLVED", resolved_at=resolved_at)
+        )
+    return alert_ids
 
 def list_alerts_for_project_devices(db: Session, device_ids: list[int], limit: int = 100) -> list[Alert]:
     """
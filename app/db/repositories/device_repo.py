@@ -18,9 +18,13 @@ def create_device(db: Session, project_id: int, external_id: str, name: str, tag
     db.refresh(device)
     return device
 
-def list_devices(db: Session, project_id: int) -> list[Device]:
-    """List all devices for a project."""
-    return list(db.execute(select(Device).where(Device.project_id == project_id)).scalars().all())
+def list_devices(db: Session, project_id: int, tag: str | None = None) -> list[Device]:
+    """List all devices for a project, optionally only those carrying `tag`."""
+    q = select(Device).where(Device.project_id == project_id)
+    if tag is not None:
+        # JSONB containment (tags @> '["tag"]') is served by ix_devices_tags_gin
+        q = q.where(Device.tags.contains([tag]))
+    return list(db.execute(q).scalars().all())
 
 def get_device(db: Session, device_id: int) -> Device | None:
     """Get a device by its ID."""
@@ -1,6 +1,8 @@
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, tuple_, all_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Integer
 from app.db.models.telemetry_event import TelemetryEvent
 
 def list_latest_events(db: Session, device_id: int, limit: int = 100) -> list[TelemetryEvent]:
@@ -31,4 +33,57 @@ def get_events_since(db: Session, device_id: int, since_ts: float) -> list[Telem
         .where(TelemetryEvent.device_id == device_id, TelemetryEvent.ts >= since_dt)
         .order_by(desc(TelemetryEvent.ts))
     )
-    return list(db.execute(q).scalars().all())
\ No newline at end of file
+    return list(db.execute(q).scalars().all())
+
+def _window_query(device_id: int, since: datetime | None = None):
+    """Newest-first (ts DESC, id DESC) selection of the columns rule evaluation reads."""
+    q = (
+        select(TelemetryEvent.id, TelemetryEvent.ts, TelemetryEvent.payload)
+        .where(TelemetryEvent.device_id == device_id)
+        .order_by(desc(TelemetryEvent.ts), desc(TelemetryEvent.id))
+    )
+    if since is not None:
+        q = q.where(TelemetryEvent.ts >= since)
+    return q
+
+def list_window_events(db: Session, device_id: int, limit: int, since: datetime | None = None) -> list:
+    """List the newest `limit` events for a device (ts >= `since` if given) as (id, ts, payload) rows."""
+    return list(db.execute(_window_query(device_id, since).limit(limit)).all())
+
+def list_window_events_after(
+    db: Session, device_id: int, ts: datetime, event_id: int, exclude_ids: list[int], limit: int
+) -> list:
+    """List events sorting after (ts, event_id), skipping `exclude_ids`, as (id, ts, payload) rows."""
+    q = _window_query(device_id).where(
+        tuple_(TelemetryEvent.ts, TelemetryEvent.id) > tuple_(ts, event_id),
+        TelemetryEvent.id != all_(bindparam("exclude_ids", exclude_ids, type_=ARRAY(Integer))),
+    )
+    return list(db.execute(q.limit(limit)).all())
+
+def list_window_events_before(
+    db: Session, device_id: int, ts: datetime, event_id: int, limit: int, since: datetime | None = None
+) -> list:
+    """List events sorting before (ts, event_id) (and ts >= `since` if given) as (id, ts, payload) rows."""
+    q = _window_query(device_id, since).where(
+        tuple_(TelemetryEvent.ts, TelemetryEvent.id) < tuple_(ts, event_id),
+    )
+    return list(db.execute(q.limit(limit)).all())
+
+def stream_metric_history(
+    db: Session, device_ids: list[int], metric: str, start: datetime, end: datetime, batch_size: int = 5000
+):
+    """
+    Stream (device_id, ts, value) rows for `metric` in [start, end), ordered by device then time.
+    Uses a server-side cursor (yield_per), so memory stays bounded by `batch_size` rows.
+    """
+    q = (
+        select(TelemetryEvent.device_id, TelemetryEvent.ts, TelemetryEvent.payload[metric].label("value"))
+        .where(
+            TelemetryEvent.device_id.in_(device_ids),
+            TelemetryEvent.ts >= start,
+            TelemetryEvent.ts < end,
+        )
+        .order_by(TelemetryEvent.device_id, TelemetryEvent.ts, TelemetryEvent.id)
+        .execution_options(yield_per=batch_size)
+    )
+    return db.execute(q)
@@ -1,15 +1,25 @@
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from typing import TYPE_CHECKING, NamedTuple
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func, or_, and_, case
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from app.db.models.alert import Alert
+from app.db.models.device import Device
 from app.db.models.webhook_delivery import WebhookDelivery
+from app.db.models.webhook_subscription import WebhookSubscription
+
+if TYPE_CHECKING:  # the asyncio extension (greenlet) is only needed by the async worker
+    from sqlalchemy.ext.asyncio import AsyncSession
 
-def get_delivery(db: Session, alert_id: int, webhook_id: int) -> WebhookDelivery | None:
-    """Get the delivery record for a specific alert and webhook, if it exists."""
+def get_delivery(
+    db: Session, alert_id: int, webhook_id: int, event: str = "alert.triggered"
+) -> WebhookDelivery | None:
+    """Get the delivery record for a specific alert, webhook and event, if it exists."""
     q = select(WebhookDelivery).where(
         WebhookDelivery.alert_id == alert_id,
         WebhookDelivery.webhook_id == webhook_id,
+        WebhookDelivery.event == event,
     )
     return db.execute(q).scalars().first()
 
@@ -19,45 +29,58 @@ def get_delivery_by_id(db: Session, delivery_id: int) -> WebhookDelivery | None:
     return db.execute(q).scalars().first()
 
 
-def ensure_delivery_row(db: Session, project_id: int, alert_id: int, webhook_id: int) -> WebhookDelivery:
-    """Ensure that a delivery record exists for the given alert and webhook, creating it if necessary."""
+def ensure_delivery_rows(
+    db: Session, rows: list[tuple[int, int, int]], event: str = "alert.triggered"
+) -> dict[tuple[int, int], int]:
+    """
+    Ensure delivery records exist for (project_id, alert_id, webhook_id) rows and one event,
+    in a single multi-row upsert. Returns {(alert_id, webhook_id): delivery_id}.
+    """
+    if not rows:
+        return {}
     now = datetime.now(timezone.utc)
-
+    values = [
+        {
+            "project_id": project_id,
+            "alert_id": alert_id,
+            "webhook_id": webhook_id,
+            "event": event,
+            "status": "pending",
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        # A statement may not upsert the same row twice
+        for project_id, alert_id, webhook_id in dict.fromkeys(rows)
+    ]
     stmt = (
         pg_insert(WebhookDelivery)
-        .values(
-            project_id=project_id,
-            alert_id=alert_id,
-            webhook_id=webhook_id,
-            status="pending",
-            attempts=0,
-            created_at=now,
-            updated_at=now,
-        )
+        .values(values)
         .on_conflict_do_update(
-            constraint="uq_delivery_alert_webhook",
+            constraint="uq_delivery_alert_webhook_event",
             set_={"updated_at": WebhookDelivery.updated_at},  # no-op update, but allows RETURNING
         )
-        .returning(WebhookDelivery.id)
+        .returning(WebhookDelivery.id, WebhookDelivery.alert_id, WebhookDelivery.webhook_id)
     )
-
-    delivery_id = db.execute(stmt).scalar_one()
-    return get_delivery_by_id(db, delivery_id=delivery_id)
-
-from datetime import datetime, timezone, timedelta
-from sqlalchemy import update, or_, and_
+    return {(alert_id, webhook_id): did for did, alert_id, webhook_id in db.execute(stmt)}
 
 SENDING_STALE_AFTER = timedelta(seconds=120)
+# Deliveries the retry dispatcher may (re)send; matches the ix_delivery_due partial index
+DUE_STATUSES = ("pending", "retrying", "sending")
 
-def try_mark_sending(db: Session, delivery_id: int) -> bool:
-    """Attempt to mark a delivery as 'sending' if it's currently 'pending' or 'retrying', or if it's 'sending' but stale."""
+def _claim_stmt(delivery_ids: list[int], **extra):
+    """
+    UPDATE claiming deliveries for one attempt (add RETURNING to learn which claims
+    succeeded). next_attempt_at becomes the claim's lease: if the attempt never records
+    an outcome, the retry dispatcher re-sends the delivery once the claim is stale.
+    The previous attempt's status code and error stay until the outcome replaces them.
+    """
     now = datetime.now(timezone.utc)
     stale_before = now - SENDING_STALE_AFTER
-
-    stmt = (
+    return (
         update(WebhookDelivery)
         .where(
-            WebhookDelivery.id == delivery_id,
+            WebhookDelivery.id.in_(delivery_ids),
             or_(
                 WebhookDelivery.status.in_(["pending", "retrying"]),
                 and_(
@@ -70,42 +93,311 @@ def try_mark_sending(db: Session, delivery_id: int) -> bool:
             status="sending",
             attempts=WebhookDelivery.attempts + 1,
             updated_at=now,
-            last_error=None,
-            last_status_code=None,
+            next_attempt_at=now + SENDING_STALE_AFTER,
+            **extra,
+        )
+    )
+
+class ClaimedDelivery(NamedTuple):
+    """A delivery claimed for an attempt, with everything the attempt reads."""
+    id: int
+    alert_id: int
+    webhook_id: int
+    event: str
+    attempts: int  # including this attempt
+    webhook: WebhookSubscription | None
+    alert: Alert | None
+    device_id: int | None  # None when the alert's device no longer exists
+
+def _claim_with_context_stmt(delivery_id: int):
+    """
+    One statement claiming a delivery and reading its webhook, alert and device: the
+    claiming UPDATE ... RETURNING is a CTE joined to them. No row means the delivery
+    does not exist or is not claimable.
+    """
+    claimed = (
+        _claim_stmt([delivery_id])
+        .returning(
+            WebhookDelivery.id,
+            WebhookDelivery.alert_id,
+            WebhookDelivery.webhook_id,
+            WebhookDelivery.event,
+            WebhookDelivery.attempts,
         )
-        .returning(WebhookDelivery.id)
+        .cte("claimed")
+    )
+    return (
+        select(claimed, WebhookSubscription, Alert, Device.id.label("device_id"))
+        .select_from(claimed)
+        .outerjoin(WebhookSubscription, WebhookSubscription.id == claimed.c.webhook_id)
+        .outerjoin(Alert, Alert.id == claimed.c.alert_id)
+        .outerjoin(Device, Device.id == Alert.device_id)
     )
 
-    updated = db.execute(stmt).scalar_one_or_none()
+def _outcome_stmt(
+    delivery_ids: list[int],
+    status: str,
+    status_code: int | None,
+    error: str | None = None,
+    next_attempt_at: datetime | None = None,
+    duration_ms: int | None = None,
+):
+    """
+    UPDATE recording the outcome of the attempt that holds the 'sending' claim.
+    next_attempt_at schedules the next attempt of a 'retrying' delivery with the retry
+    dispatcher; it is cleared otherwise. duration_ms is the attempt's request time
+    (None when no request was sent).
+    """
+    now = datetime.now(timezone.utc)
+    values = {
+        "status": status,
+        "last_status_code": status_code,
+        "updated_at": now,
+        "next_attempt_at": next_attempt_at,
+        "last_duration_ms": duration_ms,
+        "last_error": error,
+    }
+    if status == "success":
+        values["delivered_at"] = now
+    return (
+        update(WebhookDelivery)
+        .where(WebhookDelivery.id.in_(delivery_ids), WebhookDelivery.status == "sending")
+        .values(**values)
+    )
+
+def try_mark_sending(db: Session, delivery_id: int) -> bool:
+    """Attempt to mark a delivery as 'sending' if it's currently 'pending' or 'retrying', or if it's 'sending' but stale."""
+    updated = db.execute(_claim_stmt([delivery_id]).returning(WebhookDelivery.id)).scalar_one_or_none()
     db.commit()
     return updated is not None
 
-def mark_success(db: Session, delivery_id: int, status_code: int):
-    """Mark a delivery as successful, setting the final status code and delivered timestamp."""
-    now = datetime.now(timezone.utc)
-    db.execute(
+def claim_delivery(db: Session, delivery_id: int) -> ClaimedDelivery | None:
+    """
+    Claim a delivery for one attempt and load its webhook, alert and device, in one
+    statement. Returns None when the delivery cannot be claimed. The loaded webhook and
+    alert are not expired by the commit, so the attempt reads them without queries.
+    """
+    row = db.execute(_claim_with_context_stmt(delivery_id)).first()
+    expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+    return ClaimedDelivery(*row) if row else None
+
+def release_claim(db: Session, delivery_ids: list[int], next_attempt_at: datetime, **extra):
+    """
+    Undo the claims of attempts that were not made (endpoint over its limits): the
+    deliveries go back to the retry dispatcher, due at next_attempt_at, without the attempt.
+    """
+    db.execute(_release_stmt(delivery_ids, next_attempt_at, **extra))
+    db.commit()
+
+def _release_stmt(delivery_ids: list[int], next_attempt_at: datetime, **extra):
+    return (
         update(WebhookDelivery)
-        .where(WebhookDelivery.id == delivery_id, WebhookDelivery.status == "sending")
-        .values(status="success", last_status_code=status_code, delivered_at=now, updated_at=now)
+        .where(WebhookDelivery.id.in_(delivery_ids), WebhookDelivery.status == "sending")
+        .values(
+            status=case((WebhookDelivery.attempts > 1, "retrying"), else_="pending"),
+            attempts=WebhookDelivery.attempts - 1,
+            next_attempt_at=next_attempt_at,
+            updated_at=datetime.now(timezone.utc),
+            **extra,
+        )
     )
+
+def mark_success(db: Session, delivery_id: int, status_code: int, duration_ms: int | None = None):
+    """Mark a delivery as successful, setting the final status code and delivered timestamp."""
+    db.execute(_outcome_stmt([delivery_id], "success", status_code, duration_ms=duration_ms))
     db.commit()
 
-def mark_failed(db: Session, delivery_id: int, status_code: int | None, error: str):
+def mark_failed(
+    db: Session, delivery_id: int, status_code: int | None, error: str, duration_ms: int | None = None
+):
     """Mark a delivery as failed, setting the final status code and error message."""
-    now = datetime.now(timezone.utc)
+    db.execute(_outcome_stmt([delivery_id], "failed", status_code, error, duration_ms=duration_ms))
+    db.commit()
+
+def mark_retrying(
+    db: Session,
+    delivery_id: int,
+    status_code: int | None,
+    error: str,
+    next_attempt_at: datetime | None = None,
+    duration_ms: int | None = None,
+):
+    """Mark a delivery as retrying, setting the last status code, error message and next attempt time."""
+    db.execute(_outcome_stmt([delivery_id], "retrying", status_code, error, next_attempt_at, duration_ms))
+    db.commit()
+
+def try_mark_sending_many(db: Session, delivery_ids: list[int], batch_id: str) -> list[int]:
+    """Claim several deliveries for one batched attempt; returns the IDs that were claimed."""
+    stmt = _claim_stmt(delivery_ids, batch_id=batch_id).returning(WebhookDelivery.id)
+    claimed = list(db.execute(stmt).scalars().all())
+    db.commit()
+    return claimed
+
+def mark_outcome_many(
+    db: Session,
+    delivery_ids: list[int],
+    status: str,
+    status_code: int | None,
+    error: str | None = None,
+    next_attempt_at: datetime | None = None,
+    duration_ms: int | None = None,
+):
+    """Record one attempt's outcome ('success', 'failed' or 'retrying') on every delivery it carried."""
+    db.execute(_outcome_stmt(delivery_ids, status, status_code, error, next_attempt_at, duration_ms))
+    db.commit()
+
+def defer_deliveries(db: Session, delivery_ids: list[int], next_attempt_at: datetime, **extra):
+    """
+    Hand deliveries that were not attempted (endpoint over its limits) back to the retry
+    dispatcher; status and attempts are unchanged.
+    """
     db.execute(
         update(WebhookDelivery)
-        .where(WebhookDelivery.id == delivery_id, WebhookDelivery.status == "sending")
-        .values(status="failed", last_status_code=status_code, last_error=error, updated_at=now)
+        .where(WebhookDelivery.id.in_(delivery_ids), WebhookDelivery.status.in_(["pending", "retrying"]))
+        .values(next_attempt_at=next_attempt_at, **extra)
     )
     db.commit()
 
-def mark_retrying(db: Session, delivery_id: int, status_code: int | None, error: str):
-    """Mark a delivery as retrying, setting the last status code and error message."""
+def claim_due_deliveries(db: Session, limit: int, lease: timedelta) -> list[tuple[int, int, str | None]]:
+    """
+    Take up to `limit` deliveries whose next attempt is due, oldest first, and push their
+    next_attempt_at forward by `lease` so another dispatcher run does not send them again
+    while their task is queued. Concurrent dispatchers skip each other's rows.
+    Returns (delivery_id, webhook_id, batch_id) rows.
+    """
     now = datetime.now(timezone.utc)
-    db.execute(
+    due = (
+        select(WebhookDelivery.id)
+        .where(
+            WebhookDelivery.status.in_(DUE_STATUSES),
+            WebhookDelivery.next_attempt_at <= now,
+        )
+        .order_by(WebhookDelivery.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
         update(WebhookDelivery)
-        .where(WebhookDelivery.id == delivery_id, WebhookDelivery.status == "sending")
-        .values(status="retrying", last_status_code=status_code, last_error=error, updated_at=now)
+        .where(WebhookDelivery.id.in_(due.scalar_subquery()))
+        .values(next_attempt_at=now + lease)
+        .returning(WebhookDelivery.id, WebhookDelivery.webhook_id, WebhookDelivery.batch_id)
     )
+    rows = [tuple(row) for row in db.execute(stmt).all()]
     db.commit()
+    return rows
+
+# ---- dead letters and bulk replay
+
+# Statuses a replay may re-queue: dead letters, and retries still waiting for their backoff
+REPLAYABLE_STATUSES = ("failed", "retrying")
+
+def _selection(
+    project_id: int,
+    statuses,
+    webhook_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list:
+    """WHERE clauses selecting a project's deliveries by status, subscription and creation time [since, until)."""
+    clauses = [WebhookDelivery.project_id == project_id, WebhookDelivery.status.in_(statuses)]
+    if webhook_id is not None:
+        clauses.append(WebhookDelivery.webhook_id == webhook_id)
+    if since is not None:
+        clauses.append(WebhookDelivery.created_at >= since)
+    if until is not None:
+        clauses.append(WebhookDelivery.created_at < until)
+    return clauses
+
+def list_dead_letters(
+    db: Session,
+    project_id: int,
+    webhook_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 100,
+) -> list[WebhookDelivery]:
+    """Failed deliveries of a project, newest first."""
+    q = (
+        select(WebhookDelivery)
+        .where(*_selection(project_id, ["failed"], webhook_id, since, until))
+        .order_by(WebhookDelivery.created_at.desc())
+        .limit(limit)
+    )
+    return list(db.execute(q).scalars().all())
+
+def count_deliveries(db: Session, project_id: int, statuses, **filters) -> int:
+    """Number of a project's deliveries matching a selection (see _selection)."""
+    q = select(func.count()).select_from(WebhookDelivery).where(*_selection(project_id, statuses, **filters))
+    return db.execute(q).scalar_one()
+
+def next_replay_batch(
+    db: Session, project_id: int, statuses, after_id: int, limit: int, **filters
+) -> list[tuple[int, int]]:
+    """The next `limit` (delivery_id, webhook_id) rows of a selection with an id above after_id (keyset pagination)."""
+    q = (
+        select(WebhookDelivery.id, WebhookDelivery.webhook_id)
+        .where(*_selection(project_id, statuses, **filters), WebhookDelivery.id > after_id)
+        .order_by(WebhookDelivery.id)
+        .limit(limit)
+    )
+    return [tuple(row) for row in db.execute(q).all()]
+
+def requeue_deliveries(
+    db: Session, delivery_ids: list[int], statuses, replay_id: str, next_attempt_at: datetime
+) -> int:
+    """
+    Reset deliveries that are still in one of `statuses` to 'pending' with a fresh retry
+    budget, due with the retry dispatcher at next_attempt_at. Returns the number re-queued;
+    the caller commits.
+    """
+    result = db.execute(
+        update(WebhookDelivery)
+        .where(WebhookDelivery.id.in_(delivery_ids), WebhookDelivery.status.in_(statuses))
+        .values(
+            status="pending",
+            attempts=0,
+            replay_id=replay_id,
+            next_attempt_at=next_attempt_at,
+            updated_at=datetime.now(timezone.utc),
+        )
+    )
+    return result.rowcount
+
+def count_by_status_for_replay(db: Session, replay_id: str) -> dict[str, int]:
+    """{status: count} of the deliveries a replay re-queued."""
+    q = (
+        select(WebhookDelivery.status, func.count())
+        .where(WebhookDelivery.replay_id == replay_id)
+        .group_by(WebhookDelivery.status)
+    )
+    return dict(db.execute(q).all())
+
+# ---- asyncio variants (same statements) used by app.workers.async_delivery
+
+async def claim_delivery_async(db: "AsyncSession", delivery_id: int) -> ClaimedDelivery | None:
+    """Async claim_delivery (the async sessionmaker does not expire on commit)."""
+    row = (await db.execute(_claim_with_context_stmt(delivery_id))).first()
+    await db.commit()
+    return ClaimedDelivery(*row) if row else None
+
+async def release_claim_async(db: "AsyncSession", delivery_ids: list[int], next_attempt_at: datetime):
+    """Async release_claim."""
+    await db.execute(_release_stmt(delivery_ids, next_attempt_at))
+    await db.commit()
+
+async def mark_outcome_async(
+    db: "AsyncSession",
+    delivery_id: int,
+    status: str,
+    status_code: int | None,
+    error: str | None = None,
+    next_attempt_at: datetime | None = None,
+    duration_ms: int | None = None,
+):
+    """Async mark_success / mark_failed / mark_retrying (status is 'success', 'failed' or 'retrying')."""
+    await db.execute(_outcome_stmt([delivery_id], status, status_code, error, next_attempt_at, duration_ms))
+    await db.commit()
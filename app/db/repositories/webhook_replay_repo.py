@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy import update
+
+from app.db.models.webhook_replay import WebhookReplay
+
+def create_replay(db: Session, project_id: int, filters: dict, total: int) -> WebhookReplay:
+    """Record a new bulk replay of `total` deliveries."""
+    replay = WebhookReplay(
+        id=str(uuid.uuid4()),
+        project_id=project_id,
+        filters=filters,
+        status="running",
+        total=total,
+        queued=0,
+    )
+    db.add(replay)
+    db.commit()
+    db.refresh(replay)
+    return replay
+
+def get_replay(db: Session, replay_id: str) -> WebhookReplay | None:
+    """Get a replay by its ID."""
+    return db.get(WebhookReplay, replay_id)
+
+def add_queued(db: Session, replay_id: str, count: int):
+    """Count re-queued deliveries; the caller commits together with the re-queue."""
+    db.execute(
+        update(WebhookReplay)
+        .where(WebhookReplay.id == replay_id)
+        .values(queued=WebhookReplay.queued + count)
+    )
+
+def finish_replay(db: Session, replay_id: str):
+    """Mark a replay as done: every selected delivery has been re-queued."""
+    db.execute(
+        update(WebhookReplay)
+        .where(WebhookReplay.id == replay_id)
+        .values(status="done", finished_at=datetime.now(timezone.utc))
+    )
+    db.commit()
@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from redis import Redis
+from app.db.models.alert import Alert
+from app.db.models.device import Device
 from app.db.models.webhook_subscription import WebhookSubscription
-from app.services.circuit_breaker import WebhookCircuitBreaker
+from app.services.circuit_breaker import WebhookCircuitBreaker, breaker_options
 from app.settings import settings
 
 # Lazy-initialized circuit breaker instance
@@ -12,12 +14,30 @@ def _get_circuit_breaker() -> WebhookCircuitBreaker:
     global _circuit_breaker
     if _circuit_breaker is None:
         redis_client = Redis.from_url(settings.REDIS_URL)
-        _circuit_breaker = WebhookCircuitBreaker(redis_client)
+        _circuit_breaker = WebhookCircuitBreaker(redis_client, **breaker_options())
     return _circuit_breaker
 
-def create_webhook(db: Session, project_id: int, url: str, secret: str | None) -> WebhookSubscription:
+def create_webhook(
+    db: Session,
+    project_id: int,
+    url: str,
+    secret: str | None,
+    batch_max_items: int | None = None,
+    batch_max_wait_ms: int = 1000,
+    max_in_flight: int | None = None,
+    max_rps: float | None = None,
+) -> WebhookSubscription:
     """Create a new webhook subscription for a project."""
-    wh = WebhookSubscription(project_id=project_id, url=url, secret=secret, enabled=True)
+    wh = WebhookSubscription(
+        project_id=project_id,
+        url=url,
+        secret=secret,
+        batch_max_items=batch_max_items,
+        batch_max_wait_ms=batch_max_wait_ms,
+        max_in_flight=max_in_flight,
+        max_rps=max_rps,
+        enabled=True,
+    )
     db.add(wh)
     db.commit()
     db.refresh(wh)
@@ -30,6 +50,20 @@ def list_webhooks(db: Session, project_id: int, enabled_only: bool = False) -> l
         q = q.where(WebhookSubscription.enabled.is_(True))
     return list(db.execute(q).scalars().all())
 
+def list_webhook_targets(db: Session, alert_ids: list[int]) -> list[tuple[int, int, WebhookSubscription]]:
+    """(alert_id, project_id, webhook) for every enabled webhook of the alerts' projects, in one query."""
+    q = (
+        select(Alert.id, Device.project_id, WebhookSubscription)
+        .join(Device, Device.id == Alert.device_id)
+        .join(
+            WebhookSubscription,
+            (WebhookSubscription.project_id == Device.project_id) & WebhookSubscription.enabled.is_(True),
+        )
+        .where(Alert.id.in_(alert_ids))
+        .order_by(Alert.id, WebhookSubscription.id)
+    )
+    return [tuple(row) for row in db.execute(q).all()]
+
 def disable_webhook(db: Session, webhook_id: int) -> WebhookSubscription | None:
     """Disable a webhook subscription by its ID."""
     wh = db.get(WebhookSubscription, webhook_id)
@@ -2,24 +2,15 @@ import time
 import structlog
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from app.db.pool import pool_options
 from app.settings import settings
 
 logger = structlog.get_logger(__name__)
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10,
-    pool_recycle=3600,
-)
-
-@event.listens_for(engine, "before_cursor_execute")
 def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
     """Store the start time of the query execution in the connection info."""
     conn.info.setdefault("query_start_time", []).append(time.time())
 
-@event.listens_for(engine, "after_cursor_execute")
 def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
     """Calculate the total execution time of the query and log if it exceeds the threshold."""
     total = time.time() - conn.info["query_start_time"].pop(-1)
@@ -30,4 +21,28 @@ def after_cursor_execute(conn, cursor, statement, parameters, context, executema
             query=statement[:200]  # Truncate long queries
         )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+def create_db_engine(role: str = "api"):
+    """Engine with the pool of a process role (see app.db.pool) and slow-query logging."""
+    new_engine = create_engine(settings.DATABASE_URL, **pool_options(role))
+    event.listen(new_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(new_engine, "after_cursor_execute", after_cursor_execute)
+    return new_engine
+
+engine = create_db_engine("api")
+engine_role = "api"
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def configure_engine(role: str):
+    """
+    Replace the engine with one sized for `role` and rebind SessionLocal to it.
+
+    Called in each forked Celery child: the pool inherited from the parent is dropped
+    without closing its connections (close=False), which still belong to the parent, so
+    the child never shares a socket with another process and opens its own on first use.
+    """
+    global engine, engine_role
+    engine.dispose(close=False)
+    engine = create_db_engine(role)
+    engine_role = role
+    SessionLocal.configure(bind=engine)
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
 
 from sqlalchemy import text
@@ -16,14 +18,22 @@ from app.api.routes.rule import router as rules_router
 from app.api.routes.alert import router as alerts_router
 from app.api.routes.webhook import router as webhook_router
 from app.api.routes.webhook_delivery import router as webhook_delivery_router
+from app.api.routes.admin import router as admin_router
 from app.middlewares.logging import RequestLoggingMiddleware
+from app.services.backtest_service import shutdown_backtest_pool
 
 configure_logging()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_backtest_pool()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Telemetry Platform",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Middlewares
@@ -39,6 +49,7 @@ app.include_router(alerts_router)
 app.include_router(api_keys_router)
 app.include_router(webhook_router)
 app.include_router(webhook_delivery_router)
+app.include_router(admin_router)
 
 # Health check endpoints
 @app.get("/health")
@@ -8,5 +8,7 @@ class AlertOut(BaseModel):
     rule_id: int
     triggered_at: datetime
     details: dict = Field(default_factory=dict)
+    status: str | None = None
+    resolved_at: datetime | None = None
 
     model_config = {"from_attributes": True}
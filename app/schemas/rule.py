@@ -1,20 +1,39 @@
 # app/schemas/rule.py
+from datetime import datetime
 from pydantic import BaseModel, Field, model_validator
 from typing import Literal, Optional
 
 RuleScope = Literal["ALL", "EXPLICIT", "TAG"]
 RuleOp = Literal[">", ">=", "<", "<="]
+RuleKind = Literal["THRESHOLD", "HEARTBEAT"]
+RuleCombinator = Literal["AND", "OR"]
 
-class RuleCreate(BaseModel):
-    name: str
+class RuleCondition(BaseModel):
     metric: str
     operator: RuleOp = ">"
     threshold: float
 
+class RuleCreate(BaseModel):
+    name: str
+    kind: RuleKind = "THRESHOLD"
+    metric: Optional[str] = None
+    operator: RuleOp = ">"
+    threshold: Optional[float] = None
+    # Compound rule: an event matches when all (AND) / any (OR) conditions hold
+    conditions: Optional[list[RuleCondition]] = Field(default=None, min_length=1, max_length=16)
+    combinator: Optional[RuleCombinator] = None
+
     window_n: int = Field(default=1, ge=1, le=10000)
     required_k: int = Field(default=1, ge=1, le=10000)
+    # Time window: the last `window_seconds`, capped at the newest `window_n` events
+    window_seconds: Optional[int] = Field(default=None, ge=1, le=86400)
+    # Heartbeat: alert when the device sends nothing for `heartbeat_seconds`
+    heartbeat_seconds: Optional[int] = Field(default=None, ge=1, le=604800)
 
     cooldown_seconds: int = Field(default=300, ge=0, le=86400)
+    # Stateful: OPEN at required_k matches, RESOLVED at <= resolve_k (hysteresis); ignores cooldown
+    stateful: bool = False
+    resolve_k: Optional[int] = Field(default=None, ge=0, le=10000)
     enabled: bool = True
     scope: RuleScope = "ALL"
     tag: Optional[str] = None
@@ -27,16 +46,57 @@ class RuleCreate(BaseModel):
             raise ValueError("tag must be null unless scope is TAG")
         return self
 
+    @model_validator(mode="after")
+    def validate_kind(self):
+        if self.kind == "THRESHOLD":
+            simple = self.metric is not None or self.threshold is not None
+            if self.conditions and simple:
+                raise ValueError("use either metric/threshold or conditions, not both")
+            if not self.conditions and (self.metric is None or self.threshold is None):
+                raise ValueError("metric and threshold (or conditions) are required for THRESHOLD rules")
+        if self.conditions and self.kind != "THRESHOLD":
+            raise ValueError("conditions are only supported for THRESHOLD rules")
+        if self.conditions and self.combinator is None:
+            self.combinator = "AND"
+        if not self.conditions and self.combinator is not None:
+            raise ValueError("combinator requires conditions")
+        if self.kind == "HEARTBEAT" and self.heartbeat_seconds is None:
+            raise ValueError("heartbeat_seconds is required for HEARTBEAT rules")
+        if self.kind != "HEARTBEAT" and self.heartbeat_seconds is not None:
+            raise ValueError("heartbeat_seconds must be null unless kind is HEARTBEAT")
+        return self
+
+    @model_validator(mode="after")
+    def validate_stateful(self):
+        if not self.stateful:
+            if self.resolve_k is not None:
+                raise ValueError("resolve_k requires stateful")
+            return self
+        if self.kind != "THRESHOLD":
+            raise ValueError("stateful is only supported for THRESHOLD rules")
+        if self.resolve_k is None:
+            self.resolve_k = 0
+        if self.resolve_k >= self.required_k:
+            raise ValueError("resolve_k must be less than required_k")
+        return self
+
 class RuleOut(BaseModel):
     id: int
     project_id: int
     name: str
-    metric: str
+    kind: str
+    metric: Optional[str] = None
     operator: str
-    threshold: float
+    threshold: Optional[float] = None
+    conditions: Optional[list[RuleCondition]] = None
+    combinator: Optional[str] = None
     window_n: int
     required_k: int
+    window_seconds: Optional[int] = None
+    heartbeat_seconds: Optional[int] = None
     cooldown_seconds: int
+    stateful: bool = False
+    resolve_k: Optional[int] = None
     enabled: bool
     scope: str
     tag: Optional[str] = None
@@ -51,9 +111,46 @@ class RuleUpdate(BaseModel):
     metric: str | None = None
     operator: RuleOp | None = None
     threshold: float | None = None
+    conditions: list[RuleCondition] | None = Field(default=None, min_length=1, max_length=16)
+    combinator: RuleCombinator | None = None
     window_n: int | None = None
     required_k: int | None = None
+    window_seconds: int | None = Field(default=None, ge=1, le=86400)
+    heartbeat_seconds: int | None = Field(default=None, ge=1, le=604800)
     cooldown_seconds: int | None = None
+    resolve_k: int | None = Field(default=None, ge=0, le=10000)
     scope: RuleScope | None = None
     tag: str | None = None
-    enabled: bool | None = None
\ No newline at end of file
+    enabled: bool | None = None
+class RuleBacktestRequest(BaseModel):
+    """A candidate k-of-n rule replayed over stored telemetry"""
+    metric: str
+    operator: RuleOp = ">"
+    threshold: float
+    window_n: int = Field(default=1, ge=1, le=10000)
+    required_k: int = Field(default=1, ge=1, le=10000)
+    cooldown_seconds: int = Field(default=300, ge=0, le=86400)
+
+    start: datetime
+    end: datetime
+    device_ids: Optional[list[int]] = Field(default=None, description="Defaults to every device in the project")
+    max_timestamps: int = Field(default=100, ge=0, le=10000, description="Alert timestamps returned per device")
+
+    @model_validator(mode="after")
+    def validate_range(self):
+        if self.required_k > self.window_n:
+            raise ValueError("required_k cannot be greater than window_n")
+        if self.end <= self.start:
+            raise ValueError("end must be after start")
+        return self
+
+class DeviceBacktestOut(BaseModel):
+    device_id: int
+    events_scanned: int
+    alert_count: int
+    alert_timestamps: list[datetime]
+
+class RuleBacktestOut(BaseModel):
+    total_alerts: int
+    events_scanned: int
+    devices: list[DeviceBacktestOut]
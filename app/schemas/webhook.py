@@ -1,13 +1,23 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 
 class WebhookCreate(BaseModel):
     url: HttpUrl
     secret: str | None = None
+    # Batching: POST arrays of up to batch_max_items alerts, waiting at most batch_max_wait_ms
+    batch_max_items: int | None = Field(default=None, ge=2, le=1000)
+    batch_max_wait_ms: int = Field(default=1000, ge=10, le=60000)
+    # Endpoint limits (default from settings): concurrent requests and requests per second
+    max_in_flight: int | None = Field(default=None, ge=1, le=1000)
+    max_rps: float | None = Field(default=None, gt=0, le=10000)
 
 class WebhookOut(BaseModel):
     id: int
     project_id: int
     url: str
     enabled: bool
+    batch_max_items: int | None = None
+    batch_max_wait_ms: int
+    max_in_flight: int | None = None
+    max_rps: float | None = None
 
     model_config = {"from_attributes": True}
@@ -1,5 +1,7 @@
+from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel
+from typing import Literal
+from pydantic import BaseModel, Field, model_validator
 
 class WebhookDeliveryStatus(str, Enum):
     pending = "pending"
@@ -13,9 +15,40 @@ class WebhookDeliveryOut(BaseModel):
     project_id: int
     alert_id: int
     webhook_id: int
+    event: str
     status: WebhookDeliveryStatus
+    batch_id: str | None = None
+    replay_id: str | None = None
     attempts: int
     last_status_code: int | None
     last_error: str | None
+    last_duration_ms: int | None = None
+
+    model_config = {"from_attributes": True}
+
+class WebhookReplayCreate(BaseModel):
+    """Selection of deliveries to re-queue; created_at in [since, until)"""
+    webhook_id: int | None = None
+    statuses: list[Literal["failed", "retrying"]] = Field(default_factory=lambda: ["failed"], min_length=1)
+    since: datetime | None = None
+    until: datetime | None = None
+
+    @model_validator(mode="after")
+    def validate_range(self):
+        if self.since and self.until and self.since >= self.until:
+            raise ValueError("since must be before until")
+        return self
+
+class WebhookReplayOut(BaseModel):
+    id: str
+    project_id: int
+    filters: dict
+    status: str
+    total: int
+    queued: int
+    created_at: datetime
+    finished_at: datetime | None
+    # Current status of the re-queued deliveries, e.g. {"pending": 10, "success": 480, "failed": 10}
+    deliveries: dict[str, int] = {}
 
     model_config = {"from_attributes": True}
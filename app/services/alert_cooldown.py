@@ -0,0 +1,48 @@
+# app/services/alert_cooldown.py
+from redis import Redis
+from app.services.redis_client import get_redis
+
+class AlertCooldownGate:
+    """
+    Cross-worker cooldown gate for alert creation, keyed by (device, rule).
+
+    acquire() issues one `SET key NX PX cooldown_ms` per firing rule in a single
+    pipeline round trip. Only the worker whose SET succeeds may create the alert,
+    so concurrent evaluations of the same device cannot both fire a rule, and the
+    key expiring is the end of the cooldown window.
+    """
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+
+    def _key(self, device_id: int, rule_id: int) -> str:
+        return f"alert:cooldown:{device_id}:{rule_id}"
+
+    def acquire(self, device_id: int, rules: list) -> set[int]:
+        """Return the IDs of the rules allowed to fire now. Rules without cooldown always pass."""
+        allowed = {rule.id for rule in rules if rule.cooldown_seconds <= 0}
+        gated = [rule for rule in rules if rule.cooldown_seconds > 0]
+        if not gated:
+            return allowed
+
+        pipe = self.redis.pipeline(transaction=False)
+        for rule in gated:
+            pipe.set(self._key(device_id, rule.id), "1", nx=True, px=rule.cooldown_seconds * 1000)
+        for rule, acquired in zip(gated, pipe.execute(), strict=True):
+            if acquired:
+                allowed.add(rule.id)
+        return allowed
+
+    def release(self, device_id: int, rule_ids: list[int]):
+        """Give back gate keys (e.g. the alert insert failed)."""
+        if rule_ids:
+            self.redis.delete(*[self._key(device_id, rid) for rid in rule_ids])
+
+# Lazy-initialized gate instance
+_cooldown_gate: AlertCooldownGate | None = None
+
+def get_cooldown_gate() -> AlertCooldownGate:
+    global _cooldown_gate
+    if _cooldown_gate is None:
+        _cooldown_gate = AlertCooldownGate(get_redis())
+    return _cooldown_gate
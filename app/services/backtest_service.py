@@ -0,0 +1,196 @@
+# app/services/backtest_service.py
+from __future__ import annotations
+
+import multiprocessing
+import operator
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple
+
+import structlog
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.repositories.device_repo import list_device_ids_for_project
+from app.db.repositories.project_repo import get_project
+from app.db.repositories.telemetry_repo import stream_metric_history
+from app.db.session import SessionLocal
+from app.schemas.rule import DeviceBacktestOut, RuleBacktestOut, RuleBacktestRequest
+from app.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+
+class BacktestRule(NamedTuple):
+    """The parts of a rule the replay needs (picklable for pool workers)."""
+    metric: str
+    operator: str
+    threshold: float
+    window_n: int
+    required_k: int
+    cooldown_seconds: int
+
+
+class DeviceReplay:
+    """
+    O(1)-per-event k-of-n state for one device: a ring of the last `window_n`
+    match flags plus a running match count, and the last alert time for cooldown.
+    """
+
+    __slots__ = ("flags", "matches", "events", "alert_count", "alert_timestamps", "last_alert_ts")
+
+    def __init__(self, window_n: int):
+        self.flags: deque[bool] = deque(maxlen=window_n)
+        self.matches = 0
+        self.events = 0
+        self.alert_count = 0
+        self.alert_timestamps: list[datetime] = []
+        self.last_alert_ts: datetime | None = None
+
+    def push(self, rule: BacktestRule, compare, ts: datetime, value, cooldown: timedelta, max_timestamps: int):
+        self.events += 1
+        if len(self.flags) == self.flags.maxlen and self.flags[0]:
+            self.matches -= 1
+        matched = isinstance(value, (int, float)) and compare(float(value), rule.threshold)
+        self.flags.append(matched)
+        self.matches += matched
+
+        if len(self.flags) < rule.window_n or self.matches < rule.required_k:
+            return
+        if self.last_alert_ts is not None and ts - self.last_alert_ts < cooldown:
+            return
+
+        self.last_alert_ts = ts
+        self.alert_count += 1
+        if len(self.alert_timestamps) < max_timestamps:
+            self.alert_timestamps.append(ts)
+
+
+def replay_history(rule: BacktestRule, rows: Iterable, max_timestamps: int) -> dict[int, DeviceReplay]:
+    """
+    Replay (device_id, ts, value) rows, ordered by device then time, evaluating the
+    rule after every event as if each event were its own ingest batch.
+    Cooldown is measured in event time. Windows start empty at the range start.
+    """
+    compare = _OPS[rule.operator]
+    cooldown = timedelta(seconds=rule.cooldown_seconds)
+    replays: dict[int, DeviceReplay] = {}
+
+    for device_id, ts, value in rows:
+        replay = replays.get(device_id)
+        if replay is None:
+            replay = replays[device_id] = DeviceReplay(rule.window_n)
+        replay.push(rule, compare, ts, value, cooldown, max_timestamps)
+
+    return replays
+
+
+def backtest_devices(
+    rule: BacktestRule, device_ids: list[int], start: datetime, end: datetime, max_timestamps: int
+) -> list[DeviceBacktestOut]:
+    """Backtest a chunk of devices in its own session (entry point for pool workers)."""
+    db = SessionLocal()
+    try:
+        return _backtest(db, rule, device_ids, start, end, max_timestamps)
+    finally:
+        db.close()
+
+
+def _backtest(
+    db: Session, rule: BacktestRule, device_ids: list[int], start: datetime, end: datetime, max_timestamps: int
+) -> list[DeviceBacktestOut]:
+    rows = stream_metric_history(
+        db, device_ids, rule.metric, start, end, batch_size=settings.BACKTEST_STREAM_BATCH
+    )
+    replays = replay_history(rule, rows, max_timestamps)
+
+    results = []
+    for device_id in device_ids:
+        replay = replays.get(device_id) or DeviceReplay(rule.window_n)
+        results.append(DeviceBacktestOut(
+            device_id=device_id,
+            events_scanned=replay.events,
+            alert_count=replay.alert_count,
+            alert_timestamps=replay.alert_timestamps,
+        ))
+    return results
+
+
+# Lazy-initialized process pool (spawned, so workers never inherit the API's connections)
+_backtest_pool: Executor | None = None
+
+def _get_backtest_pool() -> Executor:
+    global _backtest_pool
+    if _backtest_pool is None:
+        _backtest_pool = ProcessPoolExecutor(
+            max_workers=settings.BACKTEST_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _backtest_pool
+
+def shutdown_backtest_pool():
+    """Stop the pool's worker processes (called on API shutdown)."""
+    global _backtest_pool
+    if _backtest_pool is not None:
+        _backtest_pool.shutdown(wait=False, cancel_futures=True)
+        _backtest_pool = None
+
+
+def _chunks(items: list[int], count: int) -> list[list[int]]:
+    size = -(-len(items) // count)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_backtest_service(db: Session, project_id: int, data: RuleBacktestRequest) -> RuleBacktestOut:
+    """
+    Replay a candidate rule over [start, end) for the selected devices.
+    Fleets of at least BACKTEST_PARALLEL_MIN_DEVICES devices are split into chunks
+    replayed in a process pool; smaller ones run in the request's session.
+    """
+    if not get_project(db, project_id):
+        raise HTTPException(status_code=404, detail="project not found")
+
+    project_device_ids = list_device_ids_for_project(db, project_id)
+    if data.device_ids is None:
+        device_ids = sorted(project_device_ids)
+    else:
+        unknown = set(data.device_ids) - set(project_device_ids)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"devices not in project: {sorted(unknown)}")
+        device_ids = sorted(set(data.device_ids))
+
+    rule = BacktestRule(
+        metric=data.metric,
+        operator=data.operator,
+        threshold=float(data.threshold),
+        window_n=data.window_n,
+        required_k=data.required_k,
+        cooldown_seconds=data.cooldown_seconds,
+    )
+
+    if device_ids and len(device_ids) >= settings.BACKTEST_PARALLEL_MIN_DEVICES:
+        pool = _get_backtest_pool()
+        futures = [
+            pool.submit(backtest_devices, rule, chunk, data.start, data.end, data.max_timestamps)
+            for chunk in _chunks(device_ids, settings.BACKTEST_MAX_WORKERS * 2)
+        ]
+        devices = [result for future in futures for result in future.result()]
+    elif device_ids:
+        devices = _backtest(db, rule, device_ids, data.start, data.end, data.max_timestamps)
+    else:
+        devices = []
+
+    logger.info(
+        "backtest_completed",
+        project_id=project_id,
+        device_count=len(device_ids),
+        parallel=len(device_ids) >= settings.BACKTEST_PARALLEL_MIN_DEVICES,
+    )
+    return RuleBacktestOut(
+        total_alerts=sum(d.alert_count for d in devices),
+        events_scanned=sum(d.events_scanned for d in devices),
+        devices=devices,
+    )
@@ -1,83 +1,238 @@
 # app/services/circuit_breaker.py
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import datetime, timezone
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 from app.settings import settings
 
+FAILURE_WINDOW_SECONDS = 300
+
+# Each transition is one Lua script, so concurrent workers see a consistent state and
+# every call is a single round trip (EVALSHA; the script is loaded once per connection
+# pool). Times are unix seconds passed in by the caller.
+#
+# KEYS: state, failures, opened_at, probes
+
+# ARGV: now, recovery_timeout, half_open_probes
+# Returns {blocked, open_ms}: blocked is 1 when the request must not be sent; open_ms is
+# how long the circuit stays OPEN before the next probe is allowed (0 when unknown).
+_IS_OPEN_LUA = """
+local state = redis.call('GET', KEYS[1])
+if state == 'open' then
+    local opened = tonumber(redis.call('GET', KEYS[3]))
+    if not opened then
+        return {1, 0}
+    end
+    local remaining = opened + tonumber(ARGV[2]) - tonumber(ARGV[1])
+    if remaining > 0 then
+        return {1, math.ceil(remaining * 1000)}
+    end
+    redis.call('SET', KEYS[1], 'half_open', 'EX', 3600)
+    redis.call('SET', KEYS[4], 1, 'EX', ARGV[2])
+    return {0, 0}
+end
+if state == 'half_open' then
+    local probes = redis.call('INCR', KEYS[4])
+    if probes == 1 then
+        redis.call('EXPIRE', KEYS[4], ARGV[2])
+    end
+    if probes <= tonumber(ARGV[3]) then
+        return {0, 0}
+    end
+    return {1, 0}
+end
+return {0, 0}
+"""
+
+# ARGV: (none)
+# A success closes a HALF_OPEN circuit and resets the failure count.
+_SUCCESS_LUA = """
+if redis.call('GET', KEYS[1]) == 'half_open' then
+    redis.call('DEL', KEYS[1], KEYS[2], KEYS[3], KEYS[4])
+    return 1
+end
+redis.call('DEL', KEYS[2])
+return 0
+"""
+
+# ARGV: now, failure_threshold, failure_window
+# Returns 1 when the circuit is OPEN after this failure. A failed probe re-opens a
+# HALF_OPEN circuit at once; an already OPEN circuit keeps its opened_at.
+_FAILURE_LUA = """
+local state = redis.call('GET', KEYS[1])
+local failures = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+if state == 'open' then
+    return 1
+end
+if state == 'half_open' or failures >= tonumber(ARGV[2]) then
+    redis.call('SET', KEYS[1], 'open', 'EX', 3600)
+    redis.call('SET', KEYS[3], ARGV[1], 'EX', 3600)
+    redis.call('DEL', KEYS[4])
+    return 1
+end
+return 0
+"""
+
 class WebhookCircuitBreaker:
     """
     Circuit breaker for webhook URLs using Redis for state storage.
-    
+
     States:
     - CLOSED: Normal operation, requests go through
     - OPEN: Too many failures, requests blocked
-    - HALF_OPEN: Testing if service recovered
+    - HALF_OPEN: Testing if service recovered; up to `half_open_probes` requests
+      are let through per recovery timeout, the first success closes the circuit
+      and a failure re-opens it
+
+    With `open_cache_seconds` > 0 a process remembers an OPEN circuit for that long
+    (never past the recovery timeout), so workers hammering a dead endpoint skip Redis.
     """
-    
-    def __init__(self, redis_client: Redis, failure_threshold: int = 5, recovery_timeout: int = 60):
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        failure_threshold: int = 5,
+        recovery_timeout: int = 60,
+        half_open_probes: int = 1,
+        open_cache_seconds: float = 0.0,
+    ):
         self.redis = redis_client
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
-    
+        self.half_open_probes = half_open_probes
+        self.open_cache_seconds = open_cache_seconds
+        self._open_until: dict[str, float] = {}  # url -> time.monotonic() deadline
+        self._is_open_script = self.redis.register_script(_IS_OPEN_LUA)
+        self._success_script = self.redis.register_script(_SUCCESS_LUA)
+        self._failure_script = self.redis.register_script(_FAILURE_LUA)
+
     def _key_state(self, url: str) -> str:
         return f"circuit:state:{url}"
-    
+
     def _key_failures(self, url: str) -> str:
         return f"circuit:failures:{url}"
-    
+
     def _key_opened_at(self, url: str) -> str:
         return f"circuit:opened_at:{url}"
-    
+
+    def _key_probes(self, url: str) -> str:
+        return f"circuit:probes:{url}"
+
+    def _keys(self, url: str) -> list[str]:
+        return [self._key_state(url), self._key_failures(url), self._key_opened_at(url), self._key_probes(url)]
+
+    def _cached_open(self, url: str) -> bool:
+        until = self._open_until.get(url)
+        if until is None:
+            return False
+        if time.monotonic() < until:
+            return True
+        del self._open_until[url]
+        return False
+
+    def _remember(self, url: str, blocked: int, open_ms: int) -> bool:
+        """Cache an OPEN verdict locally; returns whether the request is blocked."""
+        if blocked and open_ms and self.open_cache_seconds > 0:
+            ttl = min(self.open_cache_seconds, open_ms / 1000.0)
+            self._open_until[url] = time.monotonic() + ttl
+        return bool(blocked)
+
+    def _opened(self, url: str, opened: int) -> bool:
+        if opened and self.open_cache_seconds > 0:
+            self._open_until[url] = time.monotonic() + min(self.open_cache_seconds, self.recovery_timeout)
+        return bool(opened)
+
     def is_open(self, url: str) -> bool:
         """Check if circuit is open (blocking requests)"""
-        state = self.redis.get(self._key_state(url))
-        
-        if state == b"open":
-            # Check if recovery timeout has passed
-            opened_at = self.redis.get(self._key_opened_at(url))
-            if opened_at:
-                opened_time = datetime.fromisoformat(opened_at.decode())
-                if datetime.now(timezone.utc) - opened_time > timedelta(seconds=self.recovery_timeout):
-                    # Transition to half-open
-                    self.redis.set(self._key_state(url), "half_open", ex=3600)
-                    return False
+        if self._cached_open(url):
             return True
-        
-        return False
-    
+        blocked, open_ms = self._is_open_script(
+            keys=self._keys(url),
+            args=[time.time(), self.recovery_timeout, self.half_open_probes],
+        )
+        return self._remember(url, blocked, open_ms)
+
     def record_success(self, url: str):
         """Record successful request"""
-        state = self.redis.get(self._key_state(url))
-        
-        if state == b"half_open":
-            # Recovery successful, close circuit
-            self.redis.delete(self._key_state(url))
-            self.redis.delete(self._key_failures(url))
-            self.redis.delete(self._key_opened_at(url))
-        else:
-            # Reset failure counter
-            self.redis.delete(self._key_failures(url))
-    
+        self._open_until.pop(url, None)
+        self._success_script(keys=self._keys(url))
+
     def record_failure(self, url: str):
         """Record failed request"""
-        failures = self.redis.incr(self._key_failures(url))
-        self.redis.expire(self._key_failures(url), 300)  # 5 min window
-        
-        if failures >= self.failure_threshold:
-            # Open circuit
-            self.redis.set(self._key_state(url), "open", ex=3600)
-            self.redis.set(
-                self._key_opened_at(url),
-                datetime.now(timezone.utc).isoformat(),
-                ex=3600
-            )
-            return True
-        
-        return False
-    
+        opened = self._failure_script(
+            keys=self._keys(url),
+            args=[time.time(), self.failure_threshold, FAILURE_WINDOW_SECONDS],
+        )
+        return self._opened(url, opened)
+
     def get_stats(self, url: str) -> dict:
         """Get circuit breaker stats for monitoring"""
-        return {
-            "state": (self.redis.get(self._key_state(url)) or b"closed").decode(),
-            "failures": int(self.redis.get(self._key_failures(url)) or 0),
-            "opened_at": (self.redis.get(self._key_opened_at(url)) or b"").decode(),
-        }
\ No newline at end of file
+        state, failures, opened_at = self.redis.mget(
+            self._key_state(url), self._key_failures(url), self._key_opened_at(url)
+        )
+        return _stats(state, failures, opened_at)
+
+
+def _stats(state: bytes | None, failures: bytes | None, opened_at: bytes | None) -> dict:
+    return {
+        "state": (state or b"closed").decode(),
+        "failures": int(failures or 0),
+        "opened_at": (
+            datetime.fromtimestamp(float(opened_at), tz=timezone.utc).isoformat() if opened_at else ""
+        ),
+    }
+
+
+class AsyncWebhookCircuitBreaker(WebhookCircuitBreaker):
+    """The same breaker (same keys, scripts and transitions) over an asyncio Redis client."""
+
+    def __init__(
+        self,
+        redis_client: AsyncRedis,
+        failure_threshold: int = 5,
+        recovery_timeout: int = 60,
+        half_open_probes: int = 1,
+        open_cache_seconds: float = 0.0,
+    ):
+        super().__init__(redis_client, failure_threshold, recovery_timeout, half_open_probes, open_cache_seconds)
+
+    async def is_open(self, url: str) -> bool:
+        """Check if circuit is open (blocking requests)"""
+        if self._cached_open(url):
+            return True
+        blocked, open_ms = await self._is_open_script(
+            keys=self._keys(url),
+            args=[time.time(), self.recovery_timeout, self.half_open_probes],
+        )
+        return self._remember(url, blocked, open_ms)
+
+    async def record_success(self, url: str):
+        """Record successful request"""
+        self._open_until.pop(url, None)
+        await self._success_script(keys=self._keys(url))
+
+    async def record_failure(self, url: str):
+        """Record failed request"""
+        opened = await self._failure_script(
+            keys=self._keys(url),
+            args=[time.time(), self.failure_threshold, FAILURE_WINDOW_SECONDS],
+        )
+        return self._opened(url, opened)
+
+    async def get_stats(self, url: str) -> dict:
+        """Get circuit breaker stats for monitoring"""
+        state, failures, opened_at = await self.redis.mget(
+            self._key_state(url), self._key_failures(url), self._key_opened_at(url)
+        )
+        return _stats(state, failures, opened_at)
+
+
+def breaker_options() -> dict:
+    """Constructor options from settings, shared by the Celery task and the asyncio worker."""
+    return {
+        "failure_threshold": settings.WEBHOOK_CIRCUIT_FAILURE_THRESHOLD,
+        "recovery_timeout": settings.WEBHOOK_CIRCUIT_RECOVERY_SECONDS,
+        "half_open_probes": settings.WEBHOOK_CIRCUIT_HALF_OPEN_PROBES,
+        "open_cache_seconds": settings.WEBHOOK_CIRCUIT_OPEN_CACHE_SECONDS,
+    }
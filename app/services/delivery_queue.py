@@ -0,0 +1,97 @@
+# app/services/delivery_queue.py
+import time
+from typing import Iterable
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from app.services.redis_client import get_redis
+
+DUE_KEY = "webhook:due"        # delivery_id scored by the time it may be attempted
+LEASES_KEY = "webhook:leases"  # claimed delivery_id scored by its lease expiry
+
+# KEYS: due, leases | ARGV: now, limit, lease_until
+# Moves up to `limit` due deliveries to the lease set and returns them.
+_CLAIM_LUA = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZADD', KEYS[2], ARGV[3], id)
+end
+return ids
+"""
+
+# KEYS: due, leases | ARGV: now
+# Returns deliveries whose lease expired (the worker died mid-attempt) to the due set.
+_REAP_LUA = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[1], id)
+end
+return #ids
+"""
+
+class DeliveryQueue:
+    """
+    Producer side of the asyncio delivery worker's queue: a Redis sorted set of
+    delivery IDs scored by the time they become due.
+    """
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+
+    def schedule(self, delivery_ids: Iterable[int], at: float | None = None):
+        """Make deliveries due at `at` (unix seconds, default now)."""
+        due = time.time() if at is None else at
+        mapping = {str(did): due for did in delivery_ids}
+        if mapping:
+            self.redis.zadd(DUE_KEY, mapping)
+
+    def pending(self) -> int:
+        """Deliveries waiting to become due or be claimed"""
+        return self.redis.zcard(DUE_KEY)
+
+class AsyncDeliveryQueue:
+    """
+    Consumer side, used by the asyncio delivery worker.
+
+    - claim(): atomically moves due IDs into a lease set (one Lua call), so concurrent
+      worker processes never claim the same ID.
+    - ack(): drops the lease once the attempt is recorded in the database.
+    - retry_at(): re-schedules an attempt and drops its lease in one transaction.
+    - reap(): re-queues IDs whose lease expired because a worker died mid-attempt.
+    The database claim (claim_delivery) still guards against double sends.
+    """
+
+    def __init__(self, redis_client: AsyncRedis, lease_seconds: int = 120):
+        self.redis = redis_client
+        self.lease_seconds = lease_seconds
+        self._claim = self.redis.register_script(_CLAIM_LUA)
+        self._reap = self.redis.register_script(_REAP_LUA)
+
+    async def claim(self, limit: int, now: float | None = None) -> list[int]:
+        now = time.time() if now is None else now
+        ids = await self._claim(keys=[DUE_KEY, LEASES_KEY], args=[now, limit, now + self.lease_seconds])
+        return [int(i) for i in ids]
+
+    async def ack(self, delivery_id: int):
+        await self.redis.zrem(LEASES_KEY, str(delivery_id))
+
+    async def retry_at(self, delivery_id: int, at: float):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zadd(DUE_KEY, {str(delivery_id): at})
+        pipe.zrem(LEASES_KEY, str(delivery_id))
+        await pipe.execute()
+
+    async def reap(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        return int(await self._reap(keys=[DUE_KEY, LEASES_KEY], args=[now]))
+
+# Lazy-initialized producer instance
+_delivery_queue: DeliveryQueue | None = None
+
+def get_delivery_queue() -> DeliveryQueue:
+    global _delivery_queue
+    if _delivery_queue is None:
+        _delivery_queue = DeliveryQueue(get_redis())
+    return _delivery_queue
@@ -0,0 +1,131 @@
+# app/services/delivery_stats.py
+import math
+import time
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from app.services.redis_client import get_redis
+from app.settings import settings
+
+class DeliveryStats:
+    """
+    Rolling per-subscription delivery aggregates in Redis, one hash per minute
+    (`webhook:stats:{webhook_id}:{minute}`) expiring after the window:
+
+    - attempts / ok: HTTP attempts and those answered with 2xx (success ratio)
+    - deliveries / delivery_attempts: deliveries that finished (delivered or failed for
+      good) and the attempts they took (attempts per delivery)
+    - b:{i}: a DDSketch latency histogram. Bucket i counts durations in
+      (gamma^(i-1), gamma^i] ms with gamma = (1 + a) / (1 - a), so any quantile is
+      within relative accuracy `a`, and sketches merge by adding bucket counts.
+
+    Recording is one pipelined round trip; summary() merges the window's minutes.
+    """
+
+    def __init__(self, redis_client: Redis, window_minutes: int = 60, relative_accuracy: float = 0.01):
+        self.redis = redis_client
+        self.window_minutes = window_minutes
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+    def _key(self, webhook_id: int, minute: int) -> str:
+        return f"webhook:stats:{webhook_id}:{minute}"
+
+    def _bucket(self, duration_ms: float) -> int:
+        return math.ceil(math.log(max(duration_ms, 0.01)) / self._log_gamma)
+
+    def _pipeline(self, webhook_id: int, duration_ms: float, ok: bool, finished_attempts: list[int]):
+        key = self._key(webhook_id, int(time.time() // 60))
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(key, "attempts", 1)
+        if ok:
+            pipe.hincrby(key, "ok", 1)
+        pipe.hincrby(key, f"b:{self._bucket(duration_ms)}", 1)
+        if finished_attempts:
+            pipe.hincrby(key, "deliveries", len(finished_attempts))
+            pipe.hincrby(key, "delivery_attempts", sum(finished_attempts))
+        pipe.expire(key, (self.window_minutes + 1) * 60)
+        return pipe
+
+    def record(self, webhook_id: int, duration_ms: float, ok: bool, finished_attempts: list[int] = ()):
+        """
+        Record one HTTP attempt. finished_attempts holds the attempt counts of the
+        deliveries this attempt finished (several for a batch, none when retried).
+        """
+        self._pipeline(webhook_id, duration_ms, ok, finished_attempts).execute()
+
+    def _summary_pipeline(self, webhook_id: int):
+        now = int(time.time() // 60)
+        pipe = self.redis.pipeline(transaction=False)
+        for minute in range(now - self.window_minutes + 1, now + 1):
+            pipe.hgetall(self._key(webhook_id, minute))
+        return pipe
+
+    def summary(self, webhook_id: int) -> dict:
+        """Aggregates over the last window_minutes: latency quantiles, success ratio, attempts per delivery."""
+        return self._summarize(self._summary_pipeline(webhook_id).execute())
+
+    def _summarize(self, hashes: list[dict]) -> dict:
+        totals: dict[str, int] = {}
+        buckets: dict[int, int] = {}
+        for fields in hashes:
+            for field, value in fields.items():
+                field = field.decode()
+                if field.startswith("b:"):
+                    index = int(field[2:])
+                    buckets[index] = buckets.get(index, 0) + int(value)
+                else:
+                    totals[field] = totals.get(field, 0) + int(value)
+
+        attempts = totals.get("attempts", 0)
+        deliveries = totals.get("deliveries", 0)
+        return {
+            "window_minutes": self.window_minutes,
+            "attempts": attempts,
+            "success_ratio": totals.get("ok", 0) / attempts if attempts else None,
+            "deliveries": deliveries,
+            "attempts_per_delivery": totals.get("delivery_attempts", 0) / deliveries if deliveries else None,
+            "latency_ms": {
+                "p50": self._quantile(buckets, 0.50),
+                "p95": self._quantile(buckets, 0.95),
+                "p99": self._quantile(buckets, 0.99),
+            },
+        }
+
+    def _quantile(self, buckets: dict[int, int], q: float) -> float | None:
+        count = sum(buckets.values())
+        if not count:
+            return None
+        rank = q * (count - 1)
+        seen = 0
+        for index in sorted(buckets):
+            seen += buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket, within the relative accuracy of every value in it
+                return round(2 * self.gamma ** index / (self.gamma + 1), 3)
+        return None
+
+class AsyncDeliveryStats(DeliveryStats):
+    """The same aggregates (same keys) over an asyncio Redis client."""
+
+    def __init__(self, redis_client: AsyncRedis, window_minutes: int = 60, relative_accuracy: float = 0.01):
+        super().__init__(redis_client, window_minutes, relative_accuracy)
+
+    async def record(self, webhook_id: int, duration_ms: float, ok: bool, finished_attempts: list[int] = ()):
+        await self._pipeline(webhook_id, duration_ms, ok, finished_attempts).execute()
+
+    async def summary(self, webhook_id: int) -> dict:
+        return self._summarize(await self._summary_pipeline(webhook_id).execute())
+
+# Lazy-initialized stats instance
+_delivery_stats: DeliveryStats | None = None
+
+def get_delivery_stats() -> DeliveryStats:
+    global _delivery_stats
+    if _delivery_stats is None:
+        _delivery_stats = DeliveryStats(
+            get_redis(),
+            window_minutes=settings.WEBHOOK_STATS_WINDOW_MINUTES,
+            relative_accuracy=settings.WEBHOOK_STATS_RELATIVE_ACCURACY,
+        )
+    return _delivery_stats
@@ -30,11 +30,11 @@ def get_device_service(db: Session, device_id: int) -> Device:
         raise HTTPException(status_code=404, detail="device not found")
     return device
 
-def list_devices_service(db: Session, project_id: int):
-    """List all devices in a project"""
+def list_devices_service(db: Session, project_id: int, tag: str | None = None):
+    """List all devices in a project, optionally filtered by tag"""
     if not get_project(db, project_id):
         raise HTTPException(status_code=404, detail="project not found")
-    return list_devices(db, project_id=project_id)
+    return list_devices(db, project_id=project_id, tag=tag)
 
 def delete_device_service(db: Session, device_id: int):
     """Delete a device by ID"""
@@ -0,0 +1,113 @@
+# app/services/endpoint_limiter.py
+import time
+from typing import NamedTuple
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from app.services.redis_client import get_redis
+from app.settings import settings
+
+# An in-flight slot is dropped after this long even if it was never released (crashed worker)
+INFLIGHT_LEASE_SECONDS = 60
+
+# KEYS: inflight, bucket | ARGV: now, max_in_flight, max_rps, token, lease_seconds
+# Admits one request if the endpoint has a free in-flight slot and a rate token.
+# Returns {admitted, retry_after_ms}; retry_after_ms is 0 when the wait is unknown
+# (in-flight limit: a slot frees up when some request finishes).
+_ACQUIRE_LUA = """
+local now = tonumber(ARGV[1])
+local max_in_flight = tonumber(ARGV[2])
+local rps = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if max_in_flight > 0 and redis.call('ZCARD', KEYS[1]) >= max_in_flight then
+    return {0, 0}
+end
+if rps > 0 then
+    local cap = math.max(rps, 1)
+    local bucket = redis.call('HMGET', KEYS[2], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or cap
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(cap, tokens + math.max(0, now - ts) * rps)
+    if tokens < 1 then
+        return {0, math.ceil((1 - tokens) / rps * 1000)}
+    end
+    redis.call('HSET', KEYS[2], 'tokens', tokens - 1, 'ts', now)
+    redis.call('PEXPIRE', KEYS[2], math.ceil(cap / rps * 1000) + 1000)
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[5]), ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return {1, 0}
+"""
+
+class Admission(NamedTuple):
+    admitted: bool
+    retry_after: float  # seconds to wait before trying again when not admitted
+
+def endpoint_limits(wh) -> tuple[int, float]:
+    """(max_in_flight, max_rps) of a subscription; 0 means unlimited."""
+    max_in_flight = wh.max_in_flight if wh.max_in_flight is not None else settings.WEBHOOK_MAX_IN_FLIGHT_PER_ENDPOINT
+    max_rps = wh.max_rps if wh.max_rps is not None else settings.WEBHOOK_MAX_RPS_PER_ENDPOINT
+    return max_in_flight, max_rps
+
+class EndpointLimiter:
+    """
+    Per-subscription concurrency and rate limits shared by every delivery worker.
+
+    - In-flight: a sorted set of request tokens scored by lease expiry, so slots held by
+      a crashed worker free themselves after INFLIGHT_LEASE_SECONDS.
+    - Rate: a token bucket refilled at max_rps with a one-second burst.
+    acquire() checks both and takes a slot in one Lua call; release() frees the slot.
+    A request that is not admitted is meant to be deferred, not waited for.
+    """
+
+    def __init__(self, redis_client: Redis, defer_seconds: float = 1.0):
+        self.redis = redis_client
+        self.defer_seconds = defer_seconds
+        self._acquire = self.redis.register_script(_ACQUIRE_LUA)
+
+    def _keys(self, webhook_id: int) -> list[str]:
+        return [f"webhook:inflight:{webhook_id}", f"webhook:rate:{webhook_id}"]
+
+    def _args(self, token: str, max_in_flight: int, max_rps: float) -> list:
+        return [time.time(), max_in_flight, max_rps, token, INFLIGHT_LEASE_SECONDS]
+
+    def _admission(self, result) -> Admission:
+        admitted, retry_after_ms = result
+        if admitted:
+            return Admission(True, 0.0)
+        return Admission(False, retry_after_ms / 1000.0 if retry_after_ms else self.defer_seconds)
+
+    def acquire(self, webhook_id: int, token: str, max_in_flight: int, max_rps: float) -> Admission:
+        if max_in_flight <= 0 and max_rps <= 0:
+            return Admission(True, 0.0)
+        return self._admission(
+            self._acquire(keys=self._keys(webhook_id), args=self._args(token, max_in_flight, max_rps))
+        )
+
+    def release(self, webhook_id: int, token: str):
+        self.redis.zrem(self._keys(webhook_id)[0], token)
+
+class AsyncEndpointLimiter(EndpointLimiter):
+    """The same limiter (same keys and script) over an asyncio Redis client."""
+
+    def __init__(self, redis_client: AsyncRedis, defer_seconds: float = 1.0):
+        super().__init__(redis_client, defer_seconds)
+
+    async def acquire(self, webhook_id: int, token: str, max_in_flight: int, max_rps: float) -> Admission:
+        if max_in_flight <= 0 and max_rps <= 0:
+            return Admission(True, 0.0)
+        return self._admission(
+            await self._acquire(keys=self._keys(webhook_id), args=self._args(token, max_in_flight, max_rps))
+        )
+
+    async def release(self, webhook_id: int, token: str):
+        await self.redis.zrem(self._keys(webhook_id)[0], token)
+
+# Lazy-initialized limiter instance
+_endpoint_limiter: EndpointLimiter | None = None
+
+def get_endpoint_limiter() -> EndpointLimiter:
+    global _endpoint_limiter
+    if _endpoint_limiter is None:
+        _endpoint_limiter = EndpointLimiter(get_redis(), defer_seconds=settings.WEBHOOK_LIMIT_DEFER_MS / 1000.0)
+    return _endpoint_limiter
@@ -0,0 +1,157 @@
+# app/services/evaluation_profiler.py
+import random
+import threading
+import time
+from typing import NamedTuple
+
+import structlog
+from redis import Redis
+from app.services.redis_client import get_redis
+from app.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+_RULE_FIELDS = ("calls", "time_us", "rows", "matches", "fired")
+_DEVICE_FIELDS = ("calls", "time_us", "rows", "rules")
+
+class RuleSample(NamedTuple):
+    """Cost and outcome of one rule in one profiled evaluation."""
+    rule_id: int
+    elapsed_ns: int
+    rows: int      # events the rule considered (metric present, inside its window)
+    matches: int
+    fired: bool
+
+class EvaluationProfiler:
+    """
+    Sampled per-rule and per-device evaluation costs.
+
+    - sample(): decides once per evaluation whether it is profiled (EVALUATION_PROFILE_SAMPLE_RATE),
+      so unsampled evaluations pay one random() call.
+    - record(): adds a profiled evaluation to in-process counters; no I/O.
+    - At most `flush_seconds` after a sample the counters are added to Redis in one pipeline
+      (a hash per rule/device plus sorted sets by total time), so all workers share one report.
+      A timer flushes them on a quiet worker; worker shutdown flushes what is left.
+    - top(): the N most expensive rules and devices by total sampled time.
+    """
+
+    RULES_KEY = "eval:profile:rules"
+    DEVICES_KEY = "eval:profile:devices"
+
+    def __init__(self, redis_client: Redis, sample_rate: float, flush_seconds: float = 10.0):
+        self.redis = redis_client
+        self.sample_rate = sample_rate
+        self.flush_seconds = flush_seconds
+        self._rules: dict[int, list[int]] = {}
+        self._devices: dict[int, list[int]] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()  # the flush timer runs on its own thread
+        self._timer: threading.Timer | None = None
+
+    def _key_rule(self, rule_id: int) -> str:
+        return f"eval:profile:rule:{rule_id}"
+
+    def _key_device(self, device_id: int) -> str:
+        return f"eval:profile:device:{device_id}"
+
+    def sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record(self, device_id: int, elapsed_ns: int, rows_fetched: int, rules: list[RuleSample]):
+        """Aggregate one profiled evaluation of a device."""
+        with self._lock:
+            for r in rules:
+                agg = self._rules.get(r.rule_id)
+                if agg is None:
+                    agg = self._rules[r.rule_id] = [0] * len(_RULE_FIELDS)
+                agg[0] += 1
+                agg[1] += r.elapsed_ns // 1000
+                agg[2] += r.rows
+                agg[3] += r.matches
+                agg[4] += r.fired
+
+            agg = self._devices.get(device_id)
+            if agg is None:
+                agg = self._devices[device_id] = [0] * len(_DEVICE_FIELDS)
+            agg[0] += 1
+            agg[1] += elapsed_ns // 1000
+            agg[2] += rows_fetched
+            agg[3] += len(rules)
+
+            due = time.monotonic() - self._last_flush >= self.flush_seconds
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if due:
+            self.flush()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("evaluation_profile_flush_failed")
+
+    def flush(self):
+        """Add the in-process counters to Redis and reset them."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._rules and not self._devices:
+                return
+            rules, devices = self._rules, self._devices
+            self._rules, self._devices = {}, {}
+
+        pipe = self.redis.pipeline(transaction=False)
+        for rule_id, agg in rules.items():
+            for field, value in zip(_RULE_FIELDS, agg, strict=True):
+                pipe.hincrby(self._key_rule(rule_id), field, value)
+            pipe.zincrby(self.RULES_KEY, agg[1], rule_id)
+        for device_id, agg in devices.items():
+            for field, value in zip(_DEVICE_FIELDS, agg, strict=True):
+                pipe.hincrby(self._key_device(device_id), field, value)
+            pipe.zincrby(self.DEVICES_KEY, agg[1], device_id)
+        pipe.execute()
+
+    def _top(self, key: str, hash_key, fields: tuple, id_name: str, limit: int) -> list[dict]:
+        ids = [int(member) for member in self.redis.zrevrange(key, 0, limit - 1)]
+        if not ids:
+            return []
+        pipe = self.redis.pipeline(transaction=False)
+        for i in ids:
+            pipe.hmget(hash_key(i), fields)
+        out = []
+        for i, values in zip(ids, pipe.execute(), strict=True):
+            row = {id_name: i, **{f: int(v or 0) for f, v in zip(fields, values, strict=True)}}
+            row["avg_time_us"] = row["time_us"] / row["calls"] if row["calls"] else 0.0
+            out.append(row)
+        return out
+
+    def top(self, limit: int = 10) -> dict:
+        """Most expensive rules and devices by total sampled evaluation time."""
+        return {
+            "sample_rate": self.sample_rate,
+            "rules": self._top(self.RULES_KEY, self._key_rule, _RULE_FIELDS, "rule_id", limit),
+            "devices": self._top(self.DEVICES_KEY, self._key_device, _DEVICE_FIELDS, "device_id", limit),
+        }
+
+# Lazy-initialized profiler instance
+_profiler: EvaluationProfiler | None = None
+
+def get_evaluation_profiler() -> EvaluationProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = EvaluationProfiler(
+            get_redis(),
+            sample_rate=settings.EVALUATION_PROFILE_SAMPLE_RATE,
+            flush_seconds=settings.EVALUATION_PROFILE_FLUSH_SECONDS,
+        )
+    return _profiler
+
+def flush_evaluation_profiler():
+    """Flush this process's counters, if it has profiled anything (worker shutdown)."""
+    if _profiler is not None:
+        _profiler.flush()
@@ -0,0 +1,109 @@
+# app/services/evaluation_scheduler.py
+from redis import Redis
+from app.services.redis_client import get_redis
+from app.settings import settings
+
+# KEYS: dirty, guard, stats | ARGV: guard_ttl_ms
+# Marks the device dirty and takes the guard if nobody holds it.
+_REQUEST_LUA = """
+redis.call('SET', KEYS[1], '1')
+if redis.call('SET', KEYS[2], '1', 'NX', 'PX', ARGV[1]) then
+    redis.call('HINCRBY', KEYS[3], 'scheduled', 1)
+    return 1
+end
+redis.call('HINCRBY', KEYS[3], 'coalesced', 1)
+return 0
+"""
+
+# KEYS: dirty, guard, stats
+# Consumes the dirty flag; with nothing new to evaluate the guard is released.
+_BEGIN_LUA = """
+if redis.call('DEL', KEYS[1]) == 1 then
+    return 1
+end
+redis.call('DEL', KEYS[2])
+redis.call('HINCRBY', KEYS[3], 'idle', 1)
+return 0
+"""
+
+class EvaluationDebouncer:
+    """
+    Coalesces rule evaluations per device using Redis.
+
+    At most one evaluation per device is queued or running per debounce interval:
+    - request(): called on ingest. Marks the device dirty and returns True only if
+      the caller should enqueue an evaluation (nobody holds the device's guard).
+    - begin(): called when a debounced evaluation starts. Returns False when nothing
+      was ingested since the last run, releasing the guard.
+    - finish(): called when a run ends. Keeps the guard and the caller schedules a
+      trailing run one interval later, so events coalesced during the interval are
+      always evaluated.
+
+    Both request() and begin() are Lua scripts, so an ingest racing with the end of
+    a burst either sets the dirty flag before begin() sees it or finds the guard
+    released and enqueues a fresh evaluation.
+    """
+
+    STATS_KEY = "eval:debounce:stats"
+
+    def __init__(self, redis_client: Redis, interval_ms: int, guard_ttl_ms: int = 60000):
+        self.redis = redis_client
+        self.interval_ms = interval_ms
+        self.guard_ttl_ms = max(guard_ttl_ms, interval_ms * 2)
+        self._request = self.redis.register_script(_REQUEST_LUA)
+        self._begin = self.redis.register_script(_BEGIN_LUA)
+
+    @property
+    def interval_seconds(self) -> float:
+        return self.interval_ms / 1000.0
+
+    def _key_dirty(self, device_id: int) -> str:
+        return f"eval:dirty:{device_id}"
+
+    def _key_guard(self, device_id: int) -> str:
+        return f"eval:guard:{device_id}"
+
+    def _keys(self, device_id: int) -> list[str]:
+        return [self._key_dirty(device_id), self._key_guard(device_id), self.STATS_KEY]
+
+    def request(self, device_id: int) -> bool:
+        """Record new events for the device. True if an evaluation must be enqueued."""
+        return bool(self._request(keys=self._keys(device_id), args=[self.guard_ttl_ms]))
+
+    def begin(self, device_id: int) -> bool:
+        """Start a debounced run. False if there is nothing new to evaluate."""
+        return bool(self._begin(keys=self._keys(device_id)))
+
+    def finish(self, device_id: int, rerun: bool = False):
+        """
+        End a run while keeping the guard for the trailing run.
+        With rerun=True (the run failed) the device is marked dirty again so the
+        trailing run re-evaluates it.
+        """
+        pipe = self.redis.pipeline(transaction=True)
+        if rerun:
+            pipe.set(self._key_dirty(device_id), "1")
+        pipe.pexpire(self._key_guard(device_id), self.guard_ttl_ms)
+        pipe.hincrby(self.STATS_KEY, "runs", 1)
+        pipe.execute()
+
+    def get_stats(self) -> dict:
+        """Get debounce counters for monitoring"""
+        raw = self.redis.hgetall(self.STATS_KEY)
+        stats = {"scheduled": 0, "coalesced": 0, "runs": 0, "idle": 0}
+        for field, value in raw.items():
+            stats[field.decode() if isinstance(field, bytes) else field] = int(value)
+        return stats
+
+# Lazy-initialized debouncer instance
+_debouncer: EvaluationDebouncer | None = None
+
+def get_evaluation_debouncer() -> EvaluationDebouncer:
+    global _debouncer
+    if _debouncer is None:
+        _debouncer = EvaluationDebouncer(
+            get_redis(),
+            interval_ms=settings.EVALUATION_DEBOUNCE_MS,
+            guard_ttl_ms=settings.EVALUATION_DEBOUNCE_GUARD_TTL_MS,
+        )
+    return _debouncer
@@ -1,25 +1,35 @@
 # app/services/evaluation_service.py
 from __future__ import annotations
 
+import time
 import structlog
 
 from datetime import datetime, timezone, timedelta
+from itertools import takewhile
+from typing import NamedTuple
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc, text
 
 from app.db.models.device import Device
-from app.db.models.alert import Alert
-from app.db.models.telemetry_event import TelemetryEvent
-from app.db.repositories.rule_repo import (
-    list_enabled_rules_for_project,
-    get_explicit_rule_ids_for_device,
+from app.db.repositories.rule_repo import get_explicit_rule_ids_for_device
+from app.db.repositories.alert_repo import (
+    create_alerts_outside_cooldown,
+    get_open_alert_states,
+    open_alerts,
+    resolve_open_alerts,
 )
-from app.db.repositories.alert_repo import get_latest_alert_time, create_alert
+from app.db.repositories.telemetry_repo import (
+    list_window_events,
+    list_window_events_after,
+    list_window_events_before,
+)
+from app.services.alert_cooldown import get_cooldown_gate
+from app.services.evaluation_profiler import RuleSample, get_evaluation_profiler
+from app.services.heartbeat_tracker import MissedHeartbeat, get_heartbeat_tracker
+from app.services.rule_index import CompiledRule, CompiledRuleSet, get_compiled_rule_set
+from app.settings import settings
 
 logger = structlog.get_logger(__name__)
 
-ALLOWED_OPS = {">", ">=", "<", "<="}
-
 def _compare(op: str, value: float, threshold: float) -> bool:
     if op == ">":
         return value > threshold
@@ -32,61 +42,105 @@ def _compare(op: str, value: float, threshold: float) -> bool:
     raise ValueError(f"Unsupported operator: {op}")
 
 
-def evaluate_rules_for_device(db: Session, device_id: int) -> list[int]:
-    """
-    Evaluate all enabled project rules that apply to this device.
-    Returns a list of created Alert IDs.
-    """
-    logger.info("evaluation_started", device_id=device_id)
-    device = db.get(Device, device_id)
-    if not device:
-        logger.warning("device_not_found", device_id=device_id)
-        return []
+class WindowResult(NamedTuple):
+    """Outcome of evaluating one rule against a device's event window."""
+    match_count: int
+    considered: int
+    latest_value: float | None
+    latest_ts: datetime | None
+    condition_matches: tuple[int, ...] | None = None  # compound rules only
 
-    rules = list_enabled_rules_for_project(db, project_id=device.project_id)
-    logger.info("rules_loaded", device_id=device_id, project_id=device.project_id, rule_count=len(rules))
-    
-    if not rules:
-        logger.info("no_rules", device_id=device_id)
-        return []
 
-    explicit_rule_ids = get_explicit_rule_ids_for_device(db, device_id=device_id)
+class EvaluationOutcome(NamedTuple):
+    """Alert transitions produced by one evaluation of a device."""
+    created: list[int]   # new alerts: cooldown alerts and newly OPEN stateful alerts
+    resolved: list[int]  # stateful alerts that moved OPEN -> RESOLVED
 
-    created_alert_ids: list[int] = []
 
-    for rule in rules:
-        # ---- applicability (ALL / EXPLICIT / TAG)
-        if rule.scope == "ALL":
-            applies = True
-        elif rule.scope == "EXPLICIT":
-            applies = rule.id in explicit_rule_ids
-        elif rule.scope == "TAG":
-            applies = bool(rule.tag) and (rule.tag in (device.tags or []))
-        else:
-            applies = False
+class WindowEvent(NamedTuple):
+    """Minimal event shape the evaluators read (matches the rows of list_window_events)."""
+    id: int
+    ts: datetime
+    payload: dict
 
-        if not applies:
-            continue
 
-        # ---- validation
-        if rule.operator not in ALLOWED_OPS:
-            continue
-        if rule.required_k > rule.window_n:
-            continue
+def _sort_key(ev) -> tuple:
+    return (ev.ts, ev.id)
+
+
+def _load_window(
+    db: Session,
+    device_id: int,
+    limit: int,
+    recent_events: list | None = None,
+    since: datetime | None = None,
+) -> list:
+    """
+    Load the newest `limit` events for a device (ts DESC, id DESC), optionally only
+    those with ts >= `since`.
+
+    When `recent_events` (a just-committed batch held in memory) is given, only the
+    rows the batch cannot supply are read:
+    - rows from other writers sorting after the batch's cutoff (normally none), and
+    - the older tail needed to fill the window.
+    """
+    if not recent_events:
+        return list_window_events(db, device_id, limit=limit, since=since)
+
+    batch = sorted(recent_events, key=_sort_key, reverse=True)[:limit]
+    cutoff = batch[-1]
+
+    newer = list_window_events_after(
+        db,
+        device_id,
+        ts=cutoff.ts,
+        event_id=cutoff.id,
+        exclude_ids=[ev.id for ev in recent_events],
+        limit=limit,
+    )
+    window = sorted(batch + newer, key=_sort_key, reverse=True)[:limit]
 
-        # ---- load last N events
-        q = (
-            select(TelemetryEvent)
-            .where(TelemetryEvent.device_id == device_id)
-            .order_by(desc(TelemetryEvent.ts), desc(TelemetryEvent.id))
-            .limit(rule.window_n)
+    if len(window) < limit:
+        window += list_window_events_before(
+            db, device_id, ts=cutoff.ts, event_id=cutoff.id, limit=limit - len(window), since=since
         )
-        events = list(db.execute(q).scalars().all())
+    if since is not None:
+        window = [ev for ev in window if ev.ts >= since]
+    return window
+
+
+def window_since(rule, now: datetime) -> datetime | None:
+    """Oldest timestamp inside a time-window rule's window (None for count windows)."""
+    if rule.window_seconds:
+        return now - timedelta(seconds=rule.window_seconds)
+    return None
+
+
+def evaluate_window_python(
+    rules: list, window: list, now: datetime | None = None
+) -> dict[int, WindowResult]:
+    """
+    Pure-Python k-of-n evaluation. `window` is ordered newest first and each rule
+    only looks at its first `window_n` entries. Count-window rules whose window is
+    not full are left out of the result; time-window rules (`window_seconds`) look
+    at the events with ts >= now - window_seconds among those entries.
+    """
+    now = now or datetime.now(timezone.utc)
+    results: dict[int, WindowResult] = {}
+
+    for rule in rules:
+        since = window_since(rule, now)
+        if since is None:
+            if len(window) < rule.window_n:
+                continue
+            events = window[: rule.window_n]
+        else:
+            events = takewhile(lambda ev, since=since: ev.ts >= since, window[: rule.window_n])
 
-        if len(events) < rule.window_n:
+        if rule.conditions:
+            results[rule.id] = _evaluate_compound(rule, events)
             continue
 
-        # ---- evaluate (k-of-n)
         match_count = 0
         considered = 0
 
@@ -108,110 +162,435 @@ def evaluate_rules_for_device(db: Session, device_id: int) -> list[int]:
                 if _compare(rule.operator, float(raw), float(rule.threshold)):
                     match_count += 1
 
-        # If metric missing everywhere in window -> skip
-        if considered == 0:
-            continue
+        results[rule.id] = WindowResult(match_count, considered, latest_value, latest_ts)
+
+    return results
+
+
+def _evaluate_compound(rule, events) -> WindowResult:
+    """
+    One pass over the window evaluating every condition of a compound rule per event.
+    An event is considered when any condition's metric is numeric; it matches when all
+    (AND) or any (OR) conditions hold. Per-condition match counts are kept for details.
+    """
+    conditions = rule.conditions
+    require_all = rule.combinator == "AND"
+    condition_matches = [0] * len(conditions)
+
+    match_count = 0
+    considered = 0
+    latest_ts: datetime | None = None
+
+    for ev in events:
+        payload = ev.payload or {}
+        seen = False
+        hits = 0
 
-        if match_count < rule.required_k:
+        for i, condition in enumerate(conditions):
+            raw = payload.get(condition.metric)
+            if isinstance(raw, (int, float)):
+                seen = True
+                if _compare(condition.operator, float(raw), float(condition.threshold)):
+                    condition_matches[i] += 1
+                    hits += 1
+
+        if not seen:
             continue
 
-        # ---- Create alert with advisory lock protection ----
-        # Use a separate function to handle the locked section cleanly
-        alert_id = _try_create_alert_with_lock(
-            db, device_id, rule, match_count, considered, latest_value, latest_ts
+        considered += 1
+        if latest_ts is None:
+            latest_ts = ev.ts
+        if (hits == len(conditions)) if require_all else (hits > 0):
+            match_count += 1
+
+    return WindowResult(match_count, considered, None, latest_ts, tuple(condition_matches))
+
+
+def _evaluate_window(rules: list, window: list, now: datetime) -> dict[int, WindowResult]:
+    """Dispatch to the evaluation engine selected by settings.EVALUATION_ENGINE."""
+    if settings.EVALUATION_ENGINE == "numpy":
+        from app.services.numpy_evaluator import evaluate_window_numpy
+
+        return evaluate_window_numpy(rules, window, now=now)
+    return evaluate_window_python(rules, window, now=now)
+
+
+def _evaluate_window_profiled(
+    rules: list, window: list, now: datetime
+) -> tuple[dict[int, WindowResult], dict[int, int]]:
+    """
+    Evaluate rule by rule so each rule's cost can be timed (sampled evaluations only).
+    Returns the results and the elapsed nanoseconds per rule ID.
+    """
+    results: dict[int, WindowResult] = {}
+    elapsed: dict[int, int] = {}
+    for rule in rules:
+        started = time.perf_counter_ns()
+        results.update(_evaluate_window([rule], window, now))
+        elapsed[rule.id] = time.perf_counter_ns() - started
+    return results, elapsed
+
+
+def _applicable_rules(db: Session, device: Device, rule_set: CompiledRuleSet) -> list[CompiledRule]:
+    """Rules of the set that apply to the device (ALL / EXPLICIT / TAG)."""
+    explicit_rule_ids = (
+        get_explicit_rule_ids_for_device(db, device_id=device.id)
+        if rule_set.has_explicit
+        else set()
+    )
+    return rule_set.applicable(device.tags, explicit_rule_ids)
+
+
+def evaluate_rules_for_device(
+    db: Session, device_id: int, recent_events: list | None = None
+) -> list[int]:
+    """
+    Evaluate all enabled project rules that apply to this device.
+    Returns a list of created Alert IDs (see evaluate_device for resolutions).
+    """
+    return evaluate_device(db, device_id, recent_events=recent_events).created
+
+
+def evaluate_device(
+    db: Session, device_id: int, recent_events: list | None = None
+) -> EvaluationOutcome:
+    """
+    Evaluate all enabled project rules that apply to this device.
+    `recent_events` is an optional just-ingested batch (id, ts, payload) used to
+    avoid re-reading those rows (see _load_window).
+
+    Stateless rules create an alert whenever they fire outside their cooldown.
+    Stateful rules open one alert when match_count reaches required_k and resolve it
+    when match_count drops to resolve_k or below; while it is OPEN nothing is written.
+
+    A sampled fraction of evaluations (EVALUATION_PROFILE_SAMPLE_RATE) is profiled:
+    rules are timed one by one and the costs go to the EvaluationProfiler.
+    """
+    profiler = get_evaluation_profiler()
+    profiled = profiler.sample()
+    started = time.perf_counter_ns() if profiled else 0
+
+    logger.info("evaluation_started", device_id=device_id)
+    device = db.get(Device, device_id)
+    if not device:
+        logger.warning("device_not_found", device_id=device_id)
+        return EvaluationOutcome([], [])
+
+    rule_set = get_compiled_rule_set(db, project_id=device.project_id)
+    logger.info("rules_loaded", device_id=device_id, project_id=device.project_id, rule_count=len(rule_set))
+    
+    if not rule_set:
+        logger.info("no_rules", device_id=device_id)
+        return EvaluationOutcome([], [])
+
+    # ---- applicability (ALL / EXPLICIT / TAG) + validation via the rule set;
+    # heartbeat rules are driven by the scanner, not by incoming events
+    applicable = [
+        rule for rule in _applicable_rules(db, device, rule_set) if not rule.is_heartbeat
+    ]
+
+    created_alert_ids: list[int] = []
+    resolved_alert_ids: list[int] = []
+
+    if applicable:
+        # ---- load the widest window once; each rule slices its own last N events.
+        # When every rule is time-windowed the read is also bounded by the oldest
+        # cutoff (served by ix_telemetry_device_ts).
+        now = datetime.now(timezone.utc)
+        cutoffs = [window_since(rule, now) for rule in applicable]
+        window = _load_window(
+            db,
+            device_id,
+            limit=max(rule.window_n for rule in applicable),
+            recent_events=recent_events,
+            since=None if None in cutoffs else min(cutoffs),
         )
-        
-        if alert_id is not None:
-            logger.info(
-                "alert_created",
-                alert_id=alert_id,
-                device_id=device_id,
-                rule_id=rule.id,
-                rule_name=rule.name,
-                metric=rule.metric,
-                threshold=rule.threshold,
-                latest_value=latest_value
-            )
-            created_alert_ids.append(alert_id)
+        if profiled:
+            results, rule_elapsed = _evaluate_window_profiled(applicable, window, now)
         else:
-            logger.debug(
-                "alert_skipped_cooldown",
-                device_id=device_id,
-                rule_id=rule.id
-            )
+            results = _evaluate_window(applicable, window, now)
+    else:
+        window, results = [], {}
+
+    # Open stateful alerts of this device (one indexed read, only if a rule needs it)
+    open_states = (
+        get_open_alert_states(db, device_id) if any(rule.stateful for rule in applicable) else {}
+    )
+
+    firing: list[tuple] = []
+    opening: list[tuple] = []
+    resolving: list[int] = []
+    for rule in applicable:
+        result = results.get(rule.id)
+
+        # Window not full yet / metric missing everywhere in window -> skip
+        # (a stateful alert keeps its state until there is data to decide on)
+        if result is None or result.considered == 0:
+            continue
+
+        if rule.stateful and rule.id in open_states:
+            if result.match_count <= rule.resolve_k:
+                resolving.append(rule.id)
+            continue
+
+        if result.match_count < rule.required_k:
+            continue
+
+        details = _alert_details(device_id, rule, result)
+        if rule.stateful:
+            opening.append((rule, details))
+        else:
+            firing.append((rule, details))
+
+    if firing:
+        created_alert_ids = _create_alerts(db, device_id, firing)
+    if opening or resolving:
+        opened, resolved_alert_ids = _transition_alerts(db, device_id, opening, resolving)
+        created_alert_ids += opened
+
+    if profiled:
+        fired = {rule.id for rule, _ in firing} | {rule.id for rule, _ in opening}
+        samples = []
+        for rule in applicable:
+            result = results.get(rule.id)
+            samples.append(RuleSample(
+                rule_id=rule.id,
+                elapsed_ns=rule_elapsed[rule.id],
+                rows=result.considered if result else 0,
+                matches=result.match_count if result else 0,
+                fired=rule.id in fired,
+            ))
+        profiler.record(device_id, time.perf_counter_ns() - started, len(window), samples)
 
     logger.info(
         "evaluation_completed",
         device_id=device_id,
-        alerts_created=len(created_alert_ids)
+        alerts_created=len(created_alert_ids),
+        alerts_resolved=len(resolved_alert_ids),
     )
     
-    return created_alert_ids
+    return EvaluationOutcome(created_alert_ids, resolved_alert_ids)
+
+
+def _rule_details(rule) -> dict:
+    details = {
+        "id": rule.id,
+        "name": rule.name,
+        "kind": rule.kind,
+        "metric": rule.metric,
+        "operator": rule.operator,
+        "threshold": rule.threshold,
+        "window_n": rule.window_n,
+        "required_k": rule.required_k,
+        "window_seconds": rule.window_seconds,
+        "cooldown_seconds": rule.cooldown_seconds,
+        "stateful": rule.stateful,
+        "scope": rule.scope,
+        "tag": getattr(rule, "tag", None),
+    }
+    if rule.is_heartbeat:
+        details["heartbeat_seconds"] = rule.heartbeat_seconds
+    if rule.stateful:
+        details["resolve_k"] = rule.resolve_k
+    if rule.conditions:
+        details["combinator"] = rule.combinator
+        details["conditions"] = [c._asdict() for c in rule.conditions]
+    return details
+
+
+def _alert_details(device_id: int, rule, result: WindowResult) -> dict:
+    details = {
+        "rule": _rule_details(rule),
+        "evaluation": {
+            "device_id": device_id,
+            "match_count": result.match_count,
+            "considered": result.considered,
+            "latest_value": result.latest_value,
+            "latest_ts": result.latest_ts.isoformat() if result.latest_ts else None,
+        },
+    }
+    if result.condition_matches is not None:
+        details["evaluation"]["condition_matches"] = [
+            {**c._asdict(), "match_count": count}
+            for c, count in zip(rule.conditions, result.condition_matches, strict=True)
+        ]
+    return details
+
+
+def _heartbeat_alert_details(device_id: int, rule, missed: MissedHeartbeat) -> dict:
+    deadline = datetime.fromtimestamp(missed.deadline, tz=timezone.utc)
+    return {
+        "rule": _rule_details(rule),
+        "evaluation": {
+            "device_id": device_id,
+            "last_seen": (deadline - timedelta(seconds=rule.heartbeat_seconds)).isoformat(),
+            "deadline": deadline.isoformat(),
+        },
+    }
+
+
+def _create_alerts(db: Session, device_id: int, firing: list[tuple]) -> list[int]:
+    """
+    Create alerts for all firing rules of a device, honouring each rule's cooldown.
+    `firing` holds (rule, alert details) pairs.
+
+    1. The Redis cooldown gate admits each (device, rule) at most once per cooldown
+       window across all workers (one pipelined round trip for every rule).
+    2. Admitted rules are inserted with a single INSERT ... SELECT that also skips any
+       rule with an alert inside its cooldown window in the database, which covers
+       gate keys lost on a Redis restart.
+    Returns the created alert IDs.
+    """
+    gate = get_cooldown_gate()
+    allowed = gate.acquire(device_id, [rule for rule, _ in firing])
 
+    for rule, _ in firing:
+        if rule.id not in allowed:
+            logger.debug("alert_skipped_cooldown", device_id=device_id, rule_id=rule.id)
 
-def _try_create_alert_with_lock(
-    db: Session,
-    device_id: int,
-    rule,
-    match_count: int,
-    considered: int,
-    latest_value: float | None,
-    latest_ts: datetime | None,
-) -> int | None:
-    """
-    Attempt to create an alert with advisory lock protection.
-    Returns alert ID if created, None if skipped due to cooldown.
-    
-    This function commits its own transaction to ensure the advisory
-    lock is held for the minimal necessary time.
-    """
-    try:
-        # Acquire advisory lock (held until transaction commits/rolls back)
-        # Convert device_id and rule_id to ensure they fit in int32 range for pg_advisory_xact_lock
-        db.execute(
-            text("SELECT pg_advisory_xact_lock(:device_id, :rule_id)"),
-            {"device_id": device_id, "rule_id": rule.id}
-        )
+    admitted = [(rule, details) for rule, details in firing if rule.id in allowed]
+    if not admitted:
+        return []
 
-        # Check cooldown AFTER acquiring lock
-        last_ts_alert = get_latest_alert_time(db, device_id=device_id, rule_id=rule.id)
-        now = datetime.now(timezone.utc)
-        
-        if last_ts_alert and (now - last_ts_alert) < timedelta(seconds=rule.cooldown_seconds):
-            # Still in cooldown, rollback and return None
-            db.rollback()
-            return None
-
-        # Not in cooldown, create the alert
-        details = {
-            "rule": {
-                "id": rule.id,
-                "name": rule.name,
-                "metric": rule.metric,
-                "operator": rule.operator,
-                "threshold": rule.threshold,
-                "window_n": rule.window_n,
-                "required_k": rule.required_k,
-                "cooldown_seconds": rule.cooldown_seconds,
-                "scope": rule.scope,
-                "tag": getattr(rule, "tag", None),
-            },
-            "evaluation": {
-                "device_id": device_id,
-                "match_count": match_count,
-                "considered": considered,
-                "latest_value": latest_value,
-                "latest_ts": latest_ts.isoformat() if latest_ts else None,
-            },
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "device_id": device_id,
+            "rule_id": rule.id,
+            "triggered_at": now,
+            "details": details,
+            "cooldown_cutoff": now - timedelta(seconds=rule.cooldown_seconds),
         }
+        for rule, details in admitted
+    ]
 
-        alert = Alert(device_id=device_id, rule_id=rule.id, details=details)
-        db.add(alert)
-        db.commit()  # Commit releases the advisory lock
-        db.refresh(alert)  # Get the alert ID
-        
-        return alert.id
+    try:
+        created = create_alerts_outside_cooldown(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        gate.release(device_id, [rule.id for rule, _ in admitted])
+        raise
+
+    by_rule = {rule.id: (rule, details) for rule, details in admitted}
+    for alert_id, rule_id in created:
+        rule, details = by_rule[rule_id]
+        logger.info(
+            "alert_created",
+            alert_id=alert_id,
+            device_id=device_id,
+            rule_id=rule.id,
+            rule_name=rule.name,
+            rule_kind=rule.kind,
+            metric=rule.metric,
+            threshold=rule.threshold,
+            latest_value=details["evaluation"].get("latest_value")
+        )
+    return [alert_id for alert_id, _ in created]
 
-    except Exception as e:
+
+def _transition_alerts(
+    db: Session, device_id: int, opening: list[tuple], resolving: list[int]
+) -> tuple[list[int], list[int]]:
+    """
+    Apply the state transitions of a device's stateful rules in one transaction:
+    open an alert for each (rule, details) in `opening` and resolve the open alerts
+    of the rule IDs in `resolving`. The (device, rule) state rows make both idempotent
+    across concurrent evaluations. Returns (opened alert IDs, resolved alert IDs).
+    """
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"device_id": device_id, "rule_id": rule.id, "triggered_at": now, "details": details}
+        for rule, details in opening
+    ]
+    try:
+        opened = open_alerts(db, rows)
+        resolved = resolve_open_alerts(db, device_id, resolving, now)
+        db.commit()
+    except Exception:
         db.rollback()
-        raise e
\ No newline at end of file
+        raise
+
+    by_rule = {rule.id: rule for rule, _ in opening}
+    for alert_id, rule_id in opened:
+        logger.info("alert_opened", alert_id=alert_id, device_id=device_id, rule_id=rule_id, rule_name=by_rule[rule_id].name)
+    for alert_id in resolved:
+        logger.info("alert_resolved", alert_id=alert_id, device_id=device_id)
+    return [alert_id for alert_id, _ in opened], resolved
+
+
+def touch_heartbeats(db: Session, device_id: int, now: datetime | None = None) -> int:
+    """
+    Push forward the heartbeat deadlines of a device that just reported.
+    Returns the number of heartbeat rules armed (no Redis call when there are none).
+    """
+    device = db.get(Device, device_id)
+    if not device:
+        return 0
+
+    rule_set = get_compiled_rule_set(db, project_id=device.project_id)
+    if not rule_set.has_heartbeat:
+        return 0
+
+    rules = [rule for rule in _applicable_rules(db, device, rule_set) if rule.is_heartbeat]
+    get_heartbeat_tracker().touch(device_id, rules, now or datetime.now(timezone.utc))
+    return len(rules)
+
+
+def evaluate_missed_heartbeats(
+    db: Session, now: datetime | None = None, batch_size: int = 500, max_batches: int = 20
+) -> list[int]:
+    """
+    Pop overdue heartbeat deadlines (`batch_size` at a time, at most `max_batches`
+    batches) and create their alerts through the cooldown path. Deadlines of rules
+    that were deleted, disabled or no longer apply are dropped. If creating a device's
+    alerts fails, its popped deadlines are put back for the next scan.
+    Returns the created alert IDs.
+    """
+    tracker = get_heartbeat_tracker()
+    now = now or datetime.now(timezone.utc)
+    created_alert_ids: list[int] = []
+    missed_count = 0
+
+    for _ in range(max_batches):
+        missed = tracker.pop_expired(now, limit=batch_size)
+        missed_count += len(missed)
+
+        by_device: dict[int, list[MissedHeartbeat]] = {}
+        for m in missed:
+            by_device.setdefault(m.device_id, []).append(m)
+
+        for device_id, device_missed in by_device.items():
+            try:
+                created_alert_ids += _create_heartbeat_alerts(db, device_id, device_missed)
+            except Exception:
+                logger.exception("heartbeat_evaluation_failed", device_id=device_id)
+                db.rollback()
+                tracker.restore(device_missed)
+
+        if len(missed) < batch_size:
+            break
+
+    logger.info("heartbeats_scanned", missed=missed_count, alerts_created=len(created_alert_ids))
+    return created_alert_ids
+
+
+def _create_heartbeat_alerts(db: Session, device_id: int, missed: list[MissedHeartbeat]) -> list[int]:
+    device = db.get(Device, device_id)
+    if not device:
+        return []
+
+    rule_set = get_compiled_rule_set(db, project_id=device.project_id)
+    rules = {
+        rule.id: rule
+        for rule in _applicable_rules(db, device, rule_set)
+        if rule.is_heartbeat
+    }
+    firing = [
+        (rules[m.rule_id], _heartbeat_alert_details(device_id, rules[m.rule_id], m))
+        for m in missed
+        if m.rule_id in rules
+    ]
+    if not firing:
+        return []
+    return _create_alerts(db, device_id, firing)
@@ -0,0 +1,84 @@
+# app/services/heartbeat_tracker.py
+from datetime import datetime
+from typing import NamedTuple
+
+from redis import Redis
+from app.services.redis_client import get_redis
+
+# KEYS: deadlines | ARGV: now (unix seconds), limit
+# Pops up to `limit` members whose deadline has passed, with their scores.
+_POP_EXPIRED_LUA = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+for i = 1, #expired, 2 do
+    redis.call('ZREM', KEYS[1], expired[i])
+end
+return expired
+"""
+
+class MissedHeartbeat(NamedTuple):
+    device_id: int
+    rule_id: int
+    deadline: float  # unix seconds
+
+class HeartbeatTracker:
+    """
+    Deadlines for heartbeat (dead-man) rules in one Redis sorted set.
+
+    Each member is "{device_id}:{rule_id}" scored by the time the next event is due.
+    - touch(): called on ingest; pushes the device's deadlines forward (one ZADD).
+    - pop_expired(): called by the periodic scanner; atomically removes and returns
+      only the overdue members (ZRANGEBYSCORE + ZREM in one Lua script), so a scan
+      costs O(log N + overdue) regardless of fleet size.
+    A popped member is re-armed by the device's next ingest, so a silent device
+    raises one alert per outage.
+    """
+
+    KEY = "heartbeat:deadlines"
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+        self._pop_expired = self.redis.register_script(_POP_EXPIRED_LUA)
+
+    def _member(self, device_id: int, rule_id: int) -> str:
+        return f"{device_id}:{rule_id}"
+
+    def touch(self, device_id: int, rules: list, now: datetime):
+        """Set the next deadline of each heartbeat rule for a device that just reported."""
+        if not rules:
+            return
+        ts = now.timestamp()
+        self.redis.zadd(
+            self.KEY,
+            {self._member(device_id, rule.id): ts + rule.heartbeat_seconds for rule in rules},
+        )
+
+    def pop_expired(self, now: datetime, limit: int) -> list[MissedHeartbeat]:
+        """Remove and return up to `limit` deadlines that are due at `now`."""
+        raw = self._pop_expired(keys=[self.KEY], args=[now.timestamp(), limit])
+        missed = []
+        for member, score in zip(raw[::2], raw[1::2], strict=True):
+            device_id, rule_id = (member.decode() if isinstance(member, bytes) else member).split(":")
+            missed.append(MissedHeartbeat(int(device_id), int(rule_id), float(score)))
+        return missed
+
+    def restore(self, missed: list[MissedHeartbeat]):
+        """Put popped deadlines back (e.g. creating their alerts failed) unless re-armed meanwhile."""
+        if missed:
+            self.redis.zadd(
+                self.KEY,
+                {self._member(m.device_id, m.rule_id): m.deadline for m in missed},
+                nx=True,
+            )
+
+    def pending(self) -> int:
+        """Number of armed deadlines"""
+        return self.redis.zcard(self.KEY)
+
+# Lazy-initialized tracker instance
+_heartbeat_tracker: HeartbeatTracker | None = None
+
+def get_heartbeat_tracker() -> HeartbeatTracker:
+    global _heartbeat_tracker
+    if _heartbeat_tracker is None:
+        _heartbeat_tracker = HeartbeatTracker(get_redis())
+    return _heartbeat_tracker
@@ -0,0 +1,127 @@
+# app/services/http_pool.py
+import asyncio
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import httpx
+from app.settings import settings
+
+WEBHOOK_TIMEOUT = httpx.Timeout(connect=2.0, read=5.0, write=5.0, pool=5.0)
+
+def _origin(url: str) -> tuple[str, str, int | None]:
+    parts = urlsplit(url)
+    return parts.scheme, (parts.hostname or "").lower(), parts.port
+
+class WebhookHttpPool:
+    """
+    Long-lived httpx clients for webhook delivery, one per origin (scheme, host, port).
+
+    A client per origin bounds the connections to each subscriber host
+    (`max_connections_per_host`) and keeps them alive between deliveries, so repeat
+    deliveries skip DNS, TCP and TLS setup. At most `max_hosts` origins are kept;
+    the least recently used one is closed when a new origin arrives.
+    Not fork-safe: build it in the worker process (see get_webhook_http_pool).
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        max_hosts: int = 256,
+        timeout: httpx.Timeout = WEBHOOK_TIMEOUT,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_connections_per_host,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.max_hosts = max_hosts
+        self.timeout = timeout
+        self._clients: OrderedDict[tuple, httpx.Client] = OrderedDict()
+
+    def client_for(self, url: str) -> httpx.Client:
+        """The pooled client for the URL's origin."""
+        key = _origin(url)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            return client
+
+        client = httpx.Client(timeout=self.timeout, limits=self.limits, http2=self.http2)
+        self._clients[key] = client
+        while len(self._clients) > self.max_hosts:
+            _, evicted = self._clients.popitem(last=False)
+            evicted.close()
+        return client
+
+    def close(self):
+        """Close every pooled connection."""
+        while self._clients:
+            _, client = self._clients.popitem()
+            client.close()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+class AsyncWebhookHttpPool(WebhookHttpPool):
+    """
+    httpx.AsyncClient per origin for the asyncio delivery worker. Many deliveries share
+    a client concurrently, so an evicted client is closed only after `timeout` has
+    elapsed for the requests still using it.
+    """
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        key = _origin(url)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            return client
+
+        client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=self.http2)
+        self._clients[key] = client
+        while len(self._clients) > self.max_hosts:
+            _, evicted = self._clients.popitem(last=False)
+            asyncio.get_running_loop().create_task(self._close_later(evicted))
+        return client
+
+    async def _close_later(self, client: httpx.AsyncClient):
+        t = self.timeout
+        await asyncio.sleep(sum(v or 0 for v in (t.connect, t.read, t.write, t.pool)))
+        await client.aclose()
+
+    async def aclose(self):
+        """Close every pooled connection."""
+        while self._clients:
+            _, client = self._clients.popitem()
+            await client.aclose()
+
+# Lazy-initialized pool, one per worker process
+_webhook_http_pool: WebhookHttpPool | None = None
+
+def get_webhook_http_pool() -> WebhookHttpPool:
+    global _webhook_http_pool
+    if _webhook_http_pool is None:
+        _webhook_http_pool = WebhookHttpPool(
+            max_connections_per_host=settings.WEBHOOK_MAX_CONNECTIONS_PER_HOST,
+            keepalive_expiry=settings.WEBHOOK_KEEPALIVE_EXPIRY_SECONDS,
+            http2=settings.WEBHOOK_HTTP2,
+            max_hosts=settings.WEBHOOK_POOL_MAX_HOSTS,
+        )
+    return _webhook_http_pool
+
+def reset_webhook_http_pool():
+    """
+    Forget a pool inherited across fork without closing it (its sockets belong to the
+    parent); the child builds its own on first use.
+    """
+    global _webhook_http_pool
+    _webhook_http_pool = None
+
+def close_webhook_http_pool():
+    """Close this process's pool (worker shutdown)."""
+    global _webhook_http_pool
+    if _webhook_http_pool is not None:
+        _webhook_http_pool.close()
+        _webhook_http_pool = None
@@ -0,0 +1,142 @@
+# app/services/numpy_evaluator.py
+"""
+Vectorized k-of-n evaluation backend.
+
+Selected with EVALUATION_ENGINE=numpy. Window values for a metric are loaded once
+into a float array (NaN where the metric is missing or not numeric) and every
+rule on that metric is compared against it in a single (rules x events) pass.
+Results match `evaluate_window_python` exactly.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from app.services.evaluation_service import WindowResult, window_since
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+_OPS = {
+    ">": lambda values, thresholds: values > thresholds,
+    ">=": lambda values, thresholds: values >= thresholds,
+    "<": lambda values, thresholds: values < thresholds,
+    "<=": lambda values, thresholds: values <= thresholds,
+}
+
+
+def _metric_values(window: list, metric: str, width: int):
+    """Float array of `metric` over the first `width` events, NaN where missing."""
+    nan = float("nan")
+    values = []
+    for ev in window[:width]:
+        raw = (ev.payload or {}).get(metric)
+        values.append(float(raw) if isinstance(raw, (int, float)) else nan)
+    return np.array(values, dtype=np.float64)
+
+
+def _window_length(rule, window: list, now: datetime) -> int:
+    """Number of leading window entries the rule looks at."""
+    since = window_since(rule, now)
+    if since is None:
+        return rule.window_n
+    length = 0
+    for ev in window[: rule.window_n]:
+        if ev.ts < since:
+            break
+        length += 1
+    return length
+
+
+def _evaluate_compound(rule, window: list, length: int) -> WindowResult:
+    """(conditions x events) match matrix reduced with all/any per event."""
+    present = np.zeros(length, dtype=bool)
+    hits = np.zeros((len(rule.conditions), length), dtype=bool)
+    for i, condition in enumerate(rule.conditions):
+        values = _metric_values(window, condition.metric, length)
+        present |= ~np.isnan(values)
+        hits[i] = _OPS[condition.operator](values, float(condition.threshold))
+
+    combined = hits.all(axis=0) if rule.combinator == "AND" else hits.any(axis=0)
+    latest_ts = window[int(np.argmax(present))].ts if present.any() else None
+
+    return WindowResult(
+        int(combined.sum()),
+        int(present.sum()),
+        None,
+        latest_ts,
+        tuple(int(count) for count in hits.sum(axis=1)),
+    )
+
+
+def evaluate_window_numpy(
+    rules: list, window: list, now: datetime | None = None
+) -> dict[int, WindowResult]:
+    """
+    Evaluate rules against a newest-first event window, grouping rules by metric.
+    Count-window rules whose window is not full are left out of the result.
+    """
+    if np is None:
+        raise RuntimeError("EVALUATION_ENGINE=numpy requires numpy (pip install '.[numpy]')")
+
+    now = now or datetime.now(timezone.utc)
+
+    by_metric: dict[str, list] = defaultdict(list)
+    compound: list = []
+    for rule in rules:
+        if not (rule.window_seconds or len(window) >= rule.window_n):
+            continue
+        if rule.conditions:
+            compound.append(rule)
+        else:
+            by_metric[rule.metric].append(rule)
+
+    results: dict[int, WindowResult] = {}
+
+    for rule in compound:
+        results[rule.id] = _evaluate_compound(rule, window, _window_length(rule, window, now))
+
+    for metric, group in by_metric.items():
+        lengths = np.array([_window_length(rule, window, now) for rule in group], dtype=np.int64)
+        width = int(lengths.max())
+
+        values = _metric_values(window, metric, width)
+        present = ~np.isnan(values)
+
+        # (rules x events) mask of positions inside each rule's own window
+        in_window = np.arange(width)[None, :] < lengths[:, None]
+
+        thresholds = np.array([float(rule.threshold) for rule in group], dtype=np.float64)
+        operators = np.array([rule.operator for rule in group])
+
+        # NaN compares False, so missing values never match
+        matches = np.zeros((len(group), width), dtype=bool)
+        for op, compare in _OPS.items():
+            rows = operators == op
+            if rows.any():
+                matches[rows] = compare(values[None, :], thresholds[rows][:, None])
+
+        match_counts = (matches & in_window).sum(axis=1)
+        considered = (present[None, :] & in_window).sum(axis=1)
+
+        # latest numeric value = first present entry (window is ts DESC)
+        first_present = int(np.argmax(present)) if present.any() else width
+
+        for i, rule in enumerate(group):
+            if first_present < lengths[i]:
+                latest_value = float(values[first_present])
+                latest_ts = window[first_present].ts
+            else:
+                latest_value = None
+                latest_ts = None
+
+            results[rule.id] = WindowResult(
+                int(match_counts[i]),
+                int(considered[i]),
+                latest_value,
+                latest_ts,
+            )
+
+    return results
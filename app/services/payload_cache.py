@@ -0,0 +1,69 @@
+# app/services/payload_cache.py
+import zlib
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from app.services.redis_client import get_redis
+from app.services.webhook_dispatch import build_body
+from app.settings import settings
+
+class PayloadCache:
+    """
+    Canonical webhook bodies, rendered once per alert event and stored zlib-compressed in
+    Redis, so a delivery attempt only signs the cached body instead of reloading the alert
+    and device and re-serializing them. Entries outlive the retry schedule
+    (WEBHOOK_PAYLOAD_TTL_SECONDS); a miss falls back to rendering from the database.
+    """
+
+    def __init__(self, redis_client: Redis, ttl_seconds: int = 172800):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, alert_id: int, event: str) -> str:
+        return f"webhook:body:{alert_id}:{event}"
+
+    def _pipeline(self, alerts, event: str):
+        """Render the bodies of alerts for one event; returns {alert_id: body} and the SET pipeline."""
+        bodies = {alert.id: build_body(alert, event) for alert in alerts}
+        pipe = self.redis.pipeline(transaction=False)
+        for alert_id, body in bodies.items():
+            pipe.set(self._key(alert_id, event), zlib.compress(body.encode("utf-8")), ex=self.ttl_seconds)
+        return bodies, pipe
+
+    @staticmethod
+    def _decode(raw: bytes | None) -> str | None:
+        return zlib.decompress(raw).decode("utf-8") if raw is not None else None
+
+    def render(self, alerts, event: str) -> dict[int, str]:
+        """Render and store the bodies of alerts for one event, in one round trip."""
+        bodies, pipe = self._pipeline(alerts, event)
+        if bodies:
+            pipe.execute()
+        return bodies
+
+    def get(self, alert_id: int, event: str) -> str | None:
+        return self._decode(self.redis.get(self._key(alert_id, event)))
+
+class AsyncPayloadCache(PayloadCache):
+    """The same cache over an asyncio Redis client."""
+
+    def __init__(self, redis_client: AsyncRedis, ttl_seconds: int = 172800):
+        super().__init__(redis_client, ttl_seconds)
+
+    async def render(self, alerts, event: str) -> dict[int, str]:
+        bodies, pipe = self._pipeline(alerts, event)
+        if bodies:
+            await pipe.execute()
+        return bodies
+
+    async def get(self, alert_id: int, event: str) -> str | None:
+        return self._decode(await self.redis.get(self._key(alert_id, event)))
+
+# Lazy-initialized cache instance
+_payload_cache: PayloadCache | None = None
+
+def get_payload_cache() -> PayloadCache:
+    global _payload_cache
+    if _payload_cache is None:
+        _payload_cache = PayloadCache(get_redis(), ttl_seconds=settings.WEBHOOK_PAYLOAD_TTL_SECONDS)
+    return _payload_cache
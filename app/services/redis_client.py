@@ -0,0 +1,13 @@
+# app/services/redis_client.py
+from redis import Redis
+from app.settings import settings
+
+# Lazy-initialized shared Redis client (one connection pool per process)
+_redis_client: Redis | None = None
+
+def get_redis() -> Redis:
+    """Return the process-wide Redis client, creating it on first use."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = Redis.from_url(settings.REDIS_URL)
+    return _redis_client
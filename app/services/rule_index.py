@@ -0,0 +1,189 @@
+# app/services/rule_index.py
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models.rule import Rule
+from app.db.repositories.rule_repo import list_enabled_rules_for_project
+from app.services.redis_client import get_redis
+from app.settings import settings
+
+ALLOWED_OPS = {">", ">=", "<", "<="}
+
+class Condition(NamedTuple):
+    """One metric comparison of a compound rule."""
+    metric: str
+    operator: str
+    threshold: float
+
+@dataclass(frozen=True, slots=True)
+class CompiledRule:
+    """Immutable snapshot of an enabled Rule, safe to cache across sessions."""
+    id: int
+    project_id: int
+    name: str
+    kind: str
+    metric: str | None
+    operator: str
+    threshold: float | None
+    conditions: tuple[Condition, ...] | None
+    combinator: str | None
+    window_n: int
+    required_k: int
+    window_seconds: int | None
+    heartbeat_seconds: int | None
+    cooldown_seconds: int
+    scope: str
+    tag: str | None
+    stateful: bool = False
+    resolve_k: int = 0
+
+    @classmethod
+    def from_model(cls, rule: Rule) -> CompiledRule:
+        return cls(
+            id=rule.id,
+            project_id=rule.project_id,
+            name=rule.name,
+            kind=rule.kind,
+            metric=rule.metric,
+            operator=rule.operator,
+            threshold=rule.threshold,
+            conditions=(
+                tuple(Condition(c["metric"], c["operator"], float(c["threshold"])) for c in rule.conditions)
+                if rule.conditions
+                else None
+            ),
+            combinator=rule.combinator,
+            window_n=rule.window_n,
+            required_k=rule.required_k,
+            window_seconds=rule.window_seconds,
+            heartbeat_seconds=rule.heartbeat_seconds,
+            cooldown_seconds=rule.cooldown_seconds,
+            scope=rule.scope,
+            tag=rule.tag,
+            stateful=bool(rule.stateful),
+            resolve_k=rule.resolve_k or 0,
+        )
+
+    @property
+    def is_heartbeat(self) -> bool:
+        return self.kind == "HEARTBEAT"
+
+    @property
+    def is_valid(self) -> bool:
+        if self.stateful and (self.is_heartbeat or not 0 <= self.resolve_k < self.required_k):
+            return False
+        if self.is_heartbeat:
+            return bool(self.heartbeat_seconds) and self.heartbeat_seconds > 0
+        if self.conditions:
+            return (
+                self.combinator in ("AND", "OR")
+                and all(c.operator in ALLOWED_OPS for c in self.conditions)
+                and self.required_k <= self.window_n
+            )
+        return (
+            self.metric is not None
+            and self.threshold is not None
+            and self.operator in ALLOWED_OPS
+            and self.required_k <= self.window_n
+        )
+
+
+class CompiledRuleSet:
+    """
+    The enabled, valid rules of a project indexed by scope:
+    - ALL rules in a flat list,
+    - TAG rules in an inverted index tag -> rules,
+    - EXPLICIT rules by rule ID.
+    Finding the rules for a device costs O(#device tags + #explicit assignments),
+    independent of how many TAG rules the project has.
+    """
+
+    def __init__(self, rules: list[CompiledRule]):
+        self.all_scope: list[CompiledRule] = []
+        self.by_tag: dict[str, list[CompiledRule]] = {}
+        self.explicit: dict[int, CompiledRule] = {}
+        self.size = 0
+        self.has_heartbeat = False
+
+        for rule in rules:
+            if not rule.is_valid:
+                continue
+            if rule.scope == "ALL":
+                self.all_scope.append(rule)
+            elif rule.scope == "TAG" and rule.tag:
+                self.by_tag.setdefault(rule.tag, []).append(rule)
+            elif rule.scope == "EXPLICIT":
+                self.explicit[rule.id] = rule
+            else:
+                continue
+            self.size += 1
+            self.has_heartbeat = self.has_heartbeat or rule.is_heartbeat
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def has_explicit(self) -> bool:
+        return bool(self.explicit)
+
+    def applicable(self, device_tags: list[str] | None, explicit_rule_ids: set[int] = frozenset()) -> list[CompiledRule]:
+        """Rules that apply to a device with these tags and explicit assignments."""
+        rules = list(self.all_scope)
+        for tag in set(device_tags or ()):
+            rules.extend(self.by_tag.get(tag, ()))
+        for rule_id in explicit_rule_ids:
+            rule = self.explicit.get(rule_id)
+            if rule is not None:
+                rules.append(rule)
+        return rules
+
+
+# In-process cache: project_id -> (expires_at, rule set version, CompiledRuleSet)
+_cache: dict[int, tuple[float, bytes | None, CompiledRuleSet]] = {}
+
+def _version_key(project_id: int) -> str:
+    return f"ruleset:version:{project_id}"
+
+def get_compiled_rule_set(db: Session, project_id: int) -> CompiledRuleSet:
+    """
+    Get the compiled rule set for a project, cached in-process for
+    RULESET_CACHE_TTL_SECONDS (0 disables caching). Each lookup compares the project's
+    rule set version in Redis (one GET) with the cached one, so a rule change made in
+    any process is picked up by every process on its next evaluation.
+    """
+    ttl = settings.RULESET_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        rules = list_enabled_rules_for_project(db, project_id=project_id)
+        return CompiledRuleSet([CompiledRule.from_model(r) for r in rules])
+
+    now = time.monotonic()
+    # Read before the rules: a change committed in between only causes one extra reload
+    version = get_redis().get(_version_key(project_id))
+    cached = _cache.get(project_id)
+    if cached and cached[0] > now and cached[1] == version:
+        return cached[2]
+
+    rules = list_enabled_rules_for_project(db, project_id=project_id)
+    rule_set = CompiledRuleSet([CompiledRule.from_model(r) for r in rules])
+    _cache[project_id] = (now + ttl, version, rule_set)
+    return rule_set
+
+def rule_set_changed(project_id: int):
+    """
+    Record a committed rule change: bump the project's rule set version so every process
+    reloads it on its next lookup, and drop this process's entry.
+    """
+    get_redis().incr(_version_key(project_id))
+    invalidate_rule_set(project_id)
+
+def invalidate_rule_set(project_id: int | None = None):
+    """Drop cached rule sets for a project (or all projects) in this process."""
+    if project_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(project_id, None)
@@ -1,10 +1,13 @@
 # app/services/rule_service.py
 from fastapi import HTTPException
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.db.models.rule import Rule
+from app.schemas.rule import RuleCreate, RuleUpdate
 from app.db.repositories.rule_repo import create_rule, delete_rule, list_enabled_rules_for_project, list_rules_for_project, get_rule, replace_rule_devices, update_rule
 from app.db.repositories.device_repo import list_device_ids_for_project, get_device
+from app.services.rule_index import rule_set_changed
 
 def create_rule_service(db: Session, project_id: int, data) -> Rule:
     """Create a new rule within a specific project."""
@@ -14,17 +17,26 @@ def create_rule_service(db: Session, project_id: int, data) -> Rule:
     rule = Rule(
         project_id=project_id,
         name=data.name,
+        kind=data.kind,
         metric=data.metric,
         operator=data.operator,
         threshold=data.threshold,
+        conditions=[c.model_dump() for c in data.conditions] if data.conditions else None,
+        combinator=data.combinator,
         window_n=data.window_n,
         required_k=data.required_k,
+        window_seconds=data.window_seconds,
+        heartbeat_seconds=data.heartbeat_seconds,
         cooldown_seconds=data.cooldown_seconds,
+        stateful=data.stateful,
+        resolve_k=data.resolve_k,
         enabled=data.enabled,
         scope=data.scope,
         tag=data.tag,
     )
-    return create_rule(db, rule)
+    rule = create_rule(db, rule)
+    rule_set_changed(project_id)
+    return rule
 
 def list_rules_service(db: Session, project_id: int) -> list[Rule]:
     """List all rules for a specific project."""
@@ -41,17 +53,53 @@ def list_enabled_rules_for_project_service(db: Session, project_id: int) -> list
     """List all enabled rules for a specific project."""
     return list_enabled_rules_for_project(db, project_id)
 
+def _validated_changes(rule: Rule, data) -> dict:
+    """
+    Apply a partial update to `rule` and validate the result as a whole rule, with the
+    same checks and defaults as creation. Returns the fields that change.
+    """
+    changes = data.model_dump(exclude_unset=True)
+    # Switching between a simple and a compound rule drops the other form
+    if changes.get("conditions") is not None:
+        changes.setdefault("metric", None)
+        changes.setdefault("threshold", None)
+    elif changes.get("metric") is not None or changes.get("threshold") is not None or "conditions" in changes:
+        changes.setdefault("conditions", None)
+        changes.setdefault("combinator", None)
+
+    merged = {field: getattr(rule, field) for field in RuleCreate.model_fields} | changes
+    try:
+        validated = RuleCreate(**merged)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=400,
+            detail="; ".join(err["msg"].removeprefix("Value error, ") for err in e.errors()),
+        ) from e
+    if validated.required_k > validated.window_n:
+        raise HTTPException(status_code=400, detail="required_k cannot be greater than window_n")
+
+    return {
+        field: value
+        for field, value in validated.model_dump().items()
+        if field in RuleUpdate.model_fields and value != getattr(rule, field)
+    }
+
 def update_rule_service(db: Session, rule_id: int, data) -> Rule:
     """Update an existing rule."""
-    if data.required_k is not None and data.window_n is not None and data.required_k > data.window_n:
-        raise HTTPException(status_code=400, detail="required_k cannot be greater than window_n")
-    updated_rule = update_rule(db, rule_id, data)
+    rule = get_rule_service(db, rule_id)
+    updated_rule = update_rule(db, rule_id, RuleUpdate(**_validated_changes(rule, data)))
+    rule_set_changed(updated_rule.project_id)
     return updated_rule
 
 def delete_rule_service(db: Session, rule_id: int) -> None:
     """Delete a specific rule by its ID."""
+    rule = get_rule(db, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="rule not found")
+    project_id = rule.project_id
     if not delete_rule(db, rule_id):
         raise HTTPException(status_code=404, detail="rule not found")
+    rule_set_changed(project_id)
 
 def assign_rule_devices_service(db: Session, rule_id: int, device_ids: list[int]) -> None:
     """Assign a list of devices to a specific rule."""
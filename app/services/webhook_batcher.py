@@ -0,0 +1,73 @@
+# app/services/webhook_batcher.py
+from redis import Redis
+from app.services.redis_client import get_redis
+
+# KEYS: items, timer | ARGV: max_items, wait_ms, delivery_id...
+# Buffers the IDs. Returns 2 when the buffer is full (flush now), 1 when this call
+# started the wait window (flush after wait_ms), 0 when a flush is already scheduled.
+_ADD_LUA = """
+for i = 3, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+end
+if redis.call('LLEN', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 2
+end
+if redis.call('SET', KEYS[2], '1', 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+# KEYS: items, timer | ARGV: max_items, wait_ms
+# Pops up to max_items IDs. Returns {ids, remaining}; while IDs remain the wait
+# window is re-armed, otherwise it is cleared so the next add starts a new one.
+_POP_LUA = """
+local n = tonumber(ARGV[1])
+local ids = redis.call('LRANGE', KEYS[1], 0, n - 1)
+redis.call('LTRIM', KEYS[1], n, -1)
+local remaining = redis.call('LLEN', KEYS[1])
+if remaining > 0 then
+    redis.call('SET', KEYS[2], '1', 'PX', ARGV[2])
+else
+    redis.call('DEL', KEYS[2])
+end
+return {ids, remaining}
+"""
+
+FLUSH_NOW = 2
+FLUSH_LATER = 1
+
+class WebhookBatcher:
+    """
+    Per-subscription buffer of delivery IDs for batched webhooks.
+
+    - add(): called on enqueue; tells the caller whether to flush now (max items
+      reached), after the wait window (first item of a new batch), or not at all.
+    - pop(): called by the flush task; takes the next batch atomically, so two flushes
+      never send the same delivery.
+    The delivery rows stay 'pending' in the database until a flush claims them.
+    """
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+        self._add = self.redis.register_script(_ADD_LUA)
+        self._pop = self.redis.register_script(_POP_LUA)
+
+    def _keys(self, webhook_id: int) -> list[str]:
+        return [f"webhook:batch:{webhook_id}", f"webhook:batch:timer:{webhook_id}"]
+
+    def add(self, webhook_id: int, delivery_ids: list[int], max_items: int, wait_ms: int) -> int:
+        return int(self._add(keys=self._keys(webhook_id), args=[max_items, wait_ms, *delivery_ids]))
+
+    def pop(self, webhook_id: int, max_items: int, wait_ms: int) -> tuple[list[int], int]:
+        ids, remaining = self._pop(keys=self._keys(webhook_id), args=[max_items, wait_ms])
+        return [int(i) for i in ids], int(remaining)
+
+# Lazy-initialized batcher instance
+_webhook_batcher: WebhookBatcher | None = None
+
+def get_webhook_batcher() -> WebhookBatcher:
+    global _webhook_batcher
+    if _webhook_batcher is None:
+        _webhook_batcher = WebhookBatcher(get_redis())
+    return _webhook_batcher
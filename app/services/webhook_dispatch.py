@@ -0,0 +1,81 @@
+# app/services/webhook_dispatch.py
+"""
+Transport-independent parts of a webhook delivery attempt, shared by the Celery task
+(app.workers.tasks.webhook_delivery) and the asyncio engine (app.workers.async_delivery):
+payload, signature, response classification and retry backoff.
+"""
+import hashlib
+import hmac
+import json
+import random
+from datetime import datetime, timezone
+from typing import Literal
+
+# Retries after the first attempt (a delivery is tried at most MAX_RETRIES + 1 times)
+MAX_RETRIES = 8
+
+Outcome = Literal["success", "retry", "fail"]
+
+# Task results of an attempt after which the delivery is finished (delivered or failed for good)
+FINISHED_RESULTS = ("success", "failed_non_retryable", "failed_max_retries")
+
+def sign(secret: str, timestamp: str, body: str) -> str:
+    """Generate HMAC SHA256 signature for webhook payload."""
+    msg = f"{timestamp}.{body}".encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), msg, hashlib.sha256).hexdigest()
+
+def retry_countdown(retries: int) -> int:
+    """Calculate exponential backoff delay with jitter for retries."""
+    base = 5
+    cap = 60 * 30
+    delay = min(cap, base * (2 ** retries))
+    jitter = random.randint(0, min(30, delay))
+    return delay + jitter
+
+def build_payload(alert, event: str) -> dict:
+    """Payload of one alert event."""
+    return {
+        "event": event,
+        "alert_id": alert.id,
+        "device_id": alert.device_id,
+        "rule_id": alert.rule_id,
+        "triggered_at": alert.triggered_at.isoformat(),
+        "details": alert.details,
+        "status": alert.status,
+        "resolved_at": alert.resolved_at.isoformat() if alert.resolved_at else None,
+    }
+
+def build_body(alert, event: str) -> str:
+    """Serialized payload for an alert event."""
+    return json.dumps(build_payload(alert, event), separators=(",", ":"), sort_keys=True)
+
+def build_batch_body(batch_id: str, items: list[tuple]) -> str:
+    """
+    Serialized batch payload, signed as a whole: one array with an alert event per
+    (delivery, alert) pair, each tagged with its delivery_id.
+    """
+    payload = {
+        "event": "alert.batch",
+        "batch_id": batch_id,
+        "items": [
+            {**build_payload(alert, delivery.event), "delivery_id": delivery.id}
+            for delivery, alert in items
+        ],
+    }
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True)
+
+def build_headers(secret: str | None, body: str) -> dict:
+    """Request headers, signed with the subscription secret when it has one."""
+    ts = datetime.now(timezone.utc).isoformat()
+    headers = {"Content-Type": "application/json", "X-Telemetry-Timestamp": ts}
+    if secret:
+        headers["X-Telemetry-Signature"] = sign(secret, ts, body)
+    return headers
+
+def classify_status(code: int) -> Outcome:
+    """2xx succeeds; 408, 429 and 5xx are retried; anything else fails for good."""
+    if 200 <= code < 300:
+        return "success"
+    if code == 429 or code == 408 or code >= 500:
+        return "retry"
+    return "fail"
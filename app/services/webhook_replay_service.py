@@ -0,0 +1,60 @@
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.db.repositories.webhook_repo import get_webhook_by_id
+from app.db.repositories.webhook_delivery_repo import count_by_status_for_replay, count_deliveries, list_dead_letters
+from app.db.repositories.webhook_replay_repo import create_replay, get_replay
+from app.schemas.webhook_delivery import WebhookReplayCreate, WebhookReplayOut
+from app.workers.tasks.webhook_delivery import replay_webhook_deliveries
+
+def _check_project(project_id: int, auth_project_id: int):
+    if project_id != auth_project_id:
+        raise HTTPException(status_code=403, detail="API key does not belong to this project")
+
+def _check_webhook(db: Session, project_id: int, webhook_id: int | None):
+    if webhook_id is not None:
+        wh = get_webhook_by_id(db, webhook_id)
+        if not wh or wh.project_id != project_id:
+            raise HTTPException(status_code=404, detail="webhook not found")
+
+def list_dead_letters_service(
+    db: Session,
+    project_id: int,
+    auth_project_id: int,
+    webhook_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 100,
+):
+    """List the failed deliveries of a project."""
+    _check_project(project_id, auth_project_id)
+    return list_dead_letters(db, project_id, webhook_id=webhook_id, since=since, until=until, limit=limit)
+
+def start_replay_service(db: Session, project_id: int, auth_project_id: int, data: WebhookReplayCreate):
+    """Record a replay of the selected deliveries and start re-queuing them in the background."""
+    _check_project(project_id, auth_project_id)
+    _check_webhook(db, project_id, data.webhook_id)
+
+    statuses = list(dict.fromkeys(data.statuses))
+    total = count_deliveries(
+        db, project_id, statuses, webhook_id=data.webhook_id, since=data.since, until=data.until
+    )
+    filters = {
+        "webhook_id": data.webhook_id,
+        "statuses": statuses,
+        "since": data.since.isoformat() if data.since else None,
+        "until": data.until.isoformat() if data.until else None,
+    }
+    replay = create_replay(db, project_id, filters, total)
+    replay_webhook_deliveries.delay(replay.id)
+    return WebhookReplayOut.model_validate(replay)
+
+def get_replay_service(db: Session, project_id: int, auth_project_id: int, replay_id: str):
+    """Progress of a replay: deliveries re-queued so far and their current status."""
+    _check_project(project_id, auth_project_id)
+    replay = get_replay(db, replay_id)
+    if not replay or replay.project_id != project_id:
+        raise HTTPException(status_code=404, detail="replay not found")
+    out = WebhookReplayOut.model_validate(replay)
+    out.deliveries = count_by_status_for_replay(db, replay_id)
+    return out
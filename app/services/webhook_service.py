@@ -1,13 +1,32 @@
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.db.repositories.project_repo import get_project
+from app.services.delivery_stats import get_delivery_stats
 from app.db.repositories.webhook_repo import create_webhook, list_webhooks, disable_webhook, get_webhook_by_id, circuit_breaker_get_stats
 
-def create_webhook_service(db: Session, project_id: int, url: str, secret: str | None):
+def create_webhook_service(
+    db: Session,
+    project_id: int,
+    url: str,
+    secret: str | None,
+    batch_max_items: int | None = None,
+    batch_max_wait_ms: int = 1000,
+    max_in_flight: int | None = None,
+    max_rps: float | None = None,
+):
     """Create a new webhook for a specific project."""
     if not get_project(db, project_id):
         raise HTTPException(status_code=404, detail="project not found")
-    return create_webhook(db, project_id=project_id, url=url, secret=secret)
+    return create_webhook(
+        db,
+        project_id=project_id,
+        url=url,
+        secret=secret,
+        batch_max_items=batch_max_items,
+        batch_max_wait_ms=batch_max_wait_ms,
+        max_in_flight=max_in_flight,
+        max_rps=max_rps,
+    )
 
 def list_webhooks_service(db: Session, project_id: int):
     """List all webhooks for a specific project."""
@@ -34,4 +53,9 @@ def get_circuit_status_service(db: Session, webhook_id: int):
     status = circuit_breaker_get_stats(db, webhook_id)
     if not status:
         raise HTTPException(status_code=404, detail="webhook not found or no circuit breaker data")
-    return status
\ No newline at end of file
+    return status
+
+def get_webhook_stats_service(db: Session, webhook_id: int):
+    """Get the rolling delivery stats (latency quantiles, success ratio, attempts per delivery) of a webhook."""
+    get_webhook_by_id_service(db, webhook_id)
+    return {"webhook_id": webhook_id, **get_delivery_stats().summary(webhook_id)}
@@ -1,4 +1,5 @@
 # app/settings.py
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,9 +9,79 @@ class Settings(BaseSettings):
     REDIS_URL: str
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+
+    # Database connection pools (per process; see app/db/pool.py)
+    DB_POOL_SIZE_API: int = 20
+    DB_MAX_OVERFLOW_API: int = 10
+    DB_POOL_SIZE_WORKER: int = 2  # per Celery prefork child, which runs one task at a time
+    DB_MAX_OVERFLOW_WORKER: int = 2
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # checkout wait before TimeoutError
+    DB_POOL_WAIT_WARN_MS: float = 100.0  # checkouts waiting longer are logged as slow_pool_checkout
+    DB_PGBOUNCER: bool = False  # PgBouncer transaction pooling: NullPool, no named prepared statements
     
     # Logging
     LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
+
+    # Rule evaluation
+    EVALUATION_ENGINE: Literal["python", "numpy"] = "python"  # numpy requires the [numpy] extra
+    EVALUATION_DEBOUNCE_MS: int = 0  # 0 = evaluate after every ingest batch
+    EVALUATION_DEBOUNCE_GUARD_TTL_MS: int = 60000  # must exceed debounce interval + evaluation time
+    INGEST_INLINE_EVALUATION: bool = False  # evaluate in the ingest worker (takes precedence over debounce)
+    RULESET_CACHE_TTL_SECONDS: int = 30  # per-process compiled rule set cache (checked against a Redis version), 0 = disabled
+    EVALUATION_SHARD_COUNT: int = 0  # >0 routes ingest/evaluation tasks to queues shard.0..N-1 by device_id
+
+    # Evaluation profiling
+    EVALUATION_PROFILE_SAMPLE_RATE: float = 0.0  # fraction of evaluations profiled per rule, 0 = off
+    EVALUATION_PROFILE_FLUSH_SECONDS: float = 10.0  # in-process aggregates are flushed to Redis this often
+
+    # Rule backtesting
+    BACKTEST_STREAM_BATCH: int = 5000  # rows fetched per server-side cursor round trip
+    BACKTEST_PARALLEL_MIN_DEVICES: int = 200  # fleets this large are replayed in a process pool
+    BACKTEST_MAX_WORKERS: int = 4
+
+    # Webhook HTTP client pool (one per worker process)
+    WEBHOOK_HTTP2: bool = False  # requires the [http2] extra
+    WEBHOOK_MAX_CONNECTIONS_PER_HOST: int = 10
+    WEBHOOK_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    WEBHOOK_POOL_MAX_HOSTS: int = 256  # least recently used host pools beyond this are closed
+    WEBHOOK_PAYLOAD_TTL_SECONDS: int = 172800  # pre-rendered bodies in Redis; must outlive the retry schedule
+
+    # Webhook circuit breaker (per endpoint URL)
+    WEBHOOK_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    WEBHOOK_CIRCUIT_RECOVERY_SECONDS: int = 60  # OPEN this long before probes are let through
+    WEBHOOK_CIRCUIT_HALF_OPEN_PROBES: int = 1  # requests admitted per recovery period while HALF_OPEN
+    WEBHOOK_CIRCUIT_OPEN_CACHE_SECONDS: float = 1.0  # per-process cache of OPEN circuits, 0 = always ask Redis
+
+    # Webhook endpoint limits (per subscription, enforced in Redis; over-limit deliveries are deferred)
+    WEBHOOK_MAX_IN_FLIGHT_PER_ENDPOINT: int = 10  # 0 = unlimited
+    WEBHOOK_MAX_RPS_PER_ENDPOINT: float = 0.0  # 0 = unlimited
+    WEBHOOK_LIMIT_DEFER_MS: int = 1000  # delay of a delivery deferred by the in-flight limit
+
+    # Webhook delivery stats (rolling per-subscription aggregates in Redis)
+    WEBHOOK_STATS_WINDOW_MINUTES: int = 60
+    WEBHOOK_STATS_RELATIVE_ACCURACY: float = 0.01  # of the latency quantiles
+
+    # Webhook retry scheduler (celery beat dispatch of due retries)
+    WEBHOOK_RETRY_DISPATCH_INTERVAL_SECONDS: int = 5
+    WEBHOOK_RETRY_DISPATCH_BATCH: int = 500  # due deliveries claimed per query
+    WEBHOOK_RETRY_DISPATCH_MAX_BATCHES: int = 20  # per run; the rest waits for the next run
+    WEBHOOK_RETRY_DISPATCH_LEASE_SECONDS: int = 300  # a dispatched delivery is due again if not attempted by then
+
+    # Bulk replay of dead-lettered deliveries (re-queued through the retry scheduler)
+    WEBHOOK_REPLAY_BATCH: int = 500  # deliveries per replay batch
+    WEBHOOK_REPLAY_INTERVAL_SECONDS: int = 10  # between the due times of consecutive batches
+
+    # Webhook delivery engine
+    WEBHOOK_DELIVERY_ENGINE: Literal["celery", "asyncio"] = "celery"  # asyncio needs the async worker running
+    WEBHOOK_ASYNC_CONCURRENCY: int = 1000  # in-flight deliveries per async worker process
+    WEBHOOK_ASYNC_LEASE_SECONDS: int = 120  # a claimed delivery returns to the queue if not finished by then
+    WEBHOOK_ASYNC_POLL_INTERVAL_MS: int = 200
+    ASYNC_DATABASE_URL: str | None = None  # defaults to DATABASE_URL with the asyncpg driver
+
+    # Heartbeat (dead-man) rules
+    HEARTBEAT_SCAN_INTERVAL_SECONDS: int = 10
+    HEARTBEAT_SCAN_BATCH: int = 500  # overdue deadlines popped per Redis call
+    HEARTBEAT_SCAN_MAX_BATCHES: int = 20  # per scan; the rest waits for the next scan
     
     @property
     def is_production(self) -> bool:
@@ -102,6 +102,34 @@ def client(db_session):
         yield test_client
     app.dependency_overrides.clear()
 
+@pytest.fixture(autouse=True)
+def fake_redis(mocker):
+    """In-memory Redis (with Lua support) used as the shared app Redis client"""
+    import fakeredis
+
+    client = fakeredis.FakeRedis()
+    mocker.patch("app.services.redis_client._redis_client", client)
+    # Drop lazily-built singletons bound to a previous client
+    mocker.patch("app.services.evaluation_scheduler._debouncer", None)
+    mocker.patch("app.services.alert_cooldown._cooldown_gate", None)
+    mocker.patch("app.services.heartbeat_tracker._heartbeat_tracker", None)
+    mocker.patch("app.services.evaluation_profiler._profiler", None)
+    mocker.patch("app.services.delivery_queue._delivery_queue", None)
+    mocker.patch("app.services.webhook_batcher._webhook_batcher", None)
+    mocker.patch("app.services.endpoint_limiter._endpoint_limiter", None)
+    mocker.patch("app.services.payload_cache._payload_cache", None)
+    mocker.patch("app.services.delivery_stats._delivery_stats", None)
+    return client
+
+@pytest.fixture(autouse=True)
+def clear_rule_set_cache():
+    """Compiled rule sets are cached per process; start every test cold"""
+    from app.services.rule_index import invalidate_rule_set
+
+    invalidate_rule_set()
+    yield
+    invalidate_rule_set()
+
 # ========== Test Data Fixtures ==========
 
 @pytest.fixture
@@ -64,6 +64,36 @@ class TestDeviceCRUD:
         assert len(data) >= 1
         assert any(d["id"] == test_device.id for d in data)
     
+    def test_list_devices_filtered_by_tag(
+        self,
+        client,
+        test_api_key,
+        test_project,
+        test_device
+    ):
+        """Test listing only the devices that carry a tag"""
+        client.post(
+            f"/projects/{test_project.id}/devices",
+            json={"external_id": "other-device", "name": "Other", "tags": ["humidity"]},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        
+        response = client.get(
+            f"/projects/{test_project.id}/devices",
+            params={"tag": "temperature"},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        
+        assert response.status_code == 200
+        assert [d["id"] for d in response.json()] == [test_device.id]
+        
+        response = client.get(
+            f"/projects/{test_project.id}/devices",
+            params={"tag": "missing"},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        assert response.json() == []
+    
     def test_update_device_tags(
         self,
         client,
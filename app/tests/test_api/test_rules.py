@@ -118,6 +118,145 @@ class TestRuleCRUD:
         
         assert response.status_code == 400
     
+    def test_create_time_window_rule(
+        self,
+        client,
+        test_api_key,
+        test_project
+    ):
+        """Test creating a rule with a duration window, and rejecting a bad one"""
+        payload = {
+            "name": "Sustained CPU",
+            "metric": "cpu",
+            "threshold": 90.0,
+            "window_n": 500,
+            "required_k": 3,
+            "window_seconds": 300
+        }
+        
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json=payload,
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        
+        assert response.status_code == 201
+        assert response.json()["window_seconds"] == 300
+        
+        payload["window_seconds"] = 0
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json=payload,
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        
+        assert response.status_code == 422
+    
+    def test_create_heartbeat_rule(
+        self,
+        client,
+        test_api_key,
+        test_project
+    ):
+        """Test heartbeat rules need heartbeat_seconds but no metric/threshold"""
+        payload = {"name": "Offline", "kind": "HEARTBEAT", "heartbeat_seconds": 120}
+        
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json=payload,
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        
+        assert response.status_code == 201
+        data = response.json()
+        assert data["kind"] == "HEARTBEAT"
+        assert data["metric"] is None
+        
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json={"name": "Offline", "kind": "HEARTBEAT"},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        assert response.status_code == 422
+        
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json={"name": "No metric", "threshold": 1.0},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        assert response.status_code == 422
+    
+    def test_create_compound_rule(
+        self,
+        client,
+        test_api_key,
+        test_project
+    ):
+        """Test compound rules take conditions instead of metric/threshold"""
+        payload = {
+            "name": "Hot and humid",
+            "conditions": [
+                {"metric": "temperature", "operator": ">", "threshold": 80},
+                {"metric": "humidity", "operator": ">", "threshold": 90}
+            ],
+            "window_n": 5,
+            "required_k": 3
+        }
+        
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json=payload,
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        
+        assert response.status_code == 201
+        data = response.json()
+        assert data["combinator"] == "AND"
+        assert len(data["conditions"]) == 2
+        
+        payload["metric"] = "temperature"
+        payload["threshold"] = 80
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json=payload,
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        assert response.status_code == 422
+
+    def test_create_stateful_rule(
+        self,
+        client,
+        test_api_key,
+        test_project
+    ):
+        """Test stateful rules default resolve_k to 0 and require resolve_k < required_k"""
+        payload = {
+            "name": "Stuck sensor",
+            "metric": "temperature",
+            "threshold": 80,
+            "window_n": 5,
+            "required_k": 3,
+            "stateful": True
+        }
+        
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json=payload,
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        
+        assert response.status_code == 201
+        assert response.json()["stateful"] is True
+        assert response.json()["resolve_k"] == 0
+        
+        payload["resolve_k"] = 3
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json=payload,
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        assert response.status_code == 422
+    
     def test_tag_scope_requires_tag(
         self,
         client,
@@ -186,6 +325,98 @@ class TestRuleCRUD:
         assert data["threshold"] == 85.0
         assert data["cooldown_seconds"] == 600
     
+    def test_update_rule_to_compound(
+        self,
+        client,
+        test_api_key,
+        test_rule
+    ):
+        """Test PATCHing conditions onto a simple rule gets the same defaults as create"""
+        response = client.patch(
+            f"/rules/{test_rule.id}",
+            json={"conditions": [{"metric": "temperature", "operator": ">", "threshold": 1}]},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["combinator"] == "AND"
+        assert data["metric"] is None
+        assert data["threshold"] is None
+    
+    def test_update_rule_rejects_invalid_result(
+        self,
+        client,
+        test_api_key,
+        test_rule
+    ):
+        """Test a PATCH that would leave the rule unevaluable is rejected and not applied"""
+        for payload in (
+            {"combinator": "OR"},
+            {"metric": None},
+            {"window_n": 2},
+        ):
+            response = client.patch(
+                f"/rules/{test_rule.id}",
+                json=payload,
+                headers={"X-API-Key": test_api_key.raw_key}
+            )
+            assert response.status_code == 400, payload
+        
+        response = client.get(
+            f"/projects/{test_rule.project_id}/rules",
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        [rule] = [r for r in response.json() if r["id"] == test_rule.id]
+        assert (rule["metric"], rule["combinator"], rule["window_n"]) == ("temperature", None, 5)
+    
+    def test_update_stateful_rule_keeps_resolve_k_below_required_k(
+        self,
+        client,
+        test_api_key,
+        test_project,
+        test_rule
+    ):
+        """Test PATCHes to resolve_k / required_k are checked against the stored rule"""
+        response = client.post(
+            f"/projects/{test_project.id}/rules",
+            json={
+                "name": "Stuck sensor",
+                "metric": "temperature",
+                "threshold": 80,
+                "window_n": 5,
+                "required_k": 3,
+                "stateful": True,
+                "resolve_k": 2
+            },
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        rule_id = response.json()["id"]
+        
+        for payload in ({"resolve_k": 9}, {"required_k": 2}):
+            response = client.patch(
+                f"/rules/{rule_id}",
+                json=payload,
+                headers={"X-API-Key": test_api_key.raw_key}
+            )
+            assert response.status_code == 400, payload
+        
+        response = client.patch(
+            f"/rules/{rule_id}",
+            json={"required_k": 4},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        assert response.status_code == 200
+        assert (response.json()["required_k"], response.json()["resolve_k"]) == (4, 2)
+        
+        # resolve_k only applies to stateful rules
+        response = client.patch(
+            f"/rules/{test_rule.id}",
+            json={"resolve_k": 1},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        assert response.status_code == 400
+    
     def test_disable_rule(
         self,
         client,
@@ -0,0 +1,168 @@
+# tests/test_services/test_backtest_service.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+from app.services.backtest_service import BacktestRule, replay_history
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _rows(device_id: int, values: list, step_seconds: int = 60) -> list:
+    return [(device_id, BASE + timedelta(seconds=i * step_seconds), v) for i, v in enumerate(values)]
+
+
+def _rule(**overrides) -> BacktestRule:
+    fields = {"metric": "t", "operator": ">", "threshold": 80.0, "window_n": 3, "required_k": 2, "cooldown_seconds": 0}
+    fields.update(overrides)
+    return BacktestRule(**fields)
+
+
+class TestReplay:
+    """Test the sliding-window replay"""
+
+    def test_k_of_n_after_every_event(self):
+        """The rule is evaluated on every event once the window is full"""
+        rows = _rows(1, [90, 90, 10, 10, 90, 90])
+        replay = replay_history(_rule(), rows, max_timestamps=10)[1]
+
+        # windows: [90,90,10] [90,10,10] [10,10,90] [10,90,90]
+        assert replay.events == 6
+        assert replay.alert_count == 2
+        assert replay.alert_timestamps == [rows[2][1], rows[5][1]]
+
+    def test_cooldown_in_event_time(self):
+        """Alerts within cooldown_seconds of the previous one are suppressed"""
+        rows = _rows(1, [90] * 10, step_seconds=60)
+        replay = replay_history(_rule(window_n=1, required_k=1, cooldown_seconds=300), rows, 10)[1]
+
+        assert [ts - BASE for ts in replay.alert_timestamps] == [timedelta(0), timedelta(minutes=5)]
+
+    def test_missing_and_non_numeric_values_never_match(self):
+        """Missing or non-numeric values occupy window slots without matching"""
+        rows = _rows(1, [90, None, "hot", 90])
+        replay = replay_history(_rule(window_n=2, required_k=2), rows, 10)[1]
+
+        assert replay.alert_count == 0
+
+    def test_devices_are_independent(self):
+        """Each device keeps its own window and cooldown"""
+        rows = _rows(1, [90, 90]) + _rows(2, [10, 90])
+        replays = replay_history(_rule(window_n=2, required_k=2), rows, 10)
+
+        assert replays[1].alert_count == 1
+        assert replays[2].alert_count == 0
+
+    def test_timestamps_capped_but_counted(self):
+        """max_timestamps bounds the response, not the count"""
+        rows = _rows(1, [90] * 50)
+        replay = replay_history(_rule(window_n=1, required_k=1), rows, max_timestamps=3)[1]
+
+        assert replay.alert_count == 50
+        assert len(replay.alert_timestamps) == 3
+
+
+class TestBacktestEndpoint:
+    """Test POST /projects/{id}/rules/backtest"""
+
+    def _seed(self, create_telemetry_event, device_id, values):
+        for i, v in enumerate(values):
+            create_telemetry_event(device_id, {"temperature": v}, ts=BASE + timedelta(seconds=i))
+
+    def _payload(self, **overrides):
+        payload = {
+            "metric": "temperature",
+            "threshold": 80.0,
+            "window_n": 3,
+            "required_k": 2,
+            "cooldown_seconds": 0,
+            "start": BASE.isoformat(),
+            "end": (BASE + timedelta(hours=1)).isoformat(),
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_backtest_counts_alerts(
+        self,
+        client,
+        test_api_key,
+        test_project,
+        test_device,
+        create_telemetry_event
+    ):
+        """Alert counts and timestamps are reported per device"""
+        self._seed(create_telemetry_event, test_device.id, [90, 90, 10, 10, 90, 90, 50])
+
+        response = client.post(
+            f"/projects/{test_project.id}/rules/backtest",
+            json=self._payload(),
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        # windows: [90,90,10] [90,10,10] [10,10,90] [10,90,90] [90,90,50]
+        assert data["total_alerts"] == 3
+        assert data["events_scanned"] == 7
+        assert data["devices"][0]["device_id"] == test_device.id
+        assert len(data["devices"][0]["alert_timestamps"]) == 3
+
+    def test_time_range_is_respected(
+        self,
+        client,
+        test_api_key,
+        test_project,
+        test_device,
+        create_telemetry_event
+    ):
+        """Events outside [start, end) are not replayed"""
+        self._seed(create_telemetry_event, test_device.id, [90] * 5)
+
+        response = client.post(
+            f"/projects/{test_project.id}/rules/backtest",
+            json=self._payload(end=(BASE + timedelta(seconds=2)).isoformat()),
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+
+        assert response.json()["events_scanned"] == 2
+        assert response.json()["total_alerts"] == 0
+
+    def test_foreign_device_rejected(self, client, test_api_key, test_project):
+        """Devices outside the project are rejected"""
+        response = client.post(
+            f"/projects/{test_project.id}/rules/backtest",
+            json=self._payload(device_ids=[999999]),
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+
+        assert response.status_code == 400
+
+    def test_large_fleet_uses_pool(
+        self,
+        client,
+        test_api_key,
+        test_project,
+        test_device,
+        db_session,
+        create_telemetry_event,
+        mocker
+    ):
+        """Above the fleet threshold devices are replayed in chunks on the pool"""
+        from app.services import backtest_service
+
+        self._seed(create_telemetry_event, test_device.id, [90, 90, 90])
+        mocker.patch.object(backtest_service.settings, "BACKTEST_PARALLEL_MIN_DEVICES", 1)
+        mocker.patch.object(backtest_service, "SessionLocal", return_value=db_session)
+        # one thread, because the chunks share the test session
+        pool = ThreadPoolExecutor(max_workers=1)
+        mocker.patch.object(backtest_service, "_get_backtest_pool", return_value=pool)
+        spy = mocker.spy(backtest_service, "backtest_devices")
+
+        response = client.post(
+            f"/projects/{test_project.id}/rules/backtest",
+            json=self._payload(),
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        pool.shutdown()
+
+        assert response.json()["total_alerts"] == 1
+        assert spy.call_count == 1
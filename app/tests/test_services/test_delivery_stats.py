@@ -0,0 +1,79 @@
+# tests/test_services/test_delivery_stats.py
+import random
+import time
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+from app.services.delivery_stats import DeliveryStats
+
+
+class TestDeliveryStats:
+    """Test rolling per-webhook delivery aggregates"""
+
+    def test_quantiles_within_relative_accuracy(self, fake_redis):
+        stats = DeliveryStats(fake_redis, relative_accuracy=0.01)
+        durations = [random.lognormvariate(4, 1) for _ in range(2000)]
+        for ms in durations:
+            stats.record(1, ms, ok=True)
+
+        latency = stats.summary(1)["latency_ms"]
+        ordered = sorted(durations)
+        for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            assert abs(latency[name] - exact) <= 0.011 * exact
+
+    def test_success_ratio_and_attempts_per_delivery(self, fake_redis):
+        stats = DeliveryStats(fake_redis)
+        stats.record(1, 100, ok=False)  # retried: the delivery is not finished
+        stats.record(1, 100, ok=True, finished_attempts=[2])
+        stats.record(1, 100, ok=True, finished_attempts=[1, 1, 1])  # a batch of three
+        stats.record(2, 100, ok=False, finished_attempts=[9])
+
+        summary = stats.summary(1)
+        assert summary["attempts"] == 3
+        assert summary["success_ratio"] == 2 / 3
+        assert (summary["deliveries"], summary["attempts_per_delivery"]) == (4, 5 / 4)
+
+    def test_window_rolls_over(self, fake_redis, mocker):
+        stats = DeliveryStats(fake_redis, window_minutes=5)
+        stats.record(1, 100, ok=True)
+        assert stats.summary(1)["attempts"] == 1
+
+        mocker.patch("app.services.delivery_stats.time.time", return_value=time.time() + 6 * 60)
+        summary = stats.summary(1)
+        assert summary["attempts"] == 0
+        assert summary["success_ratio"] is None
+        assert summary["latency_ms"] == {"p50": None, "p95": None, "p99": None}
+
+    def test_attempt_duration_recorded_and_served(self, client, db_session, test_device, test_rule, test_project, mocker):
+        from app.db.models.alert import Alert
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.db.models.webhook_subscription import WebhookSubscription
+        from app.workers.tasks.webhook_delivery import deliver_webhook
+
+        webhook = WebhookSubscription(project_id=test_project.id, url="https://example.com/webhook", enabled=True)
+        alert = Alert(device_id=test_device.id, rule_id=test_rule.id, triggered_at=datetime.now(timezone.utc), details={})
+        db_session.add_all([webhook, alert])
+        db_session.commit()
+        delivery = WebhookDelivery(project_id=test_project.id, alert_id=alert.id, webhook_id=webhook.id, status="pending")
+        db_session.add(delivery)
+        db_session.commit()
+        webhook_id, delivery_id = webhook.id, delivery.id
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mocker.patch("httpx.Client.post", return_value=mock_response)
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_success")
+
+        assert deliver_webhook(delivery_id) == "success"
+        assert db_session.get(WebhookDelivery, delivery_id).last_duration_ms is not None
+
+        response = client.get(f"/webhooks/{webhook_id}/stats")
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["attempts"], body["success_ratio"], body["attempts_per_delivery"]) == (1, 1.0, 1.0)
+        assert body["latency_ms"]["p99"] is not None
+
+        assert client.get(f"/webhooks/{webhook_id + 1000}/stats").status_code == 404
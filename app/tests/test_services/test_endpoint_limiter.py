@@ -0,0 +1,44 @@
+# tests/test_services/test_endpoint_limiter.py
+import time
+from types import SimpleNamespace
+
+from app.services.endpoint_limiter import EndpointLimiter, endpoint_limits
+
+
+class TestEndpointLimiter:
+    """Test per-subscription in-flight and rate limits"""
+
+    def test_in_flight_limit_until_release(self, fake_redis):
+        limiter = EndpointLimiter(fake_redis, defer_seconds=2.0)
+
+        assert limiter.acquire(1, "a", max_in_flight=2, max_rps=0).admitted
+        assert limiter.acquire(1, "b", max_in_flight=2, max_rps=0).admitted
+        assert limiter.acquire(1, "c", max_in_flight=2, max_rps=0) == (False, 2.0)
+        # Other endpoints are not affected
+        assert limiter.acquire(2, "c", max_in_flight=2, max_rps=0).admitted
+
+        limiter.release(1, "a")
+        assert limiter.acquire(1, "c", max_in_flight=2, max_rps=0).admitted
+
+    def test_slots_of_crashed_workers_expire(self, fake_redis, mocker):
+        limiter = EndpointLimiter(fake_redis)
+        assert limiter.acquire(1, "a", max_in_flight=1, max_rps=0).admitted
+        assert not limiter.acquire(1, "b", max_in_flight=1, max_rps=0).admitted
+
+        mocker.patch("app.services.endpoint_limiter.time.time", return_value=time.time() + 61)
+        assert limiter.acquire(1, "b", max_in_flight=1, max_rps=0).admitted
+
+    def test_rate_limit_reports_wait(self, fake_redis):
+        limiter = EndpointLimiter(fake_redis)
+
+        admitted = [limiter.acquire(1, str(i), max_in_flight=0, max_rps=2).admitted for i in range(3)]
+        assert admitted == [True, True, False]
+        rejected = limiter.acquire(1, "x", max_in_flight=0, max_rps=2)
+        assert 0 < rejected.retry_after <= 0.5
+
+    def test_subscription_overrides_settings(self, mocker):
+        mocker.patch("app.services.endpoint_limiter.settings.WEBHOOK_MAX_IN_FLIGHT_PER_ENDPOINT", 10)
+        mocker.patch("app.services.endpoint_limiter.settings.WEBHOOK_MAX_RPS_PER_ENDPOINT", 0.0)
+
+        assert endpoint_limits(SimpleNamespace(max_in_flight=None, max_rps=None)) == (10, 0.0)
+        assert endpoint_limits(SimpleNamespace(max_in_flight=3, max_rps=0.5)) == (3, 0.5)
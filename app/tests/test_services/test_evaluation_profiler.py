@@ -0,0 +1,86 @@
+# tests/test_services/test_evaluation_profiler.py
+import time
+from datetime import datetime, timezone, timedelta
+
+from app.services.evaluation_profiler import EvaluationProfiler, RuleSample, get_evaluation_profiler
+from app.services.evaluation_service import evaluate_rules_for_device
+
+
+class TestEvaluationProfiler:
+    """Test sampled per-rule / per-device evaluation profiling"""
+
+    def test_sampling_off_and_on(self, fake_redis):
+        assert EvaluationProfiler(fake_redis, sample_rate=0.0).sample() is False
+        assert EvaluationProfiler(fake_redis, sample_rate=1.0).sample() is True
+
+    def test_aggregates_in_process_until_flush(self, fake_redis):
+        """Nothing reaches Redis before the flush interval; top() ranks by total time"""
+        profiler = EvaluationProfiler(fake_redis, sample_rate=1.0, flush_seconds=3600)
+        profiler.record(1, 5_000_000, 100, [
+            RuleSample(10, 4_000_000, 100, 7, True),
+            RuleSample(11, 500_000, 40, 0, False),
+        ])
+        profiler.record(2, 1_000_000, 10, [RuleSample(10, 300_000, 10, 1, False)])
+        assert profiler.top()["rules"] == []
+
+        profiler.flush()
+        report = profiler.top(limit=1)
+
+        assert report["rules"] == [{
+            "rule_id": 10, "calls": 2, "time_us": 4300, "rows": 110,
+            "matches": 8, "fired": 1, "avg_time_us": 2150.0,
+        }]
+        assert report["devices"][0]["device_id"] == 1
+        assert report["devices"][0]["rules"] == 2
+
+    def test_quiet_worker_flushes_on_timer(self, fake_redis):
+        """Samples reach Redis flush_seconds after they were taken, without another sample"""
+        profiler = EvaluationProfiler(fake_redis, sample_rate=1.0, flush_seconds=0.05)
+        profiler.record(1, 1_000_000, 10, [RuleSample(10, 300_000, 10, 1, False)])
+
+        deadline = time.monotonic() + 2
+        while not profiler.top()["rules"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert profiler.top()["rules"][0]["rule_id"] == 10
+
+    def test_worker_shutdown_flushes(self, fake_redis, mocker):
+        from celery.signals import worker_process_shutdown
+
+        mocker.patch("app.workers.celery_app.close_webhook_http_pool")
+        profiler = get_evaluation_profiler()
+        profiler.flush_seconds = 3600
+        profiler.record(1, 1_000_000, 10, [RuleSample(10, 300_000, 10, 1, False)])
+
+        worker_process_shutdown.send(sender=None)
+
+        assert profiler.top()["rules"][0]["rule_id"] == 10
+
+    def test_evaluation_records_each_rule(
+        self,
+        db_session,
+        fake_redis,
+        test_device,
+        test_rule,
+        create_telemetry_event,
+        mocker
+    ):
+        """A sampled evaluation times every applicable rule and its outcome"""
+        mocker.patch("app.services.evaluation_profiler.settings.EVALUATION_PROFILE_SAMPLE_RATE", 1.0)
+        now = datetime.now(timezone.utc)
+        for i in range(5):
+            create_telemetry_event(test_device.id, {"temperature": 90.0}, ts=now - timedelta(seconds=10 - i))
+
+        evaluate_rules_for_device(db_session, test_device.id)
+        profiler = get_evaluation_profiler()
+        profiler.flush()
+
+        [rule] = profiler.top()["rules"]
+        assert rule["rule_id"] == test_rule.id
+        assert (rule["calls"], rule["rows"], rule["matches"], rule["fired"]) == (1, 5, 5, 1)
+        assert profiler.top()["devices"][0]["rows"] == 5
+
+    def test_admin_endpoint(self, client, fake_redis):
+        response = client.get("/admin/evaluation/profile?limit=5")
+        assert response.status_code == 200
+        assert response.json() == {"sample_rate": 0.0, "rules": [], "devices": []}
@@ -0,0 +1,96 @@
+# tests/test_services/test_evaluation_scheduler.py
+import pytest
+from app.services.evaluation_scheduler import EvaluationDebouncer, get_evaluation_debouncer
+from app.services.evaluation_service import EvaluationOutcome
+
+class TestEvaluationDebouncer:
+    """Test per-device evaluation coalescing"""
+
+    @pytest.fixture
+    def debouncer(self, fake_redis):
+        return EvaluationDebouncer(fake_redis, interval_ms=500)
+
+    def test_first_request_schedules_and_rest_coalesce(self, debouncer):
+        """Only the first request in a burst enqueues an evaluation"""
+        assert debouncer.request(1) is True
+        assert debouncer.request(1) is False
+        assert debouncer.request(1) is False
+
+        stats = debouncer.get_stats()
+        assert stats["scheduled"] == 1
+        assert stats["coalesced"] == 2
+
+    def test_devices_are_independent(self, debouncer):
+        """Each device has its own guard"""
+        assert debouncer.request(1) is True
+        assert debouncer.request(2) is True
+
+    def test_trailing_run_evaluates_coalesced_events(self, debouncer):
+        """Events ingested while a run is in flight are picked up by the trailing run"""
+        assert debouncer.request(1) is True
+        assert debouncer.begin(1) is True      # leading run starts
+
+        assert debouncer.request(1) is False   # ingest during the run is coalesced
+        debouncer.finish(1)
+
+        assert debouncer.begin(1) is True      # trailing run has work
+        debouncer.finish(1)
+
+        assert debouncer.begin(1) is False     # nothing new: guard released
+        assert debouncer.request(1) is True    # next ingest schedules immediately
+
+    def test_idle_trailing_check_releases_guard(self, debouncer):
+        """A trailing run with nothing new skips evaluation and frees the device"""
+        assert debouncer.request(1) is True
+        assert debouncer.begin(1) is True
+        debouncer.finish(1)
+
+        assert debouncer.request(1) is False   # still inside the interval
+        assert debouncer.begin(1) is True
+        debouncer.finish(1)
+        assert debouncer.begin(1) is False
+
+        stats = debouncer.get_stats()
+        assert stats["runs"] == 2
+        assert stats["idle"] == 1
+
+    def test_failed_run_is_retried_by_trailing_run(self, debouncer):
+        """A failed run marks the device dirty again"""
+        assert debouncer.request(1) is True
+        assert debouncer.begin(1) is True
+        debouncer.finish(1, rerun=True)
+
+        assert debouncer.begin(1) is True
+
+    def test_debounced_task_skips_when_nothing_new(self, fake_redis, mocker):
+        """The Celery task returns early and schedules no trailing run when idle"""
+        from app.workers.tasks.evaluate_rules import evaluate_rules_for_device_task
+
+        mocker.patch("app.services.evaluation_scheduler.settings.EVALUATION_DEBOUNCE_MS", 500)
+        mock_eval = mocker.patch("app.workers.tasks.evaluate_rules.evaluate_device")
+        mock_apply = mocker.patch(
+            "app.workers.tasks.evaluate_rules.evaluate_rules_for_device_task.apply_async"
+        )
+
+        assert evaluate_rules_for_device_task(1, debounced=True) == []
+        mock_eval.assert_not_called()
+        mock_apply.assert_not_called()
+
+    def test_debounced_task_schedules_trailing_run(self, fake_redis, mocker):
+        """After evaluating, the task schedules a trailing run one interval later"""
+        from app.workers.tasks.evaluate_rules import evaluate_rules_for_device_task
+
+        mocker.patch("app.services.evaluation_scheduler.settings.EVALUATION_DEBOUNCE_MS", 500)
+        mocker.patch("app.workers.tasks.evaluate_rules.SessionLocal")
+        mocker.patch(
+            "app.workers.tasks.evaluate_rules.evaluate_device",
+            return_value=EvaluationOutcome([], []),
+        )
+        mock_apply = mocker.patch(
+            "app.workers.tasks.evaluate_rules.evaluate_rules_for_device_task.apply_async"
+        )
+
+        assert get_evaluation_debouncer().request(7) is True
+        evaluate_rules_for_device_task(7, debounced=True)
+
+        mock_apply.assert_called_once_with((7,), {"debounced": True}, countdown=0.5)
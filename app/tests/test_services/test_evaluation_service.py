@@ -231,4 +231,389 @@ class TestRuleEvaluation:
         alert_ids = evaluate_rules_for_device(db_session, test_device.id)
         
         # Assert: No alerts (need 5 events, only have 3)
-        assert len(alert_ids) == 0
\ No newline at end of file
+        assert len(alert_ids) == 0
+
+class TestTimeWindowRules:
+    """Test rules with a duration window (window_seconds)"""
+
+    @pytest.fixture
+    def time_rule(self, db_session, test_project):
+        from app.db.models.rule import Rule
+
+        rule = Rule(
+            project_id=test_project.id,
+            name="Sustained heat",
+            metric="temperature",
+            operator=">",
+            threshold=80.0,
+            window_n=100,
+            required_k=2,
+            window_seconds=60,
+            cooldown_seconds=300,
+            enabled=True,
+            scope="ALL"
+        )
+        db_session.add(rule)
+        db_session.commit()
+        return rule
+
+    def test_fires_without_full_count_window(
+        self,
+        db_session,
+        test_device,
+        time_rule,
+        create_telemetry_event
+    ):
+        """Two breaches in the last minute fire even though window_n is 100"""
+        now = datetime.now(timezone.utc)
+        for seconds_ago in (30, 10):
+            create_telemetry_event(test_device.id, {"temperature": 90.0}, ts=now - timedelta(seconds=seconds_ago))
+
+        alert_ids = evaluate_rules_for_device(db_session, test_device.id)
+
+        assert len(alert_ids) == 1
+
+    def test_events_older_than_window_ignored(
+        self,
+        db_session,
+        test_device,
+        time_rule,
+        create_telemetry_event
+    ):
+        """Breaches outside the last window_seconds do not count"""
+        now = datetime.now(timezone.utc)
+        for seconds_ago in (600, 300, 10):
+            create_telemetry_event(test_device.id, {"temperature": 90.0}, ts=now - timedelta(seconds=seconds_ago))
+
+        alert_ids = evaluate_rules_for_device(db_session, test_device.id)
+
+        assert alert_ids == []
+
+    def test_window_read_bounded_by_time(
+        self,
+        db_session,
+        test_device,
+        time_rule,
+        create_telemetry_event,
+        mocker
+    ):
+        """With only time-window rules the read is bounded by ts as well as by window_n"""
+        from app.services import evaluation_service
+
+        now = datetime.now(timezone.utc)
+        for seconds_ago in (600, 10):
+            create_telemetry_event(test_device.id, {"temperature": 90.0}, ts=now - timedelta(seconds=seconds_ago))
+        spy = mocker.spy(evaluation_service, "list_window_events")
+
+        evaluate_rules_for_device(db_session, test_device.id)
+
+        assert spy.call_args.kwargs["limit"] == 100
+        assert spy.call_args.kwargs["since"] is not None
+        assert len(spy.spy_return) == 1
+
+
+class TestCompoundRules:
+    """Test AND/OR rules over several metrics of the same window"""
+
+    def _compound_rule(self, db_session, project_id, combinator):
+        from app.db.models.rule import Rule
+
+        rule = Rule(
+            project_id=project_id,
+            name=f"Hot and humid ({combinator})",
+            conditions=[
+                {"metric": "temperature", "operator": ">", "threshold": 80.0},
+                {"metric": "humidity", "operator": ">", "threshold": 90.0},
+            ],
+            combinator=combinator,
+            window_n=3,
+            required_k=2,
+            cooldown_seconds=300,
+            enabled=True,
+            scope="ALL"
+        )
+        db_session.add(rule)
+        db_session.commit()
+        return rule
+
+    def _seed(self, create_telemetry_event, device_id):
+        payloads = [
+            {"temperature": 85.0, "humidity": 95.0},
+            {"temperature": 85.0, "humidity": 50.0},
+            {"temperature": 70.0, "humidity": 95.0},
+        ]
+        base = datetime.now(timezone.utc)
+        for i, payload in enumerate(payloads):
+            create_telemetry_event(device_id, payload, ts=base + timedelta(seconds=i))
+
+    def test_and_requires_all_conditions_on_the_same_event(
+        self,
+        db_session,
+        test_device,
+        create_telemetry_event
+    ):
+        """Only one event breaches both conditions -> 1 of 3 < k"""
+        self._compound_rule(db_session, test_device.project_id, "AND")
+        self._seed(create_telemetry_event, test_device.id)
+
+        assert evaluate_rules_for_device(db_session, test_device.id) == []
+
+    def test_or_fires_with_per_condition_counts(
+        self,
+        db_session,
+        test_device,
+        create_telemetry_event
+    ):
+        """Every event breaches one condition -> 3 of 3, details keep each condition's count"""
+        from app.db.models.alert import Alert
+
+        self._compound_rule(db_session, test_device.project_id, "OR")
+        self._seed(create_telemetry_event, test_device.id)
+
+        alert_ids = evaluate_rules_for_device(db_session, test_device.id)
+
+        assert len(alert_ids) == 1
+        details = db_session.get(Alert, alert_ids[0]).details
+        assert details["rule"]["combinator"] == "OR"
+        assert details["evaluation"]["match_count"] == 3
+        assert [c["match_count"] for c in details["evaluation"]["condition_matches"]] == [2, 2]
+
+
+class TestStatefulAlerts:
+    """Test OPEN/RESOLVED alerts with hysteresis"""
+
+    @pytest.fixture
+    def stateful_rule(self, db_session, test_project):
+        from app.db.models.rule import Rule
+
+        # Opens at 3 of the last 5 above 80, resolves at <= 1 of 5
+        rule = Rule(
+            project_id=test_project.id,
+            name="Stuck sensor",
+            metric="temperature",
+            operator=">",
+            threshold=80.0,
+            window_n=5,
+            required_k=3,
+            cooldown_seconds=0,
+            stateful=True,
+            resolve_k=1,
+            enabled=True,
+            scope="ALL"
+        )
+        db_session.add(rule)
+        db_session.commit()
+        return rule
+
+    def _push(self, create_telemetry_event, device_id, values, start):
+        for i, value in enumerate(values):
+            create_telemetry_event(device_id, {"temperature": value}, ts=start + timedelta(seconds=i))
+        return start + timedelta(seconds=len(values))
+
+    def test_stuck_sensor_opens_one_alert(
+        self,
+        db_session,
+        test_device,
+        stateful_rule,
+        create_telemetry_event
+    ):
+        """A condition that keeps holding writes a single OPEN alert"""
+        from app.db.models.alert import Alert
+        from app.db.models.alert_state import AlertState
+        from app.services.evaluation_service import evaluate_device
+
+        ts = datetime.now(timezone.utc) - timedelta(minutes=5)
+        ts = self._push(create_telemetry_event, test_device.id, [90.0] * 5, ts)
+        outcome = evaluate_device(db_session, test_device.id)
+        assert len(outcome.created) == 1 and outcome.resolved == []
+
+        for _ in range(3):
+            ts = self._push(create_telemetry_event, test_device.id, [95.0], ts)
+            assert evaluate_device(db_session, test_device.id) == ([], [])
+
+        alert = db_session.get(Alert, outcome.created[0])
+        assert alert.status == "OPEN" and alert.resolved_at is None
+        assert db_session.query(Alert).count() == 1
+        assert db_session.get(AlertState, (test_device.id, stateful_rule.id)).alert_id == alert.id
+
+    def test_resolves_with_hysteresis(
+        self,
+        db_session,
+        test_device,
+        stateful_rule,
+        create_telemetry_event
+    ):
+        """The alert stays OPEN between resolve_k and required_k and resolves at resolve_k"""
+        from app.db.models.alert import Alert
+        from app.db.models.alert_state import AlertState
+        from app.services.evaluation_service import evaluate_device
+
+        ts = datetime.now(timezone.utc) - timedelta(minutes=5)
+        ts = self._push(create_telemetry_event, test_device.id, [90.0] * 5, ts)
+        alert_id = evaluate_device(db_session, test_device.id).created[0]
+
+        # 2 of 5 breaching: below required_k but above resolve_k -> still OPEN
+        ts = self._push(create_telemetry_event, test_device.id, [50.0] * 3, ts)
+        assert evaluate_device(db_session, test_device.id) == ([], [])
+
+        # 1 of 5 breaching -> RESOLVED
+        ts = self._push(create_telemetry_event, test_device.id, [50.0], ts)
+        assert evaluate_device(db_session, test_device.id) == ([], [alert_id])
+
+        db_session.expire_all()
+        alert = db_session.get(Alert, alert_id)
+        assert alert.status == "RESOLVED" and alert.resolved_at is not None
+        assert db_session.get(AlertState, (test_device.id, stateful_rule.id)) is None
+
+        # Breaching again opens a new alert
+        self._push(create_telemetry_event, test_device.id, [90.0] * 3, ts)
+        reopened = evaluate_device(db_session, test_device.id).created
+        assert len(reopened) == 1 and reopened[0] != alert_id
+
+    def test_lost_open_race_keeps_one_alert(
+        self,
+        db_session,
+        test_device,
+        stateful_rule
+    ):
+        """A second open for the same (device, rule) is discarded"""
+        from app.db.models.alert import Alert
+        from app.db.repositories.alert_repo import open_alerts
+
+        row = {
+            "device_id": test_device.id,
+            "rule_id": stateful_rule.id,
+            "triggered_at": datetime.now(timezone.utc),
+            "details": {},
+        }
+        assert len(open_alerts(db_session, [row])) == 1
+        assert open_alerts(db_session, [row]) == []
+        db_session.commit()
+        assert db_session.query(Alert).count() == 1
+
+
+class TestWindowLoading:
+    """Test loading the evaluation window around an in-memory batch"""
+
+    def test_batch_window_matches_full_read(
+        self,
+        db_session,
+        test_device,
+        create_telemetry_event
+    ):
+        """Batch + newer rows from other writers + older tail == plain newest-N read"""
+        from app.services.evaluation_service import WindowEvent, _load_window
+
+        base = datetime.now(timezone.utc)
+        # older history
+        for i in range(6):
+            create_telemetry_event(test_device.id, {"v": i}, ts=base - timedelta(seconds=100 - i))
+        # the batch just ingested
+        batch_rows = [
+            create_telemetry_event(test_device.id, {"v": 100 + i}, ts=base + timedelta(seconds=i))
+            for i in range(3)
+        ]
+        # another writer's rows interleaved with the batch
+        create_telemetry_event(test_device.id, {"v": 200}, ts=base + timedelta(seconds=1, milliseconds=500))
+        create_telemetry_event(test_device.id, {"v": 201}, ts=base + timedelta(seconds=10))
+
+        batch = [WindowEvent(ev.id, ev.ts, ev.payload) for ev in batch_rows]
+
+        for limit in (1, 2, 3, 5, 8, 20):
+            expected = _load_window(db_session, test_device.id, limit=limit)
+            merged = _load_window(db_session, test_device.id, limit=limit, recent_events=batch)
+            assert [ev.id for ev in merged] == [ev.id for ev in expected]
+
+
+class TestBatchedCooldown:
+    """Test the batched cooldown gate and single-statement alert creation"""
+
+    def _breach(self, create_telemetry_event, device_id, payload, n=5):
+        for i in range(n):
+            create_telemetry_event(
+                device_id=device_id,
+                payload=payload,
+                ts=datetime.now(timezone.utc) + timedelta(seconds=i)
+            )
+
+    def test_all_firing_rules_created_in_one_statement(
+        self,
+        db_engine,
+        db_session,
+        test_project,
+        test_device,
+        test_rule,
+        create_telemetry_event
+    ):
+        """Several firing rules produce a single INSERT into alerts"""
+        from sqlalchemy import event
+        from app.db.models.rule import Rule
+
+        for threshold in (10.0, 20.0):
+            db_session.add(Rule(
+                project_id=test_project.id, name=f"t>{threshold}", metric="temperature",
+                operator=">", threshold=threshold, window_n=5, required_k=3,
+                cooldown_seconds=300, enabled=True, scope="ALL",
+            ))
+        db_session.commit()
+        self._breach(create_telemetry_event, test_device.id, {"temperature": 85.0})
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db_engine, "before_cursor_execute", listener)
+        try:
+            alert_ids = evaluate_rules_for_device(db_session, test_device.id)
+        finally:
+            event.remove(db_engine, "before_cursor_execute", listener)
+
+        assert len(alert_ids) == 3
+        inserts = [s for s in statements if s.lstrip().upper().startswith("INSERT INTO ALERTS")]
+        assert len(inserts) == 1
+        assert not any("pg_advisory_xact_lock" in s for s in statements)
+
+    def test_gate_held_by_another_worker_skips_alert(
+        self,
+        db_session,
+        test_device,
+        test_rule,
+        create_telemetry_event,
+        fake_redis
+    ):
+        """A concurrent worker holding the (device, rule) gate wins"""
+        from app.services.alert_cooldown import get_cooldown_gate
+
+        self._breach(create_telemetry_event, test_device.id, {"temperature": 85.0})
+        assert get_cooldown_gate().acquire(test_device.id, [test_rule]) == {test_rule.id}
+
+        assert evaluate_rules_for_device(db_session, test_device.id) == []
+
+    def test_db_guard_covers_lost_gate_keys(
+        self,
+        db_session,
+        test_device,
+        test_rule,
+        create_telemetry_event,
+        fake_redis
+    ):
+        """If Redis loses the gate keys, the recent alert in the DB still blocks a duplicate"""
+        self._breach(create_telemetry_event, test_device.id, {"temperature": 85.0})
+        assert len(evaluate_rules_for_device(db_session, test_device.id)) == 1
+
+        fake_redis.flushall()
+
+        assert evaluate_rules_for_device(db_session, test_device.id) == []
+
+    def test_zero_cooldown_always_fires(
+        self,
+        db_session,
+        test_device,
+        test_rule,
+        create_telemetry_event
+    ):
+        """Rules with cooldown_seconds=0 bypass the gate"""
+        test_rule.cooldown_seconds = 0
+        db_session.commit()
+        self._breach(create_telemetry_event, test_device.id, {"temperature": 85.0})
+
+        assert len(evaluate_rules_for_device(db_session, test_device.id)) == 1
+        assert len(evaluate_rules_for_device(db_session, test_device.id)) == 1
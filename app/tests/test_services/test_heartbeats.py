@@ -0,0 +1,147 @@
+# tests/test_services/test_heartbeats.py
+import pytest
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+from app.db.models.alert import Alert
+from app.db.models.rule import Rule
+from app.services.evaluation_service import (
+    evaluate_missed_heartbeats,
+    evaluate_rules_for_device,
+    touch_heartbeats,
+)
+from app.services.heartbeat_tracker import HeartbeatTracker
+from sqlalchemy import select
+
+
+@pytest.fixture
+def heartbeat_rule(db_session, test_project):
+    """Alert when a device is silent for 60 seconds"""
+    rule = Rule(
+        project_id=test_project.id,
+        name="Device offline",
+        kind="HEARTBEAT",
+        heartbeat_seconds=60,
+        cooldown_seconds=0,
+        enabled=True,
+        scope="ALL"
+    )
+    db_session.add(rule)
+    db_session.commit()
+    db_session.refresh(rule)
+    return rule
+
+
+class TestHeartbeatTracker:
+    """Test the Redis sorted-set deadline store"""
+
+    def test_pop_returns_only_expired(self, fake_redis):
+        """Only deadlines at or before `now` are popped, and each only once"""
+        tracker = HeartbeatTracker(fake_redis)
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        tracker.touch(1, [SimpleNamespace(id=10, heartbeat_seconds=30)], now)
+        tracker.touch(2, [SimpleNamespace(id=10, heartbeat_seconds=300)], now)
+
+        missed = tracker.pop_expired(now + timedelta(seconds=60), limit=100)
+
+        assert [(m.device_id, m.rule_id) for m in missed] == [(1, 10)]
+        assert missed[0].deadline == (now + timedelta(seconds=30)).timestamp()
+        assert tracker.pop_expired(now + timedelta(seconds=60), limit=100) == []
+        assert tracker.pending() == 1
+
+    def test_pop_respects_limit(self, fake_redis):
+        """A scan pops at most `limit` deadlines, oldest first"""
+        tracker = HeartbeatTracker(fake_redis)
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for device_id in range(5):
+            tracker.touch(device_id, [SimpleNamespace(id=1, heartbeat_seconds=10 + device_id)], now)
+
+        missed = tracker.pop_expired(now + timedelta(hours=1), limit=2)
+
+        assert [m.device_id for m in missed] == [0, 1]
+        assert tracker.pending() == 3
+
+    def test_restore_does_not_override_rearmed_deadline(self, fake_redis):
+        """A device that reported after the pop keeps its fresh deadline"""
+        tracker = HeartbeatTracker(fake_redis)
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        rule = SimpleNamespace(id=1, heartbeat_seconds=10)
+        tracker.touch(1, [rule], now)
+        missed = tracker.pop_expired(now + timedelta(seconds=20), limit=10)
+
+        tracker.touch(1, [rule], now + timedelta(seconds=30))
+        tracker.restore(missed)
+
+        assert tracker.pop_expired(now + timedelta(seconds=35), limit=10) == []
+
+
+class TestHeartbeatRules:
+    """Test dead-man alerts end to end through the service layer"""
+
+    def test_silent_device_fires_once(self, db_session, test_device, heartbeat_rule):
+        """A device that stops reporting raises one alert per outage"""
+        now = datetime.now(timezone.utc)
+        assert touch_heartbeats(db_session, test_device.id, now=now) == 1
+
+        # Not overdue yet
+        assert evaluate_missed_heartbeats(db_session, now=now + timedelta(seconds=30)) == []
+
+        alert_ids = evaluate_missed_heartbeats(db_session, now=now + timedelta(seconds=61))
+        assert len(alert_ids) == 1
+        alert = db_session.get(Alert, alert_ids[0])
+        assert alert.rule_id == heartbeat_rule.id
+        assert alert.details["evaluation"]["last_seen"] == now.isoformat()
+
+        # Still silent: the deadline was consumed, no second alert
+        assert evaluate_missed_heartbeats(db_session, now=now + timedelta(seconds=600)) == []
+
+    def test_reporting_device_pushes_deadline(self, db_session, test_device, heartbeat_rule):
+        """Each ingest moves the deadline forward"""
+        now = datetime.now(timezone.utc)
+        touch_heartbeats(db_session, test_device.id, now=now)
+        touch_heartbeats(db_session, test_device.id, now=now + timedelta(seconds=50))
+
+        assert evaluate_missed_heartbeats(db_session, now=now + timedelta(seconds=70)) == []
+        assert len(evaluate_missed_heartbeats(db_session, now=now + timedelta(seconds=111))) == 1
+
+    def test_disabled_rule_deadline_dropped(self, db_session, test_device, heartbeat_rule):
+        """Deadlines of rules disabled after arming do not alert"""
+        from app.services.rule_index import invalidate_rule_set
+
+        now = datetime.now(timezone.utc)
+        touch_heartbeats(db_session, test_device.id, now=now)
+        heartbeat_rule.enabled = False
+        db_session.commit()
+        invalidate_rule_set(heartbeat_rule.project_id)
+
+        assert evaluate_missed_heartbeats(db_session, now=now + timedelta(seconds=61)) == []
+
+    def test_no_heartbeat_rules_skips_redis(self, db_session, test_device, test_rule, fake_redis):
+        """Projects without heartbeat rules never touch the sorted set"""
+        assert touch_heartbeats(db_session, test_device.id) == 0
+        assert fake_redis.zcard(HeartbeatTracker.KEY) == 0
+
+    def test_threshold_evaluation_ignores_heartbeat_rules(
+        self,
+        db_session,
+        test_device,
+        heartbeat_rule,
+        create_telemetry_event
+    ):
+        """Event-driven evaluation never fires heartbeat rules"""
+        create_telemetry_event(test_device.id, {"temperature": 1.0})
+
+        assert evaluate_rules_for_device(db_session, test_device.id) == []
+        assert db_session.execute(select(Alert)).scalars().all() == []
+
+    def test_ingest_arms_deadline(self, db_session, test_device, heartbeat_rule, fake_redis, mocker):
+        """The ingest task bumps the device's deadline"""
+        from app.workers.tasks.ingest import ingest_events
+
+        mocker.patch("app.workers.tasks.ingest.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.ingest.evaluate_rules_for_device_task.delay")
+
+        device_id = test_device.id
+        ingest_events(device_id, [{"ts": datetime.now(timezone.utc).isoformat(), "data": {}}])
+
+        assert fake_redis.zscore(HeartbeatTracker.KEY, f"{device_id}:{heartbeat_rule.id}") is not None
@@ -0,0 +1,42 @@
+# tests/test_services/test_http_pool.py
+from app.services import http_pool
+from app.services.http_pool import WebhookHttpPool, get_webhook_http_pool
+
+
+class TestWebhookHttpPool:
+    """Test the per-process, per-origin webhook client pool"""
+
+    def test_one_client_per_origin(self):
+        pool = WebhookHttpPool(max_connections_per_host=4)
+        a = pool.client_for("https://hooks.example.com/a")
+        assert pool.client_for("https://HOOKS.example.com/b?x=1") is a
+        assert pool.client_for("https://hooks.example.com:8443/a") is not a
+        assert pool.client_for("http://hooks.example.com/a") is not a
+        assert len(pool) == 3
+        pool.close()
+        assert len(pool) == 0
+        assert a.is_closed
+
+    def test_least_recently_used_origin_is_closed(self):
+        pool = WebhookHttpPool(max_hosts=2)
+        a = pool.client_for("https://a.example.com/")
+        b = pool.client_for("https://b.example.com/")
+        pool.client_for("https://a.example.com/")
+        pool.client_for("https://c.example.com/")
+
+        assert b.is_closed and not a.is_closed
+        assert len(pool) == 2
+        pool.close()
+
+    def test_reset_after_fork_builds_a_new_pool(self, mocker):
+        mocker.patch.object(http_pool, "_webhook_http_pool", None)
+        parent = get_webhook_http_pool()
+        parent_client = parent.client_for("https://a.example.com/")
+
+        http_pool.reset_webhook_http_pool()
+
+        assert get_webhook_http_pool() is not parent
+        # The inherited sockets are left to the parent process
+        assert not parent_client.is_closed
+        http_pool.close_webhook_http_pool()
+        parent.close()
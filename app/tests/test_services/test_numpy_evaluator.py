@@ -0,0 +1,186 @@
+# tests/test_services/test_numpy_evaluator.py
+import random
+import pytest
+from types import SimpleNamespace
+from datetime import datetime, timezone, timedelta
+
+from app.services.evaluation_service import evaluate_window_python, evaluate_rules_for_device
+
+np = pytest.importorskip("numpy")
+
+from app.services import numpy_evaluator  # noqa: E402
+from app.services.numpy_evaluator import evaluate_window_numpy  # noqa: E402
+
+
+def _window(payloads: list[dict]) -> list:
+    """Build a newest-first window of lightweight events."""
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(id=i, ts=base - timedelta(seconds=i), payload=p)
+        for i, p in enumerate(payloads)
+    ]
+
+
+def _rule(rule_id: int, metric: str, operator: str, threshold: float, window_n: int, window_seconds=None):
+    return SimpleNamespace(
+        id=rule_id,
+        metric=metric,
+        operator=operator,
+        threshold=threshold,
+        window_n=window_n,
+        window_seconds=window_seconds,
+        conditions=None,
+        combinator=None,
+    )
+
+
+class TestNumpyEvaluatorParity:
+    """The numpy engine must produce exactly what the pure-Python evaluator produces"""
+
+    def test_parity_on_random_windows(self):
+        """Random payloads with missing / non-numeric values across many rules"""
+        rng = random.Random(1234)
+        metrics = ["temperature", "humidity", "cpu"]
+
+        for _ in range(50):
+            payloads = []
+            for _ in range(rng.randint(0, 300)):
+                p = {}
+                for m in metrics:
+                    roll = rng.random()
+                    if roll < 0.6:
+                        p[m] = rng.uniform(0, 100)
+                    elif roll < 0.7:
+                        p[m] = rng.randint(0, 100)
+                    elif roll < 0.8:
+                        p[m] = "n/a"
+                payloads.append(p)
+            window = _window(payloads)
+
+            rules = [
+                _rule(
+                    i,
+                    rng.choice(metrics),
+                    rng.choice([">", ">=", "<", "<="]),
+                    rng.choice([0, 25, 50.0, 75.5, 100]),
+                    rng.randint(1, 300),
+                )
+                for i in range(20)
+            ]
+
+            assert evaluate_window_numpy(rules, window) == evaluate_window_python(rules, window)
+
+    def test_boundary_values_and_operators(self):
+        """Equality on the threshold is handled identically for every operator"""
+        window = _window([{"v": 80}, {"v": 80.0}, {"v": 79.9}, {"v": 80.1}])
+        rules = [_rule(i, "v", op, 80, 4) for i, op in enumerate([">", ">=", "<", "<="])]
+
+        numpy_results = evaluate_window_numpy(rules, window)
+
+        assert numpy_results == evaluate_window_python(rules, window)
+        assert [numpy_results[i].match_count for i in range(4)] == [1, 3, 1, 3]
+
+    def test_metric_missing_everywhere(self):
+        """Missing metric gives zero considered and no latest value"""
+        window = _window([{"other": 1.0}] * 5)
+        rules = [_rule(1, "temperature", ">", 10, 5)]
+
+        result = evaluate_window_numpy(rules, window)[1]
+
+        assert result == evaluate_window_python(rules, window)[1]
+        assert result.considered == 0
+        assert result.latest_value is None
+
+    def test_latest_value_outside_short_window(self):
+        """A rule's latest value only comes from inside its own window"""
+        window = _window([{}, {}, {"v": 5.0}])
+        rules = [_rule(1, "v", ">", 1, 2), _rule(2, "v", ">", 1, 3)]
+
+        results = evaluate_window_numpy(rules, window)
+
+        assert results == evaluate_window_python(rules, window)
+        assert results[1].latest_value is None
+        assert results[2].latest_value == 5.0
+
+    def test_insufficient_window_left_out(self):
+        """Rules with a window larger than the available events produce no result"""
+        window = _window([{"v": 100.0}] * 3)
+        rules = [_rule(1, "v", ">", 1, 5)]
+
+        assert evaluate_window_numpy(rules, window) == {}
+        assert evaluate_window_python(rules, window) == {}
+
+    def test_time_windows(self):
+        """Time-window rules only see events newer than now - window_seconds"""
+        window = _window([{"v": 100.0}] * 10)  # one event per second back from `now`
+        now = window[0].ts
+        rules = [
+            _rule(1, "v", ">", 1, 10, window_seconds=3),   # 4 events (ts >= now - 3s)
+            _rule(2, "v", ">", 1, 2, window_seconds=60),   # capped at window_n
+            _rule(3, "v", ">", 1, 50, window_seconds=600), # not full, still evaluated
+            _rule(4, "v", ">", 1, 5),
+        ]
+
+        results = evaluate_window_numpy(rules, window, now=now)
+
+        assert results == evaluate_window_python(rules, window, now=now)
+        assert [results[i].considered for i in range(1, 5)] == [4, 2, 10, 5]
+
+
+    def test_compound_rules(self):
+        """AND/OR compound rules match the Python engine, including per-condition counts"""
+        from app.services.rule_index import Condition
+
+        rng = random.Random(99)
+        payloads = [
+            {m: rng.uniform(0, 100) for m in ("t", "h") if rng.random() < 0.8}
+            for _ in range(40)
+        ]
+        window = _window(payloads)
+        conditions = (Condition("t", ">", 50.0), Condition("h", "<=", 30.0))
+        rules = []
+        for i, combinator in enumerate(["AND", "OR"]):
+            rule = _rule(i, None, ">", None, 25)
+            rule.conditions = conditions
+            rule.combinator = combinator
+            rules.append(rule)
+
+        results = evaluate_window_numpy(rules, window)
+
+        assert results == evaluate_window_python(rules, window)
+        assert results[0].match_count <= min(results[0].condition_matches)
+        assert results[1].match_count >= max(results[1].condition_matches)
+
+
+class TestNumpyEngineSelection:
+    """The engine is selected through settings"""
+
+    def test_numpy_engine_fires_same_alert(
+        self,
+        db_session,
+        test_device,
+        test_rule,
+        create_telemetry_event,
+        mocker
+    ):
+        """EVALUATION_ENGINE=numpy creates the same alert as the Python engine"""
+        mocker.patch("app.services.evaluation_service.settings.EVALUATION_ENGINE", "numpy")
+        spy = mocker.spy(numpy_evaluator, "evaluate_window_numpy")
+
+        values = [85.0, 75.0, 90.0, 70.0, 95.0]  # 3 above 80
+        for i, val in enumerate(values):
+            create_telemetry_event(
+                device_id=test_device.id,
+                payload={"temperature": val},
+                ts=datetime.now(timezone.utc) + timedelta(seconds=i)
+            )
+
+        alert_ids = evaluate_rules_for_device(db_session, test_device.id)
+
+        assert len(alert_ids) == 1
+        assert spy.called
+
+        from app.db.models.alert import Alert
+        alert = db_session.get(Alert, alert_ids[0])
+        assert alert.details["evaluation"]["match_count"] == 3
+        assert alert.details["evaluation"]["latest_value"] == 95.0
@@ -0,0 +1,141 @@
+# tests/test_services/test_rule_index.py
+from app.services.rule_index import (
+    CompiledRule,
+    CompiledRuleSet,
+    get_compiled_rule_set,
+    invalidate_rule_set,
+)
+
+
+def _rule(rule_id, scope="ALL", tag=None, operator=">", window_n=5, required_k=3):
+    return CompiledRule(
+        id=rule_id,
+        project_id=1,
+        name=f"rule-{rule_id}",
+        kind="THRESHOLD",
+        metric="temperature",
+        operator=operator,
+        threshold=80.0,
+        conditions=None,
+        combinator=None,
+        window_n=window_n,
+        required_k=required_k,
+        window_seconds=None,
+        heartbeat_seconds=None,
+        cooldown_seconds=60,
+        scope=scope,
+        tag=tag,
+    )
+
+
+class TestCompiledRuleSet:
+    """Test the tag -> rules inverted index"""
+
+    def test_applicable_combines_scopes(self):
+        """A device gets ALL rules, rules for its own tags and its explicit rules"""
+        rule_set = CompiledRuleSet([
+            _rule(1),
+            _rule(2, scope="TAG", tag="hvac"),
+            _rule(3, scope="TAG", tag="pump"),
+            _rule(4, scope="EXPLICIT"),
+            _rule(5, scope="EXPLICIT"),
+        ])
+
+        ids = {r.id for r in rule_set.applicable(["hvac", "roof"], {5})}
+
+        assert ids == {1, 2, 5}
+        assert rule_set.has_explicit
+
+    def test_duplicate_device_tags_do_not_duplicate_rules(self):
+        """Each TAG rule is returned once even if the device lists its tag twice"""
+        rule_set = CompiledRuleSet([_rule(1, scope="TAG", tag="hvac")])
+
+        assert [r.id for r in rule_set.applicable(["hvac", "hvac"])] == [1]
+
+    def test_invalid_rules_dropped_at_compile_time(self):
+        """Unknown operators, k > n and tagless TAG rules never reach evaluation"""
+        rule_set = CompiledRuleSet([
+            _rule(1, operator="=="),
+            _rule(2, window_n=2, required_k=3),
+            _rule(3, scope="TAG", tag=None),
+            _rule(4),
+        ])
+
+        assert [r.id for r in rule_set.applicable([])] == [4]
+        assert len(rule_set) == 1
+
+
+class TestRuleSetCache:
+    """Test the per-process compiled rule set cache"""
+
+    def test_cached_until_invalidated(self, db_session, test_project, test_rule, mocker):
+        """Rule sets are reused until a rule mutation invalidates them"""
+        mocker.patch("app.services.rule_index.settings.RULESET_CACHE_TTL_SECONDS", 60)
+
+        first = get_compiled_rule_set(db_session, test_project.id)
+        assert get_compiled_rule_set(db_session, test_project.id) is first
+
+        invalidate_rule_set(test_project.id)
+        assert get_compiled_rule_set(db_session, test_project.id) is not first
+
+    def test_rule_update_invalidates_cache(self, client, test_api_key, test_project, test_rule, db_session, mocker):
+        """Disabling a rule through the API takes effect on the next evaluation"""
+        mocker.patch("app.services.rule_index.settings.RULESET_CACHE_TTL_SECONDS", 60)
+        assert len(get_compiled_rule_set(db_session, test_project.id)) == 1
+
+        response = client.patch(
+            f"/rules/{test_rule.id}",
+            json={"enabled": False},
+            headers={"X-API-Key": test_api_key.raw_key}
+        )
+        assert response.status_code == 200
+
+        assert len(get_compiled_rule_set(db_session, test_project.id)) == 0
+
+    def test_ttl_zero_disables_cache(self, db_session, test_project, test_rule, mocker):
+        """With a zero TTL every call compiles a fresh rule set"""
+        mocker.patch("app.services.rule_index.settings.RULESET_CACHE_TTL_SECONDS", 0)
+
+        first = get_compiled_rule_set(db_session, test_project.id)
+        assert get_compiled_rule_set(db_session, test_project.id) is not first
+
+    def test_change_in_other_process_seen_on_next_lookup(self, db_session, fake_redis, test_project, test_rule, mocker):
+        """A rule change bumps the shared version; a warm cache in this process reloads"""
+        mocker.patch("app.services.rule_index.settings.RULESET_CACHE_TTL_SECONDS", 60)
+        first = get_compiled_rule_set(db_session, test_project.id)
+        assert get_compiled_rule_set(db_session, test_project.id) is first
+
+        # Another process disables the rule (rule_set_changed there only touches Redis and its own cache)
+        test_rule.enabled = False
+        db_session.commit()
+        fake_redis.incr(f"ruleset:version:{test_project.id}")
+
+        assert len(get_compiled_rule_set(db_session, test_project.id)) == 0
+
+    def test_rule_deleted_after_load_keeps_other_alerts(
+        self, db_session, test_device, test_rule, create_telemetry_event, mocker
+    ):
+        """A rule deleted between loading the rule set and inserting alerts is skipped, not an FK error"""
+        from datetime import datetime, timedelta, timezone
+        from app.db.models.alert import Alert
+        from app.db.models.rule import Rule
+        from app.services.evaluation_service import evaluate_rules_for_device
+
+        mocker.patch("app.services.rule_index.settings.RULESET_CACHE_TTL_SECONDS", 60)
+        doomed = Rule(
+            project_id=test_device.project_id, name="Warm", metric="temperature", operator=">",
+            threshold=70.0, window_n=5, required_k=3, cooldown_seconds=300, enabled=True, scope="ALL",
+        )
+        db_session.add(doomed)
+        db_session.commit()
+        assert len(get_compiled_rule_set(db_session, test_device.project_id)) == 2
+        db_session.delete(doomed)
+        db_session.commit()
+
+        now = datetime.now(timezone.utc)
+        for i in range(5):
+            create_telemetry_event(test_device.id, {"temperature": 90.0}, ts=now - timedelta(seconds=10 - i))
+
+        alert_ids = evaluate_rules_for_device(db_session, test_device.id)
+
+        assert [db_session.get(Alert, a).rule_id for a in alert_ids] == [test_rule.id]
@@ -0,0 +1,182 @@
+# tests/test_workers/test_async_delivery.py
+import time
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+
+import fakeredis
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.async_session import async_database_url
+from app.db.models.alert import Alert
+from app.db.models.webhook_delivery import WebhookDelivery
+from app.db.models.webhook_subscription import WebhookSubscription
+from app.services.circuit_breaker import AsyncWebhookCircuitBreaker
+from app.services.delivery_queue import DUE_KEY, LEASES_KEY, AsyncDeliveryQueue
+from app.services.delivery_stats import AsyncDeliveryStats
+from app.services.endpoint_limiter import AsyncEndpointLimiter
+from app.services.http_pool import AsyncWebhookHttpPool
+from app.services.payload_cache import AsyncPayloadCache
+from app.workers.async_delivery import AsyncDeliveryWorker
+
+
+@pytest.fixture
+async def async_sessionmaker_(db_engine):
+    engine = create_async_engine(async_database_url(db_engine.url.render_as_string(hide_password=False)))
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def async_redis():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+async def worker(async_redis, async_sessionmaker_):
+    http_pool = AsyncWebhookHttpPool()
+    yield AsyncDeliveryWorker(
+        AsyncDeliveryQueue(async_redis, lease_seconds=60),
+        AsyncWebhookCircuitBreaker(async_redis),
+        http_pool,
+        async_sessionmaker_,
+        concurrency=10,
+        limiter=AsyncEndpointLimiter(async_redis, defer_seconds=2.0),
+        payloads=AsyncPayloadCache(async_redis),
+        stats=AsyncDeliveryStats(async_redis),
+    )
+    await http_pool.aclose()
+
+
+@pytest.fixture
+def delivery(db_session, test_device, test_rule, test_project):
+    alert = Alert(
+        device_id=test_device.id,
+        rule_id=test_rule.id,
+        triggered_at=datetime.now(timezone.utc),
+        details={"test": "data"}
+    )
+    webhook = WebhookSubscription(
+        project_id=test_project.id,
+        url="https://example.com/webhook",
+        secret="test-secret",
+        enabled=True
+    )
+    db_session.add_all([alert, webhook])
+    db_session.commit()
+
+    delivery = WebhookDelivery(
+        project_id=test_project.id,
+        alert_id=alert.id,
+        webhook_id=webhook.id,
+        status="pending"
+    )
+    db_session.add(delivery)
+    db_session.commit()
+    return delivery
+
+
+def _response(code):
+    resp = Mock()
+    resp.status_code = code
+    return resp
+
+
+class TestAsyncDeliveryWorker:
+    """Test the asyncio webhook delivery engine"""
+
+    async def test_delivers_due_delivery_and_acks(self, db_session, worker, async_redis, delivery, mocker):
+        mock_post = mocker.patch("httpx.AsyncClient.post", new=AsyncMock(return_value=_response(200)))
+        await async_redis.zadd(DUE_KEY, {str(delivery.id): time.time()})
+
+        assert await worker.run_once() == 1
+        await worker.drain()
+
+        db_session.refresh(delivery)
+        assert delivery.status == "success"
+        assert delivery.attempts == 1
+        assert await async_redis.zcard(LEASES_KEY) == 0
+        headers = mock_post.call_args.kwargs["headers"]
+        assert "X-Telemetry-Signature" in headers
+        # Rendered on the cache miss; later attempts reuse it
+        body = mock_post.call_args.kwargs["content"]
+        assert await worker.payloads.get(delivery.alert_id, delivery.event) == body
+        assert delivery.last_duration_ms is not None
+        assert (await worker.stats.summary(delivery.webhook_id))["attempts"] == 1
+
+    async def test_retryable_status_reschedules(self, db_session, worker, async_redis, delivery, mocker):
+        mocker.patch("httpx.AsyncClient.post", new=AsyncMock(return_value=_response(503)))
+
+        assert await worker.deliver(delivery.id) == "retry_scheduled"
+
+        db_session.refresh(delivery)
+        assert delivery.status == "retrying"
+        assert delivery.last_status_code == 503
+        # Back on the due queue with a backoff of at least 5 seconds
+        assert await async_redis.zscore(DUE_KEY, str(delivery.id)) >= time.time() + 4
+
+    async def test_gives_up_after_max_retries(self, db_session, worker, delivery, mocker):
+        mocker.patch("httpx.AsyncClient.post", new=AsyncMock(side_effect=httpx.ConnectError("down")))
+        delivery.attempts = 8
+        db_session.commit()
+
+        assert await worker.deliver(delivery.id) == "failed_max_retries"
+
+        db_session.refresh(delivery)
+        assert delivery.status == "failed"
+        assert delivery.last_error == "max_retries_exceeded:http_error:ConnectError"
+
+    async def test_claim_is_respected(self, db_session, worker, delivery, mocker):
+        """A delivery another worker is sending is not sent twice"""
+        mock_post = mocker.patch("httpx.AsyncClient.post", new=AsyncMock())
+        delivery.status = "sending"
+        delivery.updated_at = datetime.now(timezone.utc)
+        db_session.commit()
+
+        assert await worker.deliver(delivery.id) == "in_progress_or_already_handled"
+        mock_post.assert_not_called()
+
+    async def test_open_circuit_skips_request(self, db_session, worker, delivery, mocker):
+        mock_post = mocker.patch("httpx.AsyncClient.post", new=AsyncMock())
+        for _ in range(5):
+            await worker.breaker.record_failure("https://example.com/webhook")
+
+        assert await worker.deliver(delivery.id) == "retry_scheduled"
+        mock_post.assert_not_called()
+        db_session.refresh(delivery)
+        assert delivery.last_error == "circuit_open:https://example.com/webhook"
+
+    async def test_endpoint_over_limit_is_deferred(self, db_session, worker, async_redis, delivery, mocker):
+        mock_post = mocker.patch("httpx.AsyncClient.post", new=AsyncMock())
+        delivery_id = delivery.id
+        assert (await worker.limiter.acquire(delivery.webhook_id, "other", 1, 0)).admitted
+        mocker.patch("app.services.endpoint_limiter.settings.WEBHOOK_MAX_IN_FLIGHT_PER_ENDPOINT", 1)
+
+        assert await worker.deliver(delivery_id) == "deferred"
+
+        mock_post.assert_not_called()
+        db_session.refresh(delivery)
+        assert (delivery.status, delivery.attempts) == ("pending", 0)
+        assert await async_redis.zscore(DUE_KEY, str(delivery_id)) >= time.time() + 1
+
+    async def test_expired_lease_is_reaped(self, worker, async_redis):
+        await async_redis.zadd(DUE_KEY, {"42": 0})
+        assert await worker.queue.claim(10, now=100) == [42]
+        assert await worker.queue.claim(10, now=100) == []
+
+        assert await worker.queue.reap(now=100 + 61) == 1
+        assert await worker.queue.claim(10, now=200) == [42]
+
+    def test_enqueue_uses_queue_when_async_engine(self, db_session, fake_redis, delivery, mocker):
+        from app.workers.tasks.webhook_delivery import enqueue_webhooks_for_alert
+
+        mocker.patch("app.workers.tasks.webhook_delivery.settings.WEBHOOK_DELIVERY_ENGINE", "asyncio")
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mock_deliver = mocker.patch("app.workers.tasks.webhook_delivery.deliver_webhook.delay")
+        delivery_id, alert_id = delivery.id, delivery.alert_id
+
+        assert enqueue_webhooks_for_alert(alert_id) == 1
+
+        mock_deliver.assert_not_called()
+        assert fake_redis.zscore(DUE_KEY, str(delivery_id)) is not None
@@ -199,4 +199,105 @@ class TestIngestLogic:
         assert len(stored_events) == 3
         assert stored_events[0].payload["seq"] == 1
         assert stored_events[1].payload["seq"] == 2
-        assert stored_events[2].payload["seq"] == 3
\ No newline at end of file
+        assert stored_events[2].payload["seq"] == 3
+
+class TestInlineEvaluation:
+    """Test fused ingest+evaluate mode"""
+
+    def test_inline_mode_creates_alert_without_queue_hop(
+        self,
+        db_session,
+        test_device,
+        test_rule,
+        mocker
+    ):
+        """With INGEST_INLINE_EVALUATION the ingest task creates the alert itself"""
+        from app.workers.tasks.ingest import ingest_events
+        from app.db.models.alert import Alert
+
+        mocker.patch("app.workers.tasks.ingest.settings.INGEST_INLINE_EVALUATION", True)
+        mocker.patch("app.workers.tasks.ingest.SessionLocal", return_value=db_session)
+        mock_evaluate = mocker.patch(
+            "app.workers.tasks.ingest.evaluate_rules_for_device_task.delay"
+        )
+        mock_enqueue = mocker.patch(
+            "app.workers.tasks.ingest.enqueue_webhooks_for_alerts.delay"
+        )
+
+        base_time = datetime.now(timezone.utc)
+        events = [
+            {"ts": base_time.replace(microsecond=i).isoformat(), "data": {"temperature": 85.0}}
+            for i in range(5)
+        ]
+
+        device_id = test_device.id
+        assert ingest_events(device_id, events) == 5
+
+        alerts = db_session.execute(
+            select(Alert).where(Alert.device_id == device_id)
+        ).scalars().all()
+        assert len(alerts) == 1
+        mock_enqueue.assert_called_once_with([alerts[0].id])
+        mock_evaluate.assert_not_called()
+
+    def test_inline_mode_uses_older_tail_from_db(
+        self,
+        db_session,
+        test_device,
+        test_rule,
+        create_telemetry_event,
+        mocker
+    ):
+        """The window combines the in-memory batch with older stored events"""
+        from datetime import timedelta
+        from app.workers.tasks.ingest import ingest_events
+
+        base_time = datetime.now(timezone.utc)
+        # 3 older breaching events already stored, batch of 2 non-breaching events
+        for i in range(3):
+            create_telemetry_event(
+                device_id=test_device.id,
+                payload={"temperature": 90.0},
+                ts=base_time - timedelta(seconds=10 - i),
+            )
+
+        mocker.patch("app.workers.tasks.ingest.settings.INGEST_INLINE_EVALUATION", True)
+        mocker.patch("app.workers.tasks.ingest.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.ingest.enqueue_webhooks_for_alerts.delay")
+        from app.workers.tasks import ingest as ingest_module
+        spy = mocker.spy(ingest_module, "evaluate_device")
+
+        events = [
+            {"ts": (base_time + timedelta(seconds=i)).isoformat(), "data": {"temperature": 50.0}}
+            for i in range(2)
+        ]
+        ingest_events(test_device.id, events)
+
+        # 3 of the last 5 breach -> rule (3 of 5) fires
+        assert len(spy.spy_return.created) == 1
+        assert len(spy.call_args.kwargs["recent_events"]) == 2
+
+    def test_inline_failure_falls_back_to_queued_evaluation(
+        self,
+        db_session,
+        test_device,
+        mocker
+    ):
+        """If inline evaluation fails the committed batch is still evaluated later"""
+        from app.workers.tasks.ingest import ingest_events
+
+        mocker.patch("app.workers.tasks.ingest.settings.INGEST_INLINE_EVALUATION", True)
+        mocker.patch("app.workers.tasks.ingest.SessionLocal", return_value=db_session)
+        mocker.patch(
+            "app.workers.tasks.ingest.evaluate_device",
+            side_effect=RuntimeError("boom"),
+        )
+        mock_evaluate = mocker.patch(
+            "app.workers.tasks.ingest.evaluate_rules_for_device_task.delay"
+        )
+
+        events = [{"ts": datetime.now(timezone.utc).isoformat(), "data": {"temperature": 1.0}}]
+
+        device_id = test_device.id
+        assert ingest_events(device_id, events) == 1
+        mock_evaluate.assert_called_once_with(device_id)
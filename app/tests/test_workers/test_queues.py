@@ -0,0 +1,55 @@
+# tests/test_workers/test_queues.py
+import pytest
+
+from app.workers.celery_app import celery_app
+from app.workers.queues import PRIORITY_HIGH, PRIORITY_LOW, TASK_QUEUES
+from app.workers.sharding import jump_hash
+
+
+def _queue(name, args=()):
+    return celery_app.amqp.router.route({}, name, args, {})["queue"].name
+
+
+class TestTaskQueues:
+    """Test routing of each task type to its own queue"""
+
+    @pytest.mark.parametrize("name,queue", [
+        ("app.workers.tasks.ingest_events", "ingest"),
+        ("app.workers.tasks.evaluate_rules_for_device", "evaluation"),
+        ("app.workers.tasks.scan_heartbeats", "evaluation"),
+        ("app.workers.tasks.enqueue_webhooks_for_alerts", "webhooks.fanout"),
+        ("app.workers.tasks.dispatch_due_webhooks", "webhooks.fanout"),
+        ("app.workers.tasks.replay_webhook_deliveries", "webhooks.fanout"),
+        ("app.workers.tasks.deliver_webhook", "webhooks.delivery"),
+        ("app.workers.tasks.deliver_webhook_batch", "webhooks.delivery"),
+    ])
+    def test_task_routed_to_its_queue(self, name, queue):
+        assert _queue(name, (42,)) == queue
+
+    def test_unlisted_tasks_keep_default_queue(self):
+        assert _queue("app.workers.tasks.ping") == "celery"
+
+    def test_shard_queues_take_precedence(self, mocker):
+        """With sharding on, device tasks go to their shard queue, other tasks keep their type queue"""
+        mocker.patch("app.workers.sharding.settings.EVALUATION_SHARD_COUNT", 4)
+
+        assert _queue("app.workers.tasks.ingest_events", (42, [])) == f"shard.{jump_hash(42, 4)}"
+        assert _queue("app.workers.tasks.scan_heartbeats") == "evaluation"
+
+    def test_every_routed_task_is_registered(self):
+        assert set(TASK_QUEUES) <= set(celery_app.tasks)
+
+    def test_background_tasks_store_no_results(self):
+        """Only ping keeps a result; the rest are acked after they run"""
+        for name in TASK_QUEUES:
+            assert celery_app.tasks[name].ignore_result, name
+        assert not celery_app.tasks["app.workers.tasks.ping"].ignore_result
+        # Ingest is not redelivered after a crash: a replayed batch would insert its events twice
+        assert not celery_app.tasks["app.workers.tasks.ingest_events"].acks_late
+        assert celery_app.tasks["app.workers.tasks.deliver_webhook"].acks_late
+
+    def test_priorities(self):
+        """Fan-out of new alerts runs ahead of retries and bulk replays"""
+        assert celery_app.tasks["app.workers.tasks.enqueue_webhooks_for_alerts"].priority == PRIORITY_HIGH
+        assert celery_app.tasks["app.workers.tasks.replay_webhook_deliveries"].priority == PRIORITY_LOW
+        assert PRIORITY_HIGH < PRIORITY_LOW
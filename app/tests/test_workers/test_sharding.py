@@ -0,0 +1,62 @@
+# tests/test_workers/test_sharding.py
+from collections import Counter
+
+from app.workers.celery_app import celery_app
+from app.workers.sharding import jump_hash, route_device_tasks, shard_queues_for_worker
+
+
+class TestJumpHash:
+    """Test the consistent hash used for shard assignment"""
+
+    def test_stable_and_in_range(self):
+        """The same device always maps to the same shard in [0, N)"""
+        for device_id in range(1000):
+            shard = jump_hash(device_id, 16)
+            assert 0 <= shard < 16
+            assert jump_hash(device_id, 16) == shard
+
+    def test_roughly_uniform(self):
+        """Devices spread evenly across shards"""
+        counts = Counter(jump_hash(device_id, 8) for device_id in range(8000))
+        assert len(counts) == 8
+        assert min(counts.values()) > 800
+
+    def test_growing_moves_only_to_new_shard(self):
+        """Going from N to N+1 shards moves ~1/(N+1) of devices, all to the new shard"""
+        moved = [d for d in range(10000) if jump_hash(d, 8) != jump_hash(d, 9)]
+
+        assert all(jump_hash(d, 9) == 8 for d in moved)
+        assert 0.08 < len(moved) / 10000 < 0.14
+
+
+class TestRouting:
+    """Test Celery routing of device tasks"""
+
+    def test_disabled_by_default(self):
+        """Without shards tasks keep the default queue"""
+        assert route_device_tasks("app.workers.tasks.ingest_events", (1, []), {}, {}) is None
+
+    def test_device_tasks_routed_by_device_id(self, mocker):
+        """Ingest and evaluation of a device land on the same shard queue"""
+        mocker.patch("app.workers.sharding.settings.EVALUATION_SHARD_COUNT", 4)
+
+        ingest = route_device_tasks("app.workers.tasks.ingest_events", (42, []), {}, {})
+        evaluate = route_device_tasks(
+            "app.workers.tasks.evaluate_rules_for_device", (), {"device_id": 42, "debounced": True}, {}
+        )
+
+        assert ingest == evaluate == {"queue": f"shard.{jump_hash(42, 4)}"}
+        assert route_device_tasks("app.workers.tasks.deliver_webhook", (42,), {}, {}) is None
+
+    def test_router_installed_in_celery(self, mocker):
+        """celery_app resolves the shard queue when a task is sent"""
+        mocker.patch("app.workers.sharding.settings.EVALUATION_SHARD_COUNT", 4)
+
+        route = celery_app.amqp.router.route({}, "app.workers.tasks.ingest_events", (42, []), {})
+
+        assert route["queue"].name == f"shard.{jump_hash(42, 4)}"
+
+    def test_worker_queue_assignment_covers_all_shards(self):
+        """Every shard is owned by exactly one worker"""
+        owned = [q for i in range(3) for q in shard_queues_for_worker(i, 3, shard_count=8)]
+        assert sorted(owned) == sorted(f"shard.{s}" for s in range(8))
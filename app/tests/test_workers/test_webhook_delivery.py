@@ -4,11 +4,11 @@ from unittest.mock import MagicMock, Mock
 from datetime import datetime, timezone
 import httpx
 
+from app.services.webhook_dispatch import sign
 from app.workers.tasks.webhook_delivery import (
     deliver_webhook,
     enqueue_webhooks_for_alert,
     _countdown,
-    _sign
 )
 
 class TestWebhookDelivery:
@@ -47,22 +47,67 @@ class TestWebhookDelivery:
         db_session.add(webhook)
         db_session.commit()
         
-        # Mock Celery task and SessionLocal
-        mock_deliver = mocker.patch(
-            "app.workers.tasks.webhook_delivery.deliver_webhook.delay"
-        )
+        # Mock the Celery group publish and SessionLocal
+        mock_group = mocker.patch("app.workers.tasks.webhook_delivery.group")
         mocker.patch(
             "app.workers.tasks.webhook_delivery.SessionLocal",
             return_value=db_session
         )
         
+        # Enqueue commits and closes the session, so keep the ID
+        alert_id = alert.id
+
         # Act
-        result = enqueue_webhooks_for_alert(alert.id)
+        result = enqueue_webhooks_for_alert(alert_id)
         
         # Assert
         assert result == 1
-        mock_deliver.assert_called_once()
+        mock_group.assert_called_once()
+
+        # A resolution is a separate delivery of the same alert
+        assert enqueue_webhooks_for_alert(alert_id, "alert.resolved") == 1
+        assert mock_group.call_count == 2
+        first, second = ([sig.args for sig in c.args[0]] for c in mock_group.call_args_list)
+        assert first != second
     
+    def test_enqueue_many_alerts_in_one_call(
+        self, db_session, test_device, test_rule, test_project, mocker
+    ):
+        """Bulk fan-out creates every (alert, webhook) row in one upsert and one group publish"""
+        from app.db.models.alert import Alert
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.db.models.webhook_subscription import WebhookSubscription
+        from app.workers.tasks.webhook_delivery import enqueue_webhooks_for_alerts
+        from sqlalchemy import select
+
+        alerts = [
+            Alert(device_id=test_device.id, rule_id=test_rule.id, triggered_at=datetime.now(timezone.utc), details={})
+            for _ in range(3)
+        ]
+        webhooks = [
+            WebhookSubscription(project_id=test_project.id, url=f"https://example.com/{i}", enabled=True)
+            for i in range(2)
+        ]
+        db_session.add_all(alerts + webhooks)
+        db_session.commit()
+        alert_ids = [a.id for a in alerts]
+
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mock_group = mocker.patch("app.workers.tasks.webhook_delivery.group")
+
+        assert enqueue_webhooks_for_alerts(alert_ids + alert_ids[:1]) == 6
+        # Re-enqueueing finds the existing rows
+        assert enqueue_webhooks_for_alerts(alert_ids) == 6
+
+        rows = db_session.execute(
+            select(WebhookDelivery).where(WebhookDelivery.alert_id.in_(alert_ids))
+        ).scalars().all()
+        assert len(rows) == 6
+        mock_group.assert_called()
+        published = [sig.args[0] for sig in mock_group.call_args.args[0]]
+        assert sorted(published) == sorted(r.id for r in rows)
+        assert mock_group.return_value.apply_async.call_count == 2
+
     def test_deliver_webhook_success(
         self,
         db_session,
@@ -320,86 +365,459 @@ class TestWebhookDelivery:
         timestamp = "2026-02-04T12:00:00Z"
         body = '{"alert_id":123}'
         
-        signature = _sign(secret, timestamp, body)
+        signature = sign(secret, timestamp, body)
         
         # Verify it's a valid hex string
         assert len(signature) == 64  # SHA-256 produces 64 hex chars
         assert all(c in '0123456789abcdef' for c in signature)
         
         # Verify it's deterministic
-        signature2 = _sign(secret, timestamp, body)
+        signature2 = sign(secret, timestamp, body)
         assert signature == signature2
         
         # Verify different inputs produce different signatures
-        signature3 = _sign(secret, timestamp, '{"alert_id":456}')
+        signature3 = sign(secret, timestamp, '{"alert_id":456}')
         assert signature != signature3
 
 
+class TestWebhookBatching:
+    """Test batched webhook subscriptions"""
+
+    @pytest.fixture
+    def batched_webhook(self, db_session, test_project):
+        from app.db.models.webhook_subscription import WebhookSubscription
+
+        webhook = WebhookSubscription(
+            project_id=test_project.id,
+            url="https://example.com/batch",
+            secret="test-secret",
+            batch_max_items=3,
+            batch_max_wait_ms=500,
+            enabled=True
+        )
+        db_session.add(webhook)
+        db_session.commit()
+        return webhook
+
+    def _alerts(self, db_session, device_id, rule_id, count):
+        from app.db.models.alert import Alert
+
+        alerts = [
+            Alert(device_id=device_id, rule_id=rule_id, triggered_at=datetime.now(timezone.utc), details={"n": i})
+            for i in range(count)
+        ]
+        db_session.add_all(alerts)
+        db_session.commit()
+        return [a.id for a in alerts]
+
+    def test_batcher_flush_signals(self, fake_redis):
+        from app.services.webhook_batcher import FLUSH_LATER, FLUSH_NOW, WebhookBatcher
+
+        batcher = WebhookBatcher(fake_redis)
+        assert batcher.add(7, [1], max_items=3, wait_ms=500) == FLUSH_LATER
+        assert batcher.add(7, [2], max_items=3, wait_ms=500) == 0
+        assert batcher.add(7, [3, 4], max_items=3, wait_ms=500) == FLUSH_NOW
+
+        assert batcher.pop(7, max_items=3, wait_ms=500) == ([1, 2, 3], 1)
+        assert batcher.pop(7, max_items=3, wait_ms=500) == ([4], 0)
+        # Buffer drained: the next add opens a new wait window
+        assert batcher.add(7, [5], max_items=3, wait_ms=500) == FLUSH_LATER
+
+    def test_enqueue_buffers_batched_deliveries(
+        self, db_session, fake_redis, test_device, test_rule, batched_webhook, mocker
+    ):
+        from app.services.webhook_batcher import get_webhook_batcher
+
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mock_group = mocker.patch("app.workers.tasks.webhook_delivery.group")
+        mock_flush_later = mocker.patch("app.workers.tasks.webhook_delivery.deliver_webhook_batch.apply_async")
+        mock_flush_now = mocker.patch("app.workers.tasks.webhook_delivery.deliver_webhook_batch.delay")
+        webhook_id = batched_webhook.id
+        alert_ids = self._alerts(db_session, test_device.id, test_rule.id, 3)
+
+        for aid in alert_ids:
+            assert enqueue_webhooks_for_alert(aid) == 1
+
+        mock_group.assert_not_called()
+        mock_flush_later.assert_called_once_with((webhook_id,), countdown=0.5)
+        mock_flush_now.assert_called_once_with(webhook_id)
+        ids, remaining = get_webhook_batcher().pop(webhook_id, 10, 500)
+        assert len(ids) == 3 and remaining == 0
+
+    def test_batch_delivered_in_one_post(
+        self, db_session, fake_redis, test_device, test_rule, test_project, batched_webhook, mocker
+    ):
+        import json
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.services.webhook_batcher import get_webhook_batcher
+        from app.workers.tasks.webhook_delivery import deliver_webhook_batch
+
+        alert_ids = self._alerts(db_session, test_device.id, test_rule.id, 2)
+        deliveries = [
+            WebhookDelivery(project_id=test_project.id, alert_id=aid, webhook_id=batched_webhook.id, status="pending")
+            for aid in alert_ids
+        ]
+        db_session.add_all(deliveries)
+        db_session.commit()
+        delivery_ids = [d.id for d in deliveries]
+        get_webhook_batcher().add(batched_webhook.id, delivery_ids, 3, 500)
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_post = mocker.patch("httpx.Client.post", return_value=mock_response)
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_success")
+
+        assert deliver_webhook_batch(batched_webhook.id) == "success"
+
+        mock_post.assert_called_once()
+        body = json.loads(mock_post.call_args.kwargs["content"])
+        assert body["event"] == "alert.batch"
+        assert [item["delivery_id"] for item in body["items"]] == delivery_ids
+        assert "X-Telemetry-Signature" in mock_post.call_args.kwargs["headers"]
+
+        rows = [db_session.get(WebhookDelivery, did) for did in delivery_ids]
+        for row in rows:
+            db_session.refresh(row)
+        assert {row.status for row in rows} == {"success"}
+        assert {row.batch_id for row in rows} == {body["batch_id"]}
+
+    def test_batch_retry_marks_every_row(
+        self, db_session, fake_redis, test_device, test_rule, test_project, batched_webhook, mocker
+    ):
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.workers.tasks.webhook_delivery import deliver_webhook_batch
+
+        alert_ids = self._alerts(db_session, test_device.id, test_rule.id, 2)
+        deliveries = [
+            WebhookDelivery(project_id=test_project.id, alert_id=aid, webhook_id=batched_webhook.id, status="pending")
+            for aid in alert_ids
+        ]
+        db_session.add_all(deliveries)
+        db_session.commit()
+        delivery_ids = [d.id for d in deliveries]
+        webhook_id = batched_webhook.id
+
+        mock_response = Mock()
+        mock_response.status_code = 503
+        mocker.patch("httpx.Client.post", return_value=mock_response)
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_failure")
+
+        assert deliver_webhook_batch(webhook_id, delivery_ids, "batch-1") == "retry_scheduled"
+
+        for did in delivery_ids:
+            row = db_session.get(WebhookDelivery, did)
+            db_session.refresh(row)
+            assert (row.status, row.last_status_code, row.batch_id) == ("retrying", 503, "batch-1")
+            assert row.next_attempt_at > datetime.now(timezone.utc)
+
+
+class TestPayloadCache:
+    """Test bodies rendered once per alert event and signed per attempt"""
+
+    def test_enqueue_renders_compressed_body(self, db_session, fake_redis, test_device, test_rule, test_project, mocker):
+        import zlib
+        from app.db.models.alert import Alert
+        from app.db.models.webhook_subscription import WebhookSubscription
+        from app.services.webhook_dispatch import build_body
+
+        alert = Alert(device_id=test_device.id, rule_id=test_rule.id, triggered_at=datetime.now(timezone.utc), details={"v": 1})
+        db_session.add_all([alert, WebhookSubscription(project_id=test_project.id, url="https://example.com/a", enabled=True)])
+        db_session.commit()
+        alert_id, expected = alert.id, build_body(alert, "alert.triggered")
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.group")
+
+        enqueue_webhooks_for_alert(alert_id)
+
+        raw = fake_redis.get(f"webhook:body:{alert_id}:alert.triggered")
+        assert zlib.decompress(raw).decode() == expected
+        assert fake_redis.ttl(f"webhook:body:{alert_id}:alert.triggered") > 0
+
+    def test_attempt_signs_cached_body(self, db_session, fake_redis, test_device, test_rule, test_project, mocker):
+        from app.db.models.alert import Alert
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.db.models.webhook_subscription import WebhookSubscription
+        from app.services.payload_cache import get_payload_cache
+
+        alert = Alert(device_id=test_device.id, rule_id=test_rule.id, triggered_at=datetime.now(timezone.utc), details={})
+        webhook = WebhookSubscription(project_id=test_project.id, url="https://example.com/a", secret="s", enabled=True)
+        db_session.add_all([alert, webhook])
+        db_session.commit()
+        delivery = WebhookDelivery(project_id=test_project.id, alert_id=alert.id, webhook_id=webhook.id, status="pending")
+        db_session.add(delivery)
+        db_session.commit()
+        delivery_id = delivery.id
+        cached = get_payload_cache().render([alert], "alert.triggered")[alert.id]
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_post = mocker.patch("httpx.Client.post", return_value=mock_response)
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_success")
+        get_alert = mocker.spy(db_session, "get")
+
+        assert deliver_webhook(delivery_id) == "success"
+
+        assert not any(call.args[0] is Alert for call in get_alert.call_args_list)
+        kwargs = mock_post.call_args.kwargs
+        assert kwargs["content"] == cached
+        ts = kwargs["headers"]["X-Telemetry-Timestamp"]
+        assert kwargs["headers"]["X-Telemetry-Signature"] == sign("s", ts, cached)
+
+
+class TestRetryScheduler:
+    """Test retries scheduled on the delivery row and sent by dispatch_due_webhooks"""
+
+    @pytest.fixture
+    def webhook(self, db_session, test_project):
+        from app.db.models.webhook_subscription import WebhookSubscription
+
+        webhook = WebhookSubscription(project_id=test_project.id, url="https://example.com/webhook", enabled=True)
+        db_session.add(webhook)
+        db_session.commit()
+        return webhook
+
+    def _delivery(self, db_session, test_device, test_rule, webhook, **fields):
+        from app.db.models.alert import Alert
+        from app.db.models.webhook_delivery import WebhookDelivery
+
+        alert = Alert(device_id=test_device.id, rule_id=test_rule.id, triggered_at=datetime.now(timezone.utc), details={})
+        db_session.add(alert)
+        db_session.commit()
+        delivery = WebhookDelivery(
+            project_id=webhook.project_id, alert_id=alert.id, webhook_id=webhook.id, **{"status": "pending", **fields}
+        )
+        db_session.add(delivery)
+        db_session.commit()
+        return delivery.id
+
+    def test_retryable_status_schedules_next_attempt(self, db_session, test_device, test_rule, webhook, mocker):
+        from datetime import timedelta
+        from app.db.models.webhook_delivery import WebhookDelivery
+
+        delivery_id = self._delivery(db_session, test_device, test_rule, webhook)
+        mock_response = Mock()
+        mock_response.status_code = 503
+        mocker.patch("httpx.Client.post", return_value=mock_response)
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_failure")
+
+        assert deliver_webhook(delivery_id) == "retry_scheduled"
+
+        row = db_session.get(WebhookDelivery, delivery_id)
+        db_session.refresh(row)
+        assert (row.status, row.attempts, row.last_status_code) == ("retrying", 1, 503)
+        # First retry backs off at least 5 seconds
+        assert row.next_attempt_at >= datetime.now(timezone.utc) + timedelta(seconds=4)
+
+    def test_gives_up_after_max_retries(self, db_session, test_device, test_rule, webhook, mocker):
+        from app.db.models.webhook_delivery import WebhookDelivery
+
+        delivery_id = self._delivery(db_session, test_device, test_rule, webhook, status="retrying", attempts=8)
+        mocker.patch("httpx.Client.post", side_effect=httpx.ConnectError("down"))
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_failure")
+
+        assert deliver_webhook(delivery_id) == "failed_max_retries"
+
+        row = db_session.get(WebhookDelivery, delivery_id)
+        db_session.refresh(row)
+        assert row.status == "failed"
+        assert row.last_error == "max_retries_exceeded:http_error:ConnectError"
+        assert row.next_attempt_at is None
+
+    def test_endpoint_over_limit_defers_without_attempt(
+        self, db_session, fake_redis, test_device, test_rule, webhook, mocker
+    ):
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.services.endpoint_limiter import get_endpoint_limiter
+
+        webhook.max_in_flight = 1
+        db_session.commit()
+        delivery_id = self._delivery(db_session, test_device, test_rule, webhook)
+        # Another worker holds the endpoint's only slot
+        assert get_endpoint_limiter().acquire(webhook.id, "other", 1, 0).admitted
+        mock_post = mocker.patch("httpx.Client.post")
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+
+        assert deliver_webhook(delivery_id) == "deferred"
+
+        mock_post.assert_not_called()
+        row = db_session.get(WebhookDelivery, delivery_id)
+        db_session.refresh(row)
+        assert (row.status, row.attempts) == ("pending", 0)
+        assert row.next_attempt_at > datetime.now(timezone.utc)
+
+    def test_open_circuit_takes_no_rate_token(
+        self, db_session, fake_redis, test_device, test_rule, webhook, mocker
+    ):
+        from app.services.endpoint_limiter import get_endpoint_limiter
+
+        webhook.max_rps = 1
+        db_session.commit()
+        webhook_id = webhook.id
+        delivery_id = self._delivery(db_session, test_device, test_rule, webhook)
+        mock_post = mocker.patch("httpx.Client.post")
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=True)
+
+        assert deliver_webhook(delivery_id) == "retry_scheduled"
+
+        mock_post.assert_not_called()
+        # The endpoint's one-request burst is still available
+        assert get_endpoint_limiter().acquire(webhook_id, "next", 0, 1).admitted
+
+    def test_endpoint_slot_released_after_attempt(
+        self, db_session, fake_redis, test_device, test_rule, webhook, mocker
+    ):
+        webhook.max_in_flight = 1
+        db_session.commit()
+        webhook_id = webhook.id
+        delivery_id = self._delivery(db_session, test_device, test_rule, webhook)
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mocker.patch("httpx.Client.post", return_value=mock_response)
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_success")
+
+        assert deliver_webhook(delivery_id) == "success"
+        assert fake_redis.zcard(f"webhook:inflight:{webhook_id}") == 0
+
+    def test_dispatches_due_deliveries_once(self, db_session, test_device, test_rule, webhook, mocker):
+        from datetime import timedelta
+        from app.workers.queues import PRIORITY_LOW
+        from app.workers.tasks.webhook_delivery import dispatch_due_webhooks
+
+        past = datetime.now(timezone.utc) - timedelta(seconds=1)
+        due = self._delivery(db_session, test_device, test_rule, webhook, status="retrying", next_attempt_at=past)
+        batch_due = self._delivery(
+            db_session, test_device, test_rule, webhook, status="retrying", next_attempt_at=past, batch_id="b-1"
+        )
+        stale_claim = self._delivery(db_session, test_device, test_rule, webhook, status="sending", next_attempt_at=past)
+        # Not due yet, terminal, or waiting on the first attempt
+        self._delivery(db_session, test_device, test_rule, webhook, status="retrying",
+                       next_attempt_at=datetime.now(timezone.utc) + timedelta(minutes=5))
+        self._delivery(db_session, test_device, test_rule, webhook, status="failed", next_attempt_at=past)
+        self._delivery(db_session, test_device, test_rule, webhook)
+        webhook_id = webhook.id
+
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mock_group = mocker.patch("app.workers.tasks.webhook_delivery.group")
+        mock_batch = mocker.patch("app.workers.tasks.webhook_delivery.deliver_webhook_batch.apply_async")
+
+        assert dispatch_due_webhooks() == 3
+
+        assert sorted(sig.args[0] for sig in mock_group.call_args.args[0]) == sorted([due, stale_claim])
+        # Retries queue behind first attempts
+        mock_group.return_value.apply_async.assert_called_once_with(priority=PRIORITY_LOW)
+        mock_batch.assert_called_once_with((webhook_id, [batch_due], "b-1"), priority=PRIORITY_LOW)
+
+        # Dispatched rows are leased: the next run does not send them again
+        mock_group.reset_mock()
+        assert dispatch_due_webhooks() == 0
+        mock_group.assert_not_called()
+
+
+class TestDeliveryRoundTrips:
+    """Test that a delivery attempt runs two statements in two transactions"""
+
+    @pytest.fixture
+    def statements(self, db_engine):
+        """Statements sent to the database, with "COMMIT" recorded for every commit"""
+        from sqlalchemy import event
+
+        executed: list[str] = []
+
+        def count(conn, cursor, statement, *args):
+            executed.append(statement)
+
+        def count_commit(conn):
+            executed.append("COMMIT")
+
+        event.listen(db_engine, "before_cursor_execute", count)
+        event.listen(db_engine, "commit", count_commit)
+        yield executed
+        event.remove(db_engine, "before_cursor_execute", count)
+        event.remove(db_engine, "commit", count_commit)
+
+    def _delivery(self, db_session, test_device, test_rule, test_project, **webhook_fields):
+        from app.db.models.alert import Alert
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.db.models.webhook_subscription import WebhookSubscription
+
+        webhook = WebhookSubscription(
+            project_id=test_project.id, url="https://example.com/webhook", enabled=True, **webhook_fields
+        )
+        alert = Alert(device_id=test_device.id, rule_id=test_rule.id, triggered_at=datetime.now(timezone.utc), details={})
+        db_session.add_all([webhook, alert])
+        db_session.commit()
+        delivery = WebhookDelivery(project_id=test_project.id, alert_id=alert.id, webhook_id=webhook.id, status="pending")
+        db_session.add(delivery)
+        db_session.commit()
+        delivery_id = delivery.id
+        db_session.expunge_all()  # nothing preloaded in the worker's session
+        return delivery_id
+
+    @pytest.mark.parametrize("status_code, result", [(200, "success"), (503, "retry_scheduled"), (400, "failed_non_retryable")])
+    def test_attempt_is_two_statements_and_commits(
+        self, db_session, test_device, test_rule, test_project, statements, mocker, status_code, result
+    ):
+        from app.db.models.webhook_delivery import WebhookDelivery
+
+        delivery_id = self._delivery(db_session, test_device, test_rule, test_project)
+        mock_response = Mock()
+        mock_response.status_code = status_code
+        mocker.patch("httpx.Client.post", return_value=mock_response)
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_success")
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.record_failure")
+
+        # The body is not cached: it is rendered from the alert the claim returned
+        statements.clear()
+        assert deliver_webhook(delivery_id) == result
+        assert [s == "COMMIT" for s in statements] == [False, True, False, True], statements
+
+        row = db_session.get(WebhookDelivery, delivery_id)
+        assert (row.attempts, row.last_status_code) == (1, status_code)
+
+    def test_deferred_attempt_releases_claim(
+        self, db_session, fake_redis, test_device, test_rule, test_project, statements, mocker
+    ):
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.services.endpoint_limiter import get_endpoint_limiter
+
+        delivery_id = self._delivery(db_session, test_device, test_rule, test_project, max_in_flight=1)
+        webhook_id = db_session.get(WebhookDelivery, delivery_id).webhook_id
+        assert get_endpoint_limiter().acquire(webhook_id, "other", 1, 0).admitted
+        db_session.expunge_all()
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.circuit_breaker.is_open", return_value=False)
+
+        statements.clear()
+        assert deliver_webhook(delivery_id) == "deferred"
+        assert [s == "COMMIT" for s in statements] == [False, True, False, True], statements
+
+        row = db_session.get(WebhookDelivery, delivery_id)
+        assert (row.status, row.attempts) == ("pending", 0)
+        assert row.next_attempt_at > datetime.now(timezone.utc)
+
 class TestCircuitBreaker:
     """Test circuit breaker functionality"""
-    
-    class _FakeRedis:
-        def __init__(self):
-            self.store = {}
-
-        def _expired(self, key):
-            if key not in self.store:
-                return True
-            val, exp = self.store[key]
-            if exp is None:
-                return False
-            from datetime import datetime, timezone
-            return datetime.now(timezone.utc) > exp
-
-        def get(self, key):
-            if key not in self.store or self._expired(key):
-                return None
-            val, exp = self.store[key]
-            return val
-
-        def set(self, key, value, ex=None):
-            from datetime import datetime, timezone, timedelta
-            if isinstance(value, str):
-                b = value.encode()
-            elif isinstance(value, bytes):
-                b = value
-            else:
-                b = str(value).encode()
-
-            exp_dt = None
-            if ex is not None:
-                exp_dt = datetime.now(timezone.utc) + timedelta(seconds=ex)
-
-            self.store[key] = (b, exp_dt)
-
-        def incr(self, key):
-            cur = self.get(key)
-            if cur is None:
-                val = 1
-            else:
-                try:
-                    val = int(cur.decode()) + 1
-                except Exception:
-                    val = 1
-            self.set(key, str(val))
-            return val
-
-        def expire(self, key, seconds):
-            from datetime import datetime, timezone, timedelta
-            if key in self.store:
-                val, _ = self.store[key]
-                self.store[key] = (val, datetime.now(timezone.utc) + timedelta(seconds=seconds))
-
-        def delete(self, key):
-            if key in self.store:
-                del self.store[key]
-
-    def test_circuit_opens_after_failures(self, mocker):
+
+    def test_circuit_opens_after_failures(self, fake_redis):
         """Test that circuit opens after threshold failures"""
         from app.services.circuit_breaker import WebhookCircuitBreaker
-        from datetime import timezone
 
-        fake_redis = self._FakeRedis()
         cb = WebhookCircuitBreaker(fake_redis, failure_threshold=3, recovery_timeout=5)
 
         url = "https://example.com/webhook"
@@ -416,12 +834,12 @@ class TestCircuitBreaker:
         stats = cb.get_stats(url)
         assert stats["state"] == "open"
         assert stats["failures"] >= 3
+        assert datetime.fromisoformat(stats["opened_at"]).tzinfo is not None
 
-    def test_transitions_to_half_open_after_timeout(self):
+    def test_transitions_to_half_open_after_timeout(self, fake_redis):
+        import time
         from app.services.circuit_breaker import WebhookCircuitBreaker
-        from datetime import datetime, timezone, timedelta
 
-        fake_redis = self._FakeRedis()
         cb = WebhookCircuitBreaker(fake_redis, failure_threshold=1, recovery_timeout=1)
         url = "https://example.com/webhook"
 
@@ -430,31 +848,197 @@ class TestCircuitBreaker:
         assert cb.is_open(url) is True
 
         # Simulate time passage by rewriting opened_at to past
-        opened_key = cb._key_opened_at(url)
-        past = (datetime.now(timezone.utc) - timedelta(seconds=10)).isoformat()
-        fake_redis.set(opened_key, past, ex=3600)
+        fake_redis.set(cb._key_opened_at(url), time.time() - 10, ex=3600)
 
         # Now is_open should transition to half_open and return False (not open)
         assert cb.is_open(url) is False
         # State should be half_open now
-        st = fake_redis.get(cb._key_state(url))
-        assert st == b"half_open"
+        assert fake_redis.get(cb._key_state(url)) == b"half_open"
 
-    def test_record_success_closes_circuit(self):
+    def test_half_open_admits_configured_probes(self, fake_redis):
+        import time
+        from app.services.circuit_breaker import WebhookCircuitBreaker
+
+        cb = WebhookCircuitBreaker(fake_redis, failure_threshold=1, recovery_timeout=30, half_open_probes=2)
+        url = "https://example.com/webhook"
+        cb.record_failure(url)
+        fake_redis.set(cb._key_opened_at(url), time.time() - 60, ex=3600)
+
+        # Two probes go through, the rest wait for their outcome
+        assert [cb.is_open(url) for _ in range(4)] == [False, False, True, True]
+
+        # A failed probe re-opens the circuit for another recovery period
+        assert cb.record_failure(url) is True
+        assert cb.is_open(url) is True
+        assert cb.get_stats(url)["state"] == "open"
+
+    def test_record_success_closes_circuit(self, fake_redis):
+        import time
         from app.services.circuit_breaker import WebhookCircuitBreaker
-        from datetime import datetime, timezone
 
-        fake_redis = self._FakeRedis()
         cb = WebhookCircuitBreaker(fake_redis, failure_threshold=1, recovery_timeout=60)
         url = "https://example.com/webhook"
 
         # Simulate half_open with failures recorded
         fake_redis.set(cb._key_state(url), "half_open", ex=3600)
         fake_redis.set(cb._key_failures(url), "2", ex=300)
-        fake_redis.set(cb._key_opened_at(url), datetime.now(timezone.utc).isoformat(), ex=3600)
+        fake_redis.set(cb._key_opened_at(url), time.time(), ex=3600)
+        fake_redis.set(cb._key_probes(url), "1", ex=60)
 
         # Recording success should clear keys
         cb.record_success(url)
         assert fake_redis.get(cb._key_state(url)) is None
         assert fake_redis.get(cb._key_failures(url)) is None
-        assert fake_redis.get(cb._key_opened_at(url)) is None
\ No newline at end of file
+        assert fake_redis.get(cb._key_opened_at(url)) is None
+        assert fake_redis.get(cb._key_probes(url)) is None
+
+    def test_open_state_is_cached_locally(self, fake_redis, mocker):
+        from app.services.circuit_breaker import WebhookCircuitBreaker
+
+        cb = WebhookCircuitBreaker(fake_redis, failure_threshold=1, recovery_timeout=60, open_cache_seconds=5)
+        url = "https://example.com/webhook"
+        assert cb.record_failure(url) is True
+
+        script = mocker.spy(cb, "_is_open_script")
+        assert cb.is_open(url) is True
+        assert cb.is_open(url) is True
+        script.assert_not_called()
+
+        # A success seen by this process drops the cached verdict
+        cb.record_success(url)
+        assert cb.is_open(url) is True  # still OPEN in Redis: success outside HALF_OPEN does not close
+        script.assert_called_once()
+
+
+class TestWebhookReplay:
+    """Test dead-letter listing and bulk replay of failed deliveries"""
+
+    @pytest.fixture
+    def webhook(self, db_session, test_project):
+        from app.db.models.webhook_subscription import WebhookSubscription
+
+        webhook = WebhookSubscription(project_id=test_project.id, url="https://example.com/webhook", enabled=True)
+        db_session.add(webhook)
+        db_session.commit()
+        return webhook
+
+    def _delivery(self, db_session, test_device, test_rule, webhook, **fields):
+        from app.db.models.alert import Alert
+        from app.db.models.webhook_delivery import WebhookDelivery
+
+        alert = Alert(device_id=test_device.id, rule_id=test_rule.id, triggered_at=datetime.now(timezone.utc), details={})
+        db_session.add(alert)
+        db_session.commit()
+        delivery = WebhookDelivery(
+            project_id=webhook.project_id, alert_id=alert.id, webhook_id=webhook.id,
+            **{"status": "failed", "attempts": 9, **fields}
+        )
+        db_session.add(delivery)
+        db_session.commit()
+        return delivery.id
+
+    def test_replay_requeues_in_throttled_batches(
+        self, db_session, test_device, test_rule, test_project, webhook, mocker
+    ):
+        from datetime import timedelta
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.db.repositories.webhook_replay_repo import create_replay, get_replay
+        from app.workers.tasks.webhook_delivery import replay_webhook_deliveries
+
+        failed = [self._delivery(db_session, test_device, test_rule, webhook) for _ in range(3)]
+        delivered = self._delivery(db_session, test_device, test_rule, webhook, status="success")
+        filters = {"webhook_id": None, "statuses": ["failed"], "since": None, "until": None}
+        replay_id = create_replay(db_session, test_project.id, filters, total=3).id
+
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch("app.workers.tasks.webhook_delivery.settings.WEBHOOK_REPLAY_BATCH", 2)
+        mocker.patch("app.workers.tasks.webhook_delivery.settings.WEBHOOK_REPLAY_INTERVAL_SECONDS", 30)
+        mocker.patch(
+            "app.workers.tasks.webhook_delivery.circuit_breaker.get_stats",
+            return_value={"state": "closed", "failures": 0, "opened_at": ""},
+        )
+
+        start = datetime.now(timezone.utc)
+        assert replay_webhook_deliveries(replay_id) == 3
+
+        rows = [db_session.get(WebhookDelivery, did) for did in failed]
+        for row in rows:
+            db_session.refresh(row)
+        assert {(row.status, row.attempts, row.replay_id) for row in rows} == {("pending", 0, replay_id)}
+        # The second batch is due one interval after the first
+        assert rows[0].next_attempt_at == rows[1].next_attempt_at < start + timedelta(seconds=5)
+        assert rows[2].next_attempt_at >= start + timedelta(seconds=30)
+        assert db_session.get(WebhookDelivery, delivered).status == "success"
+
+        replay = get_replay(db_session, replay_id)
+        db_session.refresh(replay)
+        assert (replay.status, replay.queued) == ("done", 3)
+
+    def test_open_circuit_holds_back_replay(self, db_session, test_device, test_rule, test_project, webhook, mocker):
+        from datetime import timedelta
+        from app.db.models.webhook_delivery import WebhookDelivery
+        from app.db.repositories.webhook_replay_repo import create_replay
+        from app.workers.tasks.webhook_delivery import replay_webhook_deliveries
+
+        delivery_id = self._delivery(db_session, test_device, test_rule, webhook)
+        filters = {"webhook_id": webhook.id, "statuses": ["failed"], "since": None, "until": None}
+        replay_id = create_replay(db_session, test_project.id, filters, total=1).id
+
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch(
+            "app.workers.tasks.webhook_delivery.circuit_breaker.get_stats",
+            return_value={"state": "open", "failures": 5, "opened_at": ""},
+        )
+
+        start = datetime.now(timezone.utc)
+        assert replay_webhook_deliveries(replay_id) == 1
+
+        row = db_session.get(WebhookDelivery, delivery_id)
+        db_session.refresh(row)
+        assert row.next_attempt_at >= start + timedelta(seconds=59)
+
+    def test_replay_api_reports_progress(
+        self, client, db_session, test_device, test_rule, test_project, test_api_key, webhook, mocker
+    ):
+        from datetime import timedelta
+
+        self._delivery(db_session, test_device, test_rule, webhook)
+        self._delivery(db_session, test_device, test_rule, webhook, status="retrying", attempts=2)
+        webhook_id = webhook.id
+        headers = {"X-API-Key": test_api_key.raw_key}
+        base = f"/projects/{test_project.id}/webhook-deliveries"
+
+        response = client.get(f"{base}/dead-letter", params={"webhook_id": webhook_id}, headers=headers)
+        assert response.status_code == 200
+        assert [d["status"] for d in response.json()] == ["failed"]
+
+        mock_delay = mocker.patch("app.services.webhook_replay_service.replay_webhook_deliveries.delay")
+        since = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+        response = client.post(
+            f"{base}/replay",
+            json={"webhook_id": webhook_id, "statuses": ["failed", "retrying"], "since": since},
+            headers=headers,
+        )
+        assert response.status_code == 202
+        replay = response.json()
+        assert (replay["status"], replay["total"], replay["queued"]) == ("running", 2, 0)
+        mock_delay.assert_called_once_with(replay["id"])
+
+        from app.workers.tasks.webhook_delivery import replay_webhook_deliveries
+
+        mocker.patch("app.workers.tasks.webhook_delivery.SessionLocal", return_value=db_session)
+        mocker.patch(
+            "app.workers.tasks.webhook_delivery.circuit_breaker.get_stats",
+            return_value={"state": "closed", "failures": 0, "opened_at": ""},
+        )
+        replay_webhook_deliveries(replay["id"])
+
+        response = client.get(f"{base}/replay/{replay['id']}", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["deliveries"] == {"pending": 2}
+        assert response.json()["status"] == "done"
+
+        # Another project's webhook cannot be selected; an empty time range is rejected
+        assert client.post(f"{base}/replay", json={"webhook_id": webhook_id + 1000}, headers=headers).status_code == 404
+        bad_range = {"since": since, "until": since}
+        assert client.post(f"{base}/replay", json=bad_range, headers=headers).status_code == 422
@@ -0,0 +1,87 @@
+# tests/test_workers/test_worker_engine.py
+from unittest.mock import MagicMock
+
+import pytest
+from celery.signals import worker_process_init
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+
+from app.db import session
+from app.db.pool import PoolWaitStats, TimedQueuePool, pool_options
+
+
+class TestPoolOptions:
+    """Test connection pool sizing per process role"""
+
+    def test_sizes_per_role(self, mocker):
+        mocker.patch("app.db.pool.settings.DB_POOL_SIZE_WORKER", 1)
+        mocker.patch("app.db.pool.settings.DB_MAX_OVERFLOW_WORKER", 0)
+
+        api, worker = pool_options("api"), pool_options("worker")
+
+        assert (api["pool_size"], api["max_overflow"]) == (20, 10)
+        assert (worker["pool_size"], worker["max_overflow"]) == (1, 0)
+        assert worker["poolclass"] is TimedQueuePool
+
+    def test_pgbouncer_mode_disables_pooling(self, mocker):
+        mocker.patch("app.db.pool.settings.DB_PGBOUNCER", True)
+
+        assert pool_options("worker") == {"poolclass": NullPool}
+        connect_args = pool_options("api", is_async=True)["connect_args"]
+        assert connect_args["statement_cache_size"] == 0
+        assert connect_args["prepared_statement_name_func"]() != connect_args["prepared_statement_name_func"]()
+
+
+class TestWorkerEngine:
+    """Test the engine a forked Celery child uses"""
+
+    @pytest.fixture
+    def restore_engine(self):
+        original = session.engine
+        yield original
+        session.engine, session.engine_role = original, "api"
+        session.SessionLocal.configure(bind=original)
+
+    def test_child_replaces_inherited_pool(self, restore_engine, mocker):
+        """The parent's connections are dropped, not closed, and sessions bind to a worker-sized pool"""
+        dispose = mocker.spy(restore_engine, "dispose")
+
+        session.configure_engine("worker")
+
+        dispose.assert_called_once_with(close=False)
+        assert session.engine is not restore_engine
+        assert session.SessionLocal.kw["bind"] is session.engine
+        assert session.engine.pool.size() == 2
+
+    def test_configured_on_worker_process_init(self, mocker):
+        configure = mocker.patch("app.workers.celery_app.configure_engine")
+        mocker.patch("app.workers.celery_app.reset_webhook_http_pool")
+
+        worker_process_init.send(sender=None)
+
+        configure.assert_called_once_with("worker")
+
+
+class TestCheckoutWait:
+    """Test instrumentation of pool checkout wait time"""
+
+    def test_records_checkouts_and_slow_waits(self, mocker):
+        stats = mocker.patch("app.db.pool.pool_wait_stats", PoolWaitStats(warn_ms=20))
+        pool = TimedQueuePool(MagicMock, pool_size=1, max_overflow=0, timeout=0.05)
+
+        held = pool.connect()
+        with pytest.raises(PoolTimeoutError):
+            pool.connect()  # waits for the held connection until the timeout
+        held.close()
+
+        snapshot = stats.snapshot()
+        assert snapshot["checkouts"] == 2
+        assert snapshot["slow"] == 1
+        assert snapshot["max_wait_ms"] >= 50
+
+    def test_admin_endpoint(self, client):
+        response = client.get("/admin/db/pool")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["role"] == "api"
+        assert set(body["checkout"]) == {"checkouts", "slow", "avg_wait_ms", "max_wait_ms"}
@@ -0,0 +1,310 @@
+# app/workers/async_delivery.py
+"""
+Asyncio webhook delivery worker.
+
+One process keeps up to WEBHOOK_ASYNC_CONCURRENCY deliveries in flight on a single
+event loop (httpx.AsyncClient, asyncpg, redis.asyncio), instead of one blocking POST
+per Celery prefork process. Used when WEBHOOK_DELIVERY_ENGINE=asyncio: producers put
+delivery IDs on the Redis due queue (app.services.delivery_queue) and any number of
+these processes consume it.
+
+Each attempt follows deliver_webhook: the claim_delivery claim, the endpoint limits,
+the circuit breaker, the same payload/signature, retries with the same backoff and
+retry limit, and the same status transitions.
+
+    python -m app.workers.async_delivery
+"""
+import asyncio
+import signal
+import time
+from datetime import datetime, timezone
+
+import httpx
+import structlog
+from redis.asyncio import Redis as AsyncRedis
+
+from app.db.async_session import dispose_async_engine, get_async_sessionmaker
+from app.db.models.webhook_delivery import WebhookDelivery
+from app.db.models.webhook_subscription import WebhookSubscription
+from app.db.repositories.webhook_delivery_repo import (
+    ClaimedDelivery,
+    claim_delivery_async,
+    mark_outcome_async,
+    release_claim_async,
+)
+from app.logging_config import configure_logging
+from app.services.circuit_breaker import AsyncWebhookCircuitBreaker, breaker_options
+from app.services.delivery_queue import AsyncDeliveryQueue
+from app.services.delivery_stats import AsyncDeliveryStats
+from app.services.endpoint_limiter import AsyncEndpointLimiter, endpoint_limits
+from app.services.http_pool import AsyncWebhookHttpPool
+from app.services.payload_cache import AsyncPayloadCache
+from app.services.webhook_dispatch import (
+    FINISHED_RESULTS,
+    MAX_RETRIES,
+    build_body,
+    build_headers,
+    classify_status,
+    retry_countdown,
+)
+from app.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+REAP_INTERVAL_SECONDS = 10.0
+
+class AsyncDeliveryWorker:
+    """Claims due deliveries from the queue and runs them as concurrent asyncio tasks."""
+
+    def __init__(
+        self,
+        queue: AsyncDeliveryQueue,
+        breaker: AsyncWebhookCircuitBreaker,
+        http_pool: AsyncWebhookHttpPool,
+        sessionmaker,
+        concurrency: int = 1000,
+        poll_interval: float = 0.2,
+        limiter: AsyncEndpointLimiter | None = None,
+        payloads: AsyncPayloadCache | None = None,
+        stats: AsyncDeliveryStats | None = None,
+    ):
+        self.queue = queue
+        self.breaker = breaker
+        self.http_pool = http_pool
+        self.sessionmaker = sessionmaker
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.limiter = limiter
+        self.payloads = payloads
+        self.stats = stats
+        self._inflight: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        """Claim and dispatch until stop(); then wait for in-flight deliveries."""
+        last_reap = 0.0
+        while not self._stopping.is_set():
+            now = time.time()
+            if now - last_reap >= REAP_INTERVAL_SECONDS:
+                reaped = await self.queue.reap(now)
+                if reaped:
+                    logger.warning("webhook_leases_reaped", count=reaped)
+                last_reap = now
+
+            claimed = await self.run_once()
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        await self.drain()
+
+    async def run_once(self) -> int:
+        """Claim as many due deliveries as there are free slots and start them."""
+        free = self.concurrency - len(self._inflight)
+        if free <= 0:
+            await asyncio.wait(self._inflight, return_when=asyncio.FIRST_COMPLETED)
+            return 0
+        ids = await self.queue.claim(free)
+        for delivery_id in ids:
+            task = asyncio.create_task(self._run_delivery(delivery_id))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        return len(ids)
+
+    async def drain(self):
+        """Wait for the deliveries started so far (tests, shutdown)."""
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def _run_delivery(self, delivery_id: int):
+        try:
+            result = await self.deliver(delivery_id)
+        except Exception:
+            # The lease stays; the reaper re-queues the delivery after it expires
+            logger.exception("webhook_delivery_crashed", delivery_id=delivery_id)
+            return
+        if result not in ("retry_scheduled", "deferred"):
+            await self.queue.ack(delivery_id)
+
+    async def _retry_or_fail(
+        self, db, delivery: ClaimedDelivery, status_code: int | None, error: str, duration_ms: int | None = None
+    ) -> str:
+        retries = delivery.attempts - 1  # retries before this attempt (Celery's request.retries)
+        if retries >= MAX_RETRIES:
+            await mark_outcome_async(
+                db, delivery.id, "failed", status_code, f"max_retries_exceeded:{error}", duration_ms=duration_ms
+            )
+            return "failed_max_retries"
+        due = time.time() + retry_countdown(retries)
+        # The row keeps the due time too, so the retry survives losing the Redis queue
+        await mark_outcome_async(
+            db, delivery.id, "retrying", status_code, error, datetime.fromtimestamp(due, tz=timezone.utc), duration_ms
+        )
+        await self.queue.retry_at(delivery.id, due)
+        return "retry_scheduled"
+
+    async def deliver(self, delivery_id: int) -> str:
+        """
+        One delivery attempt; returns the same outcome strings as deliver_webhook, with
+        the same two statements and commits (claim with context, then the outcome).
+        """
+        async with self.sessionmaker() as db:
+            delivery = await claim_delivery_async(db, delivery_id)
+            if not delivery:
+                existing = await db.get(WebhookDelivery, delivery_id)
+                if not existing:
+                    return "delivery_missing"
+                return "already_success" if existing.status == "success" else "in_progress_or_already_handled"
+
+            wh = delivery.webhook
+            if not wh or not wh.enabled:
+                await mark_outcome_async(db, delivery.id, "failed", None, "webhook_missing_or_disabled")
+                return "webhook_missing_or_disabled"
+
+            # Before admission, so an attempt that never reaches the network takes no rate token
+            if await self.breaker.is_open(wh.url):
+                logger.warning("webhook_circuit_open", delivery_id=delivery_id, webhook_id=wh.id, url=wh.url)
+                return await self._retry_or_fail(db, delivery, None, f"circuit_open:{wh.url}")
+
+            if self.limiter:
+                token = str(delivery.id)
+                admission = await self.limiter.acquire(wh.id, token, *endpoint_limits(wh))
+                if not admission.admitted:
+                    # Over the endpoint's limits: back on the due queue without an attempt
+                    due = time.time() + admission.retry_after
+                    await release_claim_async(db, [delivery.id], datetime.fromtimestamp(due, tz=timezone.utc))
+                    await self.queue.retry_at(delivery.id, due)
+                    return "deferred"
+                try:
+                    return await self._attempt(db, delivery, wh)
+                finally:
+                    await self.limiter.release(wh.id, token)
+            return await self._attempt(db, delivery, wh)
+
+    async def _attempt(self, db, delivery: ClaimedDelivery, wh: WebhookSubscription) -> str:
+        """Send a claimed delivery (the part of deliver() that holds an endpoint slot)."""
+        delivery_id = delivery.id
+        body = await self.payloads.get(delivery.alert_id, delivery.event) if self.payloads else None
+        if body is None:
+            if not delivery.alert:
+                await mark_outcome_async(db, delivery.id, "failed", None, "alert_missing")
+                return "alert_missing"
+
+            if delivery.device_id is None:
+                await mark_outcome_async(db, delivery.id, "failed", None, "device_missing")
+                return "device_missing"
+
+            if self.payloads:
+                body = (await self.payloads.render([delivery.alert], delivery.event))[delivery.alert_id]
+            else:
+                body = build_body(delivery.alert, delivery.event)
+
+        headers = build_headers(wh.secret, body)
+
+        webhook_id, attempt = wh.id, delivery.attempts  # outcome commits expire the instances
+        started = time.perf_counter()
+        try:
+            resp = await self.http_pool.client_for(wh.url).post(wh.url, content=body, headers=headers)
+        except httpx.HTTPError as e:
+            duration_ms = round((time.perf_counter() - started) * 1000)
+            await self.breaker.record_failure(wh.url)
+            result = await self._retry_or_fail(db, delivery, None, f"http_error:{type(e).__name__}", duration_ms)
+            await self._record_attempt(webhook_id, duration_ms, result, attempt)
+            return result
+
+        duration_ms = round((time.perf_counter() - started) * 1000)
+        code = resp.status_code
+        outcome = classify_status(code)
+        if outcome == "success":
+            logger.info(
+                "webhook_delivered",
+                delivery_id=delivery_id,
+                webhook_id=wh.id,
+                url=wh.url,
+                status_code=code,
+                attempt=delivery.attempts,
+                duration_ms=duration_ms,
+            )
+            await self.breaker.record_success(wh.url)
+            await mark_outcome_async(db, delivery.id, "success", code, duration_ms=duration_ms)
+            result = "success"
+        else:
+            await self.breaker.record_failure(wh.url)
+            if outcome == "retry":
+                logger.warning(
+                    "webhook_retryable_error",
+                    delivery_id=delivery_id,
+                    webhook_id=wh.id,
+                    url=wh.url,
+                    status_code=code,
+                    attempt=delivery.attempts,
+                )
+                result = await self._retry_or_fail(db, delivery, code, f"retryable_status_{code}", duration_ms)
+            else:
+                logger.error(
+                    "webhook_non_retryable_error",
+                    delivery_id=delivery_id,
+                    webhook_id=wh.id,
+                    url=wh.url,
+                    status_code=code,
+                )
+                await mark_outcome_async(
+                    db, delivery.id, "failed", code, f"non_retryable_status_{code}", duration_ms=duration_ms
+                )
+                result = "failed_non_retryable"
+
+        await self._record_attempt(webhook_id, duration_ms, result, attempt)
+        return result
+
+    async def _record_attempt(self, webhook_id: int, duration_ms: int, result: str, attempt: int):
+        if self.stats:
+            finished = [attempt] if result in FINISHED_RESULTS else []
+            await self.stats.record(webhook_id, duration_ms, result == "success", finished)
+
+
+async def main():
+    configure_logging()
+    redis_client = AsyncRedis.from_url(settings.REDIS_URL)
+    http_pool = AsyncWebhookHttpPool(
+        max_connections_per_host=settings.WEBHOOK_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry=settings.WEBHOOK_KEEPALIVE_EXPIRY_SECONDS,
+        http2=settings.WEBHOOK_HTTP2,
+        max_hosts=settings.WEBHOOK_POOL_MAX_HOSTS,
+    )
+    worker = AsyncDeliveryWorker(
+        AsyncDeliveryQueue(redis_client, lease_seconds=settings.WEBHOOK_ASYNC_LEASE_SECONDS),
+        AsyncWebhookCircuitBreaker(redis_client, **breaker_options()),
+        http_pool,
+        get_async_sessionmaker(),
+        concurrency=settings.WEBHOOK_ASYNC_CONCURRENCY,
+        poll_interval=settings.WEBHOOK_ASYNC_POLL_INTERVAL_MS / 1000.0,
+        limiter=AsyncEndpointLimiter(redis_client, defer_seconds=settings.WEBHOOK_LIMIT_DEFER_MS / 1000.0),
+        payloads=AsyncPayloadCache(redis_client, ttl_seconds=settings.WEBHOOK_PAYLOAD_TTL_SECONDS),
+        stats=AsyncDeliveryStats(
+            redis_client,
+            window_minutes=settings.WEBHOOK_STATS_WINDOW_MINUTES,
+            relative_accuracy=settings.WEBHOOK_STATS_RELATIVE_ACCURACY,
+        ),
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    logger.info("async_delivery_worker_started", concurrency=worker.concurrency)
+    try:
+        await worker.run()
+    finally:
+        await http_pool.aclose()
+        await dispose_async_engine()
+        await redis_client.aclose()
+        logger.info("async_delivery_worker_stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
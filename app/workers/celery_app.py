@@ -1,6 +1,13 @@
 # app/workers/celery_app.py
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+from app.db.pool import pool_wait_stats
+from app.db.session import configure_engine
 from app.settings import settings
+from app.services.evaluation_profiler import flush_evaluation_profiler
+from app.services.http_pool import close_webhook_http_pool, reset_webhook_http_pool
+from app.workers.queues import PRIORITY_NORMAL, PRIORITY_STEPS, route_task_queues
+from app.workers.sharding import route_device_tasks
 
 celery_app = Celery(
     "telemetry_worker",
@@ -14,6 +21,36 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Shard queues (when enabled) take precedence over the per-type queues
+    task_routes=(route_device_tasks, route_task_queues),
+    task_default_priority=PRIORITY_NORMAL,
+    broker_transport_options={
+        "queue_order_strategy": "priority",
+        "priority_steps": PRIORITY_STEPS,
+        "sep": ":",
+    },
+    beat_schedule={
+        "scan-heartbeats": {
+            "task": "app.workers.tasks.scan_heartbeats",
+            "schedule": float(settings.HEARTBEAT_SCAN_INTERVAL_SECONDS),
+        },
+        "dispatch-due-webhooks": {
+            "task": "app.workers.tasks.dispatch_due_webhooks",
+            "schedule": float(settings.WEBHOOK_RETRY_DISPATCH_INTERVAL_SECONDS),
+        },
+    },
 )
 
-celery_app.autodiscover_tasks(["app.workers.tasks"])
\ No newline at end of file
+celery_app.autodiscover_tasks(["app.workers.tasks"])
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    # Connections must not be shared with the parent: each child opens its own
+    configure_engine("worker")
+    pool_wait_stats.reset()
+    reset_webhook_http_pool()
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    flush_evaluation_profiler()
+    close_webhook_http_pool()
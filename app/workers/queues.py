@@ -0,0 +1,45 @@
+# app/workers/queues.py
+"""
+Celery queues and message priorities per task type.
+
+Each kind of work has its own queue and worker pool (see compose.yml), so a backlog of
+slow webhook deliveries cannot delay ingestion or rule evaluation:
+
+    ingest             ingest_events                          (+ the default "celery" queue)
+    evaluation         evaluate_rules_for_device, scan_heartbeats
+    webhooks.fanout    enqueue_webhooks_for_alert(s), dispatch_due_webhooks, replay_webhook_deliveries
+    webhooks.delivery  deliver_webhook, deliver_webhook_batch
+
+With EVALUATION_SHARD_COUNT > 0, ingest and evaluation tasks go to their shard queue
+instead (app.workers.sharding); the shard router runs first.
+
+Within a queue, messages are consumed by priority. With the Redis broker a lower number
+is served first; priorities are grouped into the broker's PRIORITY_STEPS.
+"""
+
+INGEST_QUEUE = "ingest"
+EVALUATION_QUEUE = "evaluation"
+WEBHOOK_FANOUT_QUEUE = "webhooks.fanout"
+WEBHOOK_DELIVERY_QUEUE = "webhooks.delivery"
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 6  # retries and bulk replays: behind first attempts of new alerts
+PRIORITY_STEPS = [0, 3, 6, 9]
+
+TASK_QUEUES = {
+    "app.workers.tasks.ingest_events": INGEST_QUEUE,
+    "app.workers.tasks.evaluate_rules_for_device": EVALUATION_QUEUE,
+    "app.workers.tasks.scan_heartbeats": EVALUATION_QUEUE,
+    "app.workers.tasks.enqueue_webhooks_for_alert": WEBHOOK_FANOUT_QUEUE,
+    "app.workers.tasks.enqueue_webhooks_for_alerts": WEBHOOK_FANOUT_QUEUE,
+    "app.workers.tasks.dispatch_due_webhooks": WEBHOOK_FANOUT_QUEUE,
+    "app.workers.tasks.replay_webhook_deliveries": WEBHOOK_FANOUT_QUEUE,
+    "app.workers.tasks.deliver_webhook": WEBHOOK_DELIVERY_QUEUE,
+    "app.workers.tasks.deliver_webhook_batch": WEBHOOK_DELIVERY_QUEUE,
+}
+
+def route_task_queues(name, args, kwargs, options, task=None, **kw):
+    """Celery task router: send each task type to its queue (tasks not listed keep the default queue)."""
+    queue = TASK_QUEUES.get(name)
+    return {"queue": queue} if queue else None
@@ -0,0 +1,61 @@
+# app/workers/sharding.py
+"""
+Device-affinity routing of ingest and evaluation tasks.
+
+With EVALUATION_SHARD_COUNT = N > 0, every task that carries a device_id is routed
+to queue "shard.<i>" where i = jump_hash(device_id, N). A worker consuming a fixed
+set of shard queues sees every task of the devices in those shards; with
+--concurrency=1 (and prefetch 1) they also run in enqueue order.
+
+Jump consistent hash moves only the devices that must move when N changes
+(about 1/N of them when adding one shard), see the rebalance procedure in the README.
+
+    python -m app.workers.sharding 3 16   # print the -Q argument for each of 3 workers over 16 shards
+"""
+import sys
+
+from app.settings import settings
+
+SHARD_QUEUE_PREFIX = "shard."
+
+# Tasks whose first argument is a device_id
+DEVICE_TASKS = {
+    "app.workers.tasks.ingest_events",
+    "app.workers.tasks.evaluate_rules_for_device",
+}
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Lamping & Veach jump consistent hash: maps `key` to [0, buckets)."""
+    b, j = -1, 0
+    key &= 0xFFFFFFFFFFFFFFFF
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+def shard_for_device(device_id: int, shard_count: int | None = None) -> int:
+    return jump_hash(device_id, shard_count or settings.EVALUATION_SHARD_COUNT)
+
+def shard_queue(shard: int) -> str:
+    return f"{SHARD_QUEUE_PREFIX}{shard}"
+
+def shard_queues_for_worker(worker_index: int, worker_count: int, shard_count: int | None = None) -> list[str]:
+    """Shard queues owned by worker `worker_index` of `worker_count` (round-robin)."""
+    shard_count = shard_count or settings.EVALUATION_SHARD_COUNT
+    return [shard_queue(s) for s in range(worker_index, shard_count, worker_count)]
+
+def route_device_tasks(name, args, kwargs, options, task=None, **kw):
+    """Celery task router: send device tasks to their shard queue (no-op when sharding is off)."""
+    if settings.EVALUATION_SHARD_COUNT <= 0 or name not in DEVICE_TASKS:
+        return None
+    device_id = args[0] if args else (kwargs or {}).get("device_id")
+    if device_id is None:
+        return None
+    return {"queue": shard_queue(shard_for_device(int(device_id)))}
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    shards = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    for i in range(workers):
+        print(f"worker {i}: -Q {','.join(shard_queues_for_worker(i, workers, shards))}")
@@ -1,4 +1,5 @@
 from .ping import ping # noqa F401
 from .ingest import ingest_events # noqa F401
 from .evaluate_rules import evaluate_rules_for_device_task # noqa F401
-from .webhook_delivery import enqueue_webhooks_for_alert, deliver_webhook # noqa F401
\ No newline at end of file
+from .webhook_delivery import enqueue_webhooks_for_alert, enqueue_webhooks_for_alerts, deliver_webhook, deliver_webhook_batch, dispatch_due_webhooks, replay_webhook_deliveries # noqa F401
+from .heartbeats import scan_heartbeats_task # noqa F401
\ No newline at end of file
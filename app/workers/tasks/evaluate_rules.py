@@ -1,18 +1,38 @@
 # app/workers/tasks/evaluate_rules.py
 from app.workers.celery_app import celery_app
 from app.db.session import SessionLocal
-from app.services.evaluation_service import evaluate_rules_for_device
-from app.workers.tasks.webhook_delivery import enqueue_webhooks_for_alert
+from app.services.evaluation_service import evaluate_device
+from app.services.evaluation_scheduler import get_evaluation_debouncer
+from app.workers.tasks.webhook_delivery import enqueue_webhooks_for_alerts
+
+@celery_app.task(name="app.workers.tasks.evaluate_rules_for_device", ignore_result=True, acks_late=True)
+def evaluate_rules_for_device_task(device_id: int, debounced: bool = False) -> list[int]:
+    """
+    Evaluate rules for a specific device and enqueue webhooks for any triggered
+    or resolved alerts. Returns the created alert IDs.
+    With debounced=True the run is coordinated by the EvaluationDebouncer: it is skipped
+    when nothing was ingested since the previous run, and always schedules a trailing run.
+    """
+    debouncer = get_evaluation_debouncer() if debounced else None
+    if debouncer and not debouncer.begin(device_id):
+        return []
 
-@celery_app.task(name="app.workers.tasks.evaluate_rules_for_device")
-def evaluate_rules_for_device_task(device_id: int) -> list[int]:
-    """Evaluate rules for a specific device and enqueue webhooks for any triggered alerts."""
     db = SessionLocal()
+    failed = True
     try:
-        alert_ids = evaluate_rules_for_device(db, device_id=device_id)
-        for aid in alert_ids:
-            enqueue_webhooks_for_alert.delay(aid)
-        return alert_ids
+        outcome = evaluate_device(db, device_id=device_id)
+        if outcome.created:
+            enqueue_webhooks_for_alerts.delay(outcome.created)
+        if outcome.resolved:
+            enqueue_webhooks_for_alerts.delay(outcome.resolved, "alert.resolved")
+        failed = False
+        return outcome.created
     finally:
         db.close()
-
+        if debouncer:
+            debouncer.finish(device_id, rerun=failed)
+            evaluate_rules_for_device_task.apply_async(
+                (device_id,),
+                {"debounced": True},
+                countdown=debouncer.interval_seconds,
+            )
@@ -0,0 +1,25 @@
+# app/workers/tasks/heartbeats.py
+from app.workers.celery_app import celery_app
+from app.db.session import SessionLocal
+from app.services.evaluation_service import evaluate_missed_heartbeats
+from app.settings import settings
+from app.workers.tasks.webhook_delivery import enqueue_webhooks_for_alerts
+
+@celery_app.task(name="app.workers.tasks.scan_heartbeats", ignore_result=True, acks_late=True)
+def scan_heartbeats_task() -> list[int]:
+    """
+    Periodic dead-man scan, scheduled by celery beat every HEARTBEAT_SCAN_INTERVAL_SECONDS.
+    Creates alerts for overdue heartbeat deadlines and enqueues their webhooks.
+    """
+    db = SessionLocal()
+    try:
+        alert_ids = evaluate_missed_heartbeats(
+            db,
+            batch_size=settings.HEARTBEAT_SCAN_BATCH,
+            max_batches=settings.HEARTBEAT_SCAN_MAX_BATCHES,
+        )
+        if alert_ids:
+            enqueue_webhooks_for_alerts.delay(alert_ids)
+        return alert_ids
+    finally:
+        db.close()
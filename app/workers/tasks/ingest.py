@@ -7,12 +7,36 @@ from app.workers.celery_app import celery_app
 from app.db.session import SessionLocal
 from app.db.models.telemetry_event import TelemetryEvent
 from app.workers.tasks.evaluate_rules import evaluate_rules_for_device_task
+from app.workers.tasks.webhook_delivery import enqueue_webhooks_for_alerts
+from app.services.evaluation_scheduler import get_evaluation_debouncer
+from app.services.evaluation_service import WindowEvent, evaluate_device, touch_heartbeats
+from app.settings import settings
 
 import structlog
 
 logger = structlog.get_logger(__name__)
 
-@celery_app.task(name="app.workers.tasks.ingest_events")
+def _evaluate_inline(db: Session, device_id: int, batch: list[WindowEvent]) -> None:
+    """
+    Fused ingest+evaluate: evaluate rules right after commit using the in-memory batch,
+    so no evaluation task is queued. Falls back to the queued task if evaluation fails,
+    since the events are already committed.
+    """
+    try:
+        outcome = evaluate_device(db, device_id=device_id, recent_events=batch)
+    except Exception:
+        logger.exception("inline_evaluation_failed", device_id=device_id)
+        db.rollback()
+        evaluate_rules_for_device_task.delay(device_id)
+        return
+
+    if outcome.created:
+        enqueue_webhooks_for_alerts.delay(outcome.created)
+    if outcome.resolved:
+        enqueue_webhooks_for_alerts.delay(outcome.resolved, "alert.resolved")
+
+# Not acks_late: the insert is not idempotent, so a redelivered batch would be stored twice
+@celery_app.task(name="app.workers.tasks.ingest_events", ignore_result=True)
 def ingest_events(device_id: int, events: list[dict]):
     """
     Ingest telemetry events for a specific device. Each event should be a dict with at least a "ts" key (ISO 8601 timestamp) and optionally a "data" key (dict of event payload).
@@ -53,16 +77,42 @@ def ingest_events(device_id: int, events: list[dict]):
             logger.warning("no_valid_events", device_id=device_id)
             return 0
 
-        db.execute(insert(TelemetryEvent), params)
-        db.commit()
+        if settings.INGEST_INLINE_EVALUATION:
+            # Keep the generated ids so the batch can be evaluated from memory
+            rows = db.execute(
+                insert(TelemetryEvent).returning(
+                    TelemetryEvent.id, TelemetryEvent.ts, sort_by_parameter_order=True
+                ),
+                params,
+            ).all()
+            db.commit()
+            batch = [WindowEvent(row.id, row.ts, p["payload"]) for row, p in zip(rows, params, strict=True)]
+        else:
+            db.execute(insert(TelemetryEvent), params)
+            db.commit()
         
         logger.info(
             "events_ingested",
             device_id=device_id,
             event_count=len(events)
         )
+
+        try:
+            touch_heartbeats(db, device_id)
+        except Exception:
+            # Events are committed; a missed bump at worst delays the next deadline
+            logger.exception("heartbeat_touch_failed", device_id=device_id)
         
-        evaluate_rules_for_device_task.delay(device_id)
+        if settings.INGEST_INLINE_EVALUATION:
+            _evaluate_inline(db, device_id, batch)
+        elif settings.EVALUATION_DEBOUNCE_MS > 0:
+            # Coalesce evaluations: only enqueue if none is queued/running for this device
+            if get_evaluation_debouncer().request(device_id):
+                evaluate_rules_for_device_task.delay(device_id, debounced=True)
+            else:
+                logger.debug("evaluation_coalesced", device_id=device_id)
+        else:
+            evaluate_rules_for_device_task.delay(device_id)
         return len(params)
         
     except Exception as e:
@@ -1,118 +1,426 @@
 # app/workers/tasks/webhook_delivery.py
-import json
-import hmac
+import itertools
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 import structlog
-import hashlib
-from datetime import datetime, timezone
-import random
 import httpx
+from sqlalchemy import select
 from redis import Redis
-from celery.exceptions import MaxRetriesExceededError
+from celery import group
 
 from app.workers.celery_app import celery_app
+from app.workers.queues import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
 from app.db.session import SessionLocal
 from app.db.models.alert import Alert
-from app.db.models.device import Device
-from app.services.circuit_breaker import WebhookCircuitBreaker
+from app.db.models.webhook_delivery import WebhookDelivery
+from app.services.circuit_breaker import WebhookCircuitBreaker, breaker_options
+from app.services.delivery_queue import get_delivery_queue
+from app.services.delivery_stats import get_delivery_stats
+from app.services.endpoint_limiter import endpoint_limits, get_endpoint_limiter
+from app.services.http_pool import get_webhook_http_pool
+from app.services.payload_cache import get_payload_cache
+from app.services.webhook_batcher import FLUSH_LATER, FLUSH_NOW, get_webhook_batcher
+from app.services.webhook_dispatch import (
+    FINISHED_RESULTS,
+    MAX_RETRIES,
+    build_batch_body,
+    build_headers,
+    classify_status,
+    retry_countdown as _countdown,
+)
 from app.settings import settings
-from app.db.repositories.webhook_repo import list_webhooks, get_webhook_by_id
+from app.db.repositories.webhook_repo import list_webhook_targets, list_webhooks, get_webhook_by_id
+from app.db.repositories.webhook_replay_repo import get_replay, add_queued, finish_replay
 from app.db.repositories.webhook_delivery_repo import (
-    ensure_delivery_row,
+    ensure_delivery_rows,
     get_delivery_by_id,
-    try_mark_sending,
+    claim_delivery,
+    release_claim,
+    try_mark_sending_many,
+    claim_due_deliveries,
+    defer_deliveries,
     mark_success,
     mark_failed,
     mark_retrying,
+    mark_outcome_many,
+    next_replay_batch,
+    requeue_deliveries,
 )
 
 # Global Redis client and circuit breaker
 redis_client = Redis.from_url(settings.REDIS_URL)
-circuit_breaker = WebhookCircuitBreaker(redis_client)
+circuit_breaker = WebhookCircuitBreaker(redis_client, **breaker_options())
 logger = structlog.get_logger(__name__)
 
-def _sign(secret: str, timestamp: str, body: str) -> str:
-    """Generate HMAC SHA256 signature for webhook payload."""
-    msg = f"{timestamp}.{body}".encode("utf-8")
-    return hmac.new(secret.encode("utf-8"), msg, hashlib.sha256).hexdigest()
-
-def _countdown(retries: int) -> int:
-    """Calculate exponential backoff delay with jitter for retries."""
-    base = 5
-    cap = 60 * 30
-    delay = min(cap, base * (2 ** retries))
-    jitter = random.randint(0, min(30, delay))
-    return delay + jitter
-
-@celery_app.task(name="app.workers.tasks.enqueue_webhooks_for_alert")
-def enqueue_webhooks_for_alert(alert_id: int) -> int:
-    """Enqueue webhook deliveries for all relevant webhooks for a specific alert."""
+@celery_app.task(
+    name="app.workers.tasks.enqueue_webhooks_for_alert", ignore_result=True, acks_late=True, priority=PRIORITY_HIGH
+)
+def enqueue_webhooks_for_alert(alert_id: int, event: str = "alert.triggered") -> int:
+    """
+    Enqueue webhook deliveries for all relevant webhooks for a specific alert.
+    `event` is "alert.triggered" for a new (or newly OPEN) alert and "alert.resolved"
+    when a stateful alert resolves; each event gets its own delivery row.
+    """
+    return _enqueue_webhooks([alert_id], event)
+
+@celery_app.task(
+    name="app.workers.tasks.enqueue_webhooks_for_alerts", ignore_result=True, acks_late=True, priority=PRIORITY_HIGH
+)
+def enqueue_webhooks_for_alerts(alert_ids: list[int], event: str = "alert.triggered") -> int:
+    """
+    Fan out many alerts of one event in one call: one query for their webhooks, one
+    multi-row upsert for the delivery rows and one group publish for the tasks.
+    """
+    return _enqueue_webhooks(alert_ids, event)
+
+def _enqueue_webhooks(alert_ids: list[int], event: str) -> int:
+    """
+    Create the delivery rows and hand them to workers; returns the number of deliveries.
+    Rows of batched subscriptions are buffered for deliver_webhook_batch.
+    """
+    if not alert_ids:
+        return 0
     db = SessionLocal()
     try:
-        alert = db.get(Alert, alert_id)
-        if not alert:
+        targets = list_webhook_targets(db, alert_ids)
+        if not targets:
             return 0
 
-        device = db.get(Device, alert.device_id)
-        if not device:
-            return 0
-
-        webhooks = list_webhooks(db, project_id=device.project_id, enabled_only=True)
-        if not webhooks:
-            return 0
+        ids = ensure_delivery_rows(
+            db, [(project_id, alert_id, wh.id) for alert_id, project_id, wh in targets], event=event
+        )
+        db.commit()
 
         delivery_ids: list[int] = []
-        for wh in webhooks:
-            d = ensure_delivery_row(
-                db,
-                project_id=device.project_id,
-                alert_id=alert_id,
-                webhook_id=wh.id,
-            )
-            delivery_ids.append(d.id)
+        rendered: set[int] = set()  # alerts delivered one per request
+        batched: dict[int, tuple] = {}  # webhook_id -> (webhook, delivery IDs)
+        for alert_id, _, wh in targets:
+            did = ids[(alert_id, wh.id)]
+            if wh.batch_max_items:
+                batched.setdefault(wh.id, (wh, []))[1].append(did)
+            else:
+                delivery_ids.append(did)
+                rendered.add(alert_id)
 
-        for did in delivery_ids:
-            deliver_webhook.delay(did)
+        if rendered:
+            # Every attempt to every subscriber sends this body; only the signature differs
+            alerts = db.execute(select(Alert).where(Alert.id.in_(rendered))).scalars().all()
+            get_payload_cache().render(alerts, event)
 
-        return len(delivery_ids)
+        for wh, dids in batched.values():
+            _buffer_for_batch(wh, dids)
+        _dispatch_deliveries(delivery_ids)
+
+        return len(ids)
     finally:
         db.close()
 
-@celery_app.task(bind=True, name="app.workers.tasks.deliver_webhook", max_retries=8)
-def deliver_webhook(self, delivery_id: int) -> str:
-    """Deliver a single webhook for a specific delivery ID. Handles retries with exponential backoff and circuit breaker logic."""
+def _dispatch_deliveries(delivery_ids: list[int], priority: int = PRIORITY_NORMAL):
+    """
+    Start attempts of unbatched deliveries: deliver_webhook tasks published as one group,
+    or with WEBHOOK_DELIVERY_ENGINE=asyncio the asyncio delivery worker's queue.
+    Retries are published with a lower priority than first attempts.
+    """
+    if settings.WEBHOOK_DELIVERY_ENGINE == "asyncio":
+        get_delivery_queue().schedule(delivery_ids)
+    elif delivery_ids:
+        group([deliver_webhook.s(did) for did in delivery_ids]).apply_async(priority=priority)
+
+def _next_attempt_at(retries: int) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=_countdown(retries))
+
+def _elapsed_ms(started: float) -> int:
+    return round((time.perf_counter() - started) * 1000)
+
+def _record_attempt(webhook_id: int, duration_ms: int, result: str, attempts: list[int]):
+    """Add an HTTP attempt to the subscription's rolling stats; `attempts` of the deliveries it carried."""
+    finished = attempts if result in FINISHED_RESULTS else []
+    get_delivery_stats().record(webhook_id, duration_ms, result == "success", finished)
+
+def _admit(db, wh, delivery_ids: list[int], token: str, claimed: bool = False, **defer) -> bool:
+    """
+    Take an in-flight slot and a rate token of the subscription's endpoint. When it is
+    over its limits the deliveries are deferred to the retry dispatcher instead of
+    holding this worker, and False is returned; `claimed` deliveries have their claim
+    released too.
+    """
+    webhook_id = wh.id  # the deferral's commit expires wh
+    admission = get_endpoint_limiter().acquire(webhook_id, token, *endpoint_limits(wh))
+    if admission.admitted:
+        return True
+    next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=admission.retry_after)
+    if claimed:
+        release_claim(db, delivery_ids, next_attempt_at, **defer)
+    else:
+        defer_deliveries(db, delivery_ids, next_attempt_at, **defer)
     logger.info(
-        "webhook_delivery_started",
-        delivery_id=delivery_id,
-        attempt=self.request.retries + 1
+        "webhook_delivery_deferred",
+        webhook_id=webhook_id,
+        deliveries=len(delivery_ids),
+        retry_after=admission.retry_after,
     )
+    return False
 
+@celery_app.task(name="app.workers.tasks.dispatch_due_webhooks", ignore_result=True, acks_late=True)
+def dispatch_due_webhooks() -> int:
+    """
+    Retry scheduler, run by celery beat every WEBHOOK_RETRY_DISPATCH_INTERVAL_SECONDS.
+    Retries are not Celery countdown tasks held in worker memory: the delivery row keeps
+    its next_attempt_at and this task sends due deliveries in batches of
+    WEBHOOK_RETRY_DISPATCH_BATCH. Batched deliveries are re-sent together under their
+    batch_id. Returns the number of deliveries dispatched.
+    """
+    lease = timedelta(seconds=settings.WEBHOOK_RETRY_DISPATCH_LEASE_SECONDS)
     db = SessionLocal()
+    dispatched = 0
     try:
-        delivery = get_delivery_by_id(db, delivery_id)
-        if not delivery:
-            return "delivery_missing"
+        for _ in range(settings.WEBHOOK_RETRY_DISPATCH_MAX_BATCHES):
+            due = claim_due_deliveries(db, settings.WEBHOOK_RETRY_DISPATCH_BATCH, lease)
+            single: list[int] = []
+            batches: dict[tuple, list[int]] = {}  # (webhook_id, batch_id) -> delivery IDs
+            for delivery_id, webhook_id, batch_id in due:
+                if batch_id:
+                    batches.setdefault((webhook_id, batch_id), []).append(delivery_id)
+                else:
+                    single.append(delivery_id)
 
-        if delivery.status == "success":
-            return "already_success"
+            _dispatch_deliveries(single, priority=PRIORITY_LOW)
+            for (webhook_id, batch_id), delivery_ids in batches.items():
+                deliver_webhook_batch.apply_async((webhook_id, delivery_ids, batch_id), priority=PRIORITY_LOW)
 
-        if not try_mark_sending(db, delivery.id):
+            dispatched += len(due)
+            if len(due) < settings.WEBHOOK_RETRY_DISPATCH_BATCH:
+                break
+        if dispatched:
+            logger.info("webhook_retries_dispatched", count=dispatched)
+        return dispatched
+    finally:
+        db.close()
+
+@celery_app.task(
+    name="app.workers.tasks.replay_webhook_deliveries", ignore_result=True, acks_late=True, priority=PRIORITY_LOW
+)
+def replay_webhook_deliveries(replay_id: str) -> int:
+    """
+    Bulk replay: re-queue the deliveries selected by a WebhookReplay with the retry
+    dispatcher, in batches of WEBHOOK_REPLAY_BATCH whose due times are
+    WEBHOOK_REPLAY_INTERVAL_SECONDS apart, so a large backlog drains at a bounded pace.
+    Each attempt still goes through the endpoint limits and the circuit breaker; deliveries
+    to a subscription whose circuit is OPEN are held back until it may be probed again.
+    Returns the number of deliveries re-queued.
+    """
+    db = SessionLocal()
+    try:
+        replay = get_replay(db, replay_id)
+        if not replay or replay.status != "running":
+            return 0
+        filters = dict(replay.filters)
+        statuses = filters.pop("statuses")
+        for key in ("since", "until"):
+            if filters.get(key):
+                filters[key] = datetime.fromisoformat(filters[key])
+
+        start = datetime.now(timezone.utc)
+        interval = timedelta(seconds=settings.WEBHOOK_REPLAY_INTERVAL_SECONDS)
+        recovery = start + timedelta(seconds=circuit_breaker.recovery_timeout)
+        urls = {wh.id: wh.url for wh in list_webhooks(db, replay.project_id)}
+        circuit_open: dict[int, bool] = {}  # webhook_id -> OPEN at the start of the replay
+
+        queued = 0
+        after_id = 0
+        for batch in itertools.count():
+            rows = next_replay_batch(
+                db, replay.project_id, statuses, after_id, settings.WEBHOOK_REPLAY_BATCH, **filters
+            )
+            if not rows:
+                break
+            due_at = start + batch * interval
+            by_due: dict[datetime, list[int]] = {}
+            for delivery_id, webhook_id in rows:
+                if webhook_id not in circuit_open:
+                    # get_stats only reads: is_open would take a HALF_OPEN probe slot
+                    url = urls.get(webhook_id)
+                    circuit_open[webhook_id] = bool(url) and circuit_breaker.get_stats(url)["state"] == "open"
+                at = max(due_at, recovery) if circuit_open[webhook_id] else due_at
+                by_due.setdefault(at, []).append(delivery_id)
+
+            count = sum(
+                requeue_deliveries(db, delivery_ids, statuses, replay_id, at) for at, delivery_ids in by_due.items()
+            )
+            add_queued(db, replay_id, count)
+            db.commit()
+            queued += count
+            after_id = rows[-1][0]
+
+        finish_replay(db, replay_id)
+        logger.info("webhook_replay_queued", replay_id=replay_id, count=queued)
+        return queued
+    finally:
+        db.close()
+
+def _buffer_for_batch(wh, delivery_ids: list[int]):
+    """Add deliveries to the subscription's batch; schedule a flush when full or when a new batch starts."""
+    flush = get_webhook_batcher().add(wh.id, delivery_ids, wh.batch_max_items, wh.batch_max_wait_ms)
+    if flush == FLUSH_NOW:
+        deliver_webhook_batch.delay(wh.id)
+    elif flush == FLUSH_LATER:
+        deliver_webhook_batch.apply_async((wh.id,), countdown=wh.batch_max_wait_ms / 1000.0)
+
+@celery_app.task(name="app.workers.tasks.deliver_webhook_batch", ignore_result=True, acks_late=True)
+def deliver_webhook_batch(webhook_id: int, delivery_ids: list[int] | None = None, batch_id: str | None = None) -> str:
+    """
+    Deliver a batch of alerts to a batched subscription in one signed POST.
+    Without delivery_ids, takes the next batch from the subscription's buffer; the retry
+    dispatcher passes the batch's delivery IDs. The outcome is recorded on every delivery
+    row in the batch, and each row keeps the batch_id of the POST that carried it.
+    """
+    db = SessionLocal()
+    held = None  # (webhook_id, token) of the endpoint slot taken for this POST
+    try:
+        wh = get_webhook_by_id(db, webhook_id)
+        if delivery_ids is None:
+            max_items = (wh.batch_max_items if wh else None) or 100
+            wait_ms = wh.batch_max_wait_ms if wh else 1000
+            delivery_ids, remaining = get_webhook_batcher().pop(webhook_id, max_items, wait_ms)
+            if remaining >= max_items:
+                deliver_webhook_batch.delay(webhook_id)
+            elif remaining:
+                deliver_webhook_batch.apply_async((webhook_id,), countdown=wait_ms / 1000.0)
+            if not delivery_ids:
+                return "empty"
+
+        batch_id = batch_id or str(uuid.uuid4())
+        # Checked before admission, so a POST that is not sent takes no rate token
+        circuit_open = bool(wh and wh.enabled) and circuit_breaker.is_open(wh.url)
+        if wh and wh.enabled and not circuit_open:
+            # A deferred batch keeps its batch_id, so the dispatcher re-sends it as one POST
+            if not _admit(db, wh, delivery_ids, batch_id, batch_id=batch_id):
+                return "deferred"
+            held = (wh.id, batch_id)
+
+        claimed = try_mark_sending_many(db, delivery_ids, batch_id)
+        if not claimed:
             return "in_progress_or_already_handled"
 
-        alert = db.get(Alert, delivery.alert_id)
-        if not alert:
-            mark_failed(db, delivery.id, None, "alert_missing")
+        if not wh or not wh.enabled:
+            mark_outcome_many(db, claimed, "failed", None, "webhook_missing_or_disabled")
+            return "webhook_missing_or_disabled"
+
+        rows = db.execute(
+            select(WebhookDelivery, Alert)
+            .join(Alert, Alert.id == WebhookDelivery.alert_id)
+            .where(WebhookDelivery.id.in_(claimed))
+            .order_by(WebhookDelivery.id)
+        ).all()
+        missing = set(claimed) - {delivery.id for delivery, _ in rows}
+        if missing:
+            mark_outcome_many(db, list(missing), "failed", None, "alert_missing")
+        if not rows:
             return "alert_missing"
+        claimed = [delivery.id for delivery, _ in rows]
+        attempt = max(delivery.attempts for delivery, _ in rows)
 
-        device = db.get(Device, alert.device_id)
-        if not device:
-            mark_failed(db, delivery.id, None, "device_missing")
-            return "device_missing"
+        def retry_or_fail(code: int | None, error: str, duration_ms: int | None = None) -> str:
+            retries = attempt - 1
+            if retries >= MAX_RETRIES:
+                mark_outcome_many(
+                    db, claimed, "failed", code, f"max_retries_exceeded:{error}", duration_ms=duration_ms
+                )
+                return "failed_max_retries"
+            mark_outcome_many(db, claimed, "retrying", code, error, _next_attempt_at(retries), duration_ms)
+            return "retry_scheduled"
 
-        wh = get_webhook_by_id(db, delivery.webhook_id)
+        if circuit_open:
+            logger.warning("webhook_circuit_open", webhook_id=wh.id, batch_id=batch_id, url=wh.url)
+            return retry_or_fail(None, f"circuit_open:{wh.url}")
+
+        body = build_batch_body(batch_id, rows)
+        headers = build_headers(wh.secret, body)
+        started = time.perf_counter()
+        try:
+            resp = get_webhook_http_pool().client_for(wh.url).post(wh.url, content=body, headers=headers)
+        except httpx.HTTPError as e:
+            duration_ms = _elapsed_ms(started)
+            circuit_breaker.record_failure(wh.url)
+            result = retry_or_fail(None, f"http_error:{type(e).__name__}", duration_ms)
+            _record_attempt(webhook_id, duration_ms, result, [attempt] * len(claimed))
+            return result
+
+        duration_ms = _elapsed_ms(started)
+        code = resp.status_code
+        outcome = classify_status(code)
+        logger.info(
+            "webhook_batch_delivered" if outcome == "success" else "webhook_batch_error",
+            webhook_id=wh.id,
+            batch_id=batch_id,
+            items=len(claimed),
+            status_code=code,
+            attempt=attempt,
+            duration_ms=duration_ms,
+        )
+        if outcome == "success":
+            circuit_breaker.record_success(wh.url)
+            mark_outcome_many(db, claimed, "success", code, duration_ms=duration_ms)
+            result = "success"
+        else:
+            circuit_breaker.record_failure(wh.url)
+            if outcome == "retry":
+                result = retry_or_fail(code, f"retryable_status_{code}", duration_ms)
+            else:
+                mark_outcome_many(db, claimed, "failed", code, f"non_retryable_status_{code}", duration_ms=duration_ms)
+                result = "failed_non_retryable"
+        _record_attempt(webhook_id, duration_ms, result, [attempt] * len(claimed))
+        return result
+    finally:
+        if held:
+            get_endpoint_limiter().release(*held)
+        db.close()
+
+def _unclaimable(db, delivery_id: int) -> str:
+    """Why a delivery could not be claimed (only read when the claim fails)."""
+    delivery = get_delivery_by_id(db, delivery_id)
+    if not delivery:
+        return "delivery_missing"
+    if delivery.status == "success":
+        return "already_success"
+    return "in_progress_or_already_handled"
+
+def _retry_or_fail(db, delivery, status_code: int | None, error: str, duration_ms: int | None = None) -> str:
+    """Schedule the next attempt with the retry dispatcher, or fail after MAX_RETRIES retries."""
+    retries = delivery.attempts - 1  # retries before this attempt
+    if retries >= MAX_RETRIES:
+        mark_failed(db, delivery.id, status_code, f"max_retries_exceeded:{error}", duration_ms)
+        return "failed_max_retries"
+    mark_retrying(db, delivery.id, status_code, error, _next_attempt_at(retries), duration_ms)
+    return "retry_scheduled"
+
+@celery_app.task(name="app.workers.tasks.deliver_webhook", ignore_result=True, acks_late=True)
+def deliver_webhook(delivery_id: int) -> str:
+    """
+    Deliver a single webhook for a specific delivery ID. Handles circuit breaker logic;
+    retries are scheduled with exponential backoff on the delivery row and sent by
+    dispatch_due_webhooks.
+
+    An attempt runs two statements, each committed on its own: the claim, which also
+    loads the webhook, alert and device, and the single statement recording the outcome
+    (or releasing the claim when the endpoint is over its limits).
+    """
+    logger.info("webhook_delivery_started", delivery_id=delivery_id)
+
+    db = SessionLocal()
+    held = None  # (webhook_id, token) of the endpoint slot taken for this attempt
+    try:
+        delivery = claim_delivery(db, delivery_id)
+        if not delivery:
+            return _unclaimable(db, delivery_id)
+
+        wh = delivery.webhook
         if not wh or not wh.enabled:
             mark_failed(db, delivery.id, None, "webhook_missing_or_disabled")
             return "webhook_missing_or_disabled"
 
+        # Before admission, so an attempt that never reaches the network takes no rate token
         if circuit_breaker.is_open(wh.url):
             logger.warning(
                 "webhook_circuit_open",
@@ -120,92 +428,88 @@ def deliver_webhook(self, delivery_id: int) -> str:
                 webhook_id=wh.id,
                 url=wh.url
             )
-            mark_retrying(db, delivery.id, None, f"circuit_open:{wh.url}")
-            try:
-                raise self.retry(countdown=_countdown(self.request.retries))
-            except MaxRetriesExceededError:
-                mark_failed(db, delivery.id, None, "max_retries_exceeded:circuit_open")
-                return "failed_max_retries"
+            return _retry_or_fail(db, delivery, None, f"circuit_open:{wh.url}")
 
-        payload = {
-            "alert_id": alert.id,
-            "device_id": alert.device_id,
-            "rule_id": alert.rule_id,
-            "triggered_at": alert.triggered_at.isoformat(),
-            "details": alert.details,
-        }
-        body = json.dumps(payload, separators=(",", ":"), sort_keys=True)
-        ts = datetime.now(timezone.utc).isoformat()
+        if not _admit(db, wh, [delivery.id], str(delivery.id), claimed=True):
+            return "deferred"
+        held = (wh.id, str(delivery.id))
 
-        headers = {"Content-Type": "application/json", "X-Telemetry-Timestamp": ts}
-        if wh.secret:
-            headers["X-Telemetry-Signature"] = _sign(wh.secret, ts, body)
+        body = get_payload_cache().get(delivery.alert_id, delivery.event)
+        if body is None:
+            # Not rendered at enqueue, or expired: render it from the claimed alert
+            if not delivery.alert:
+                mark_failed(db, delivery.id, None, "alert_missing")
+                return "alert_missing"
 
-        timeout = httpx.Timeout(connect=2.0, read=5.0, write=5.0, pool=5.0)
+            if delivery.device_id is None:
+                mark_failed(db, delivery.id, None, "device_missing")
+                return "device_missing"
 
-        try:
-            with httpx.Client(timeout=timeout) as client:
-                resp = client.post(wh.url, content=body, headers=headers)
-
-            code = resp.status_code
-            retryable = (code == 429) or (code == 408) or (code >= 500)
-            
-            if code >= 200 and code < 300:
-                logger.info(
-                    "webhook_delivered",
-                    delivery_id=delivery_id,
-                    webhook_id=wh.id,
-                    url=wh.url,
-                    status_code=code,
-                    attempt=self.request.retries + 1
-                )
-                circuit_breaker.record_success(wh.url)  # Record success
-                mark_success(db, delivery.id, code)
-                return "success"
-
-            elif code == 429 or code == 408 or code >= 500:
-                logger.warning(
-                    "webhook_retryable_error",
-                    delivery_id=delivery_id,
-                    webhook_id=wh.id,
-                    url=wh.url,
-                    status_code=code,
-                    attempt=self.request.retries + 1,
-                    max_retries=self.max_retries
-                )
-                circuit_breaker.record_failure(wh.url)  # Record failure
-                mark_retrying(db, delivery.id, code, f"retryable_status_{code}")
-                raise self.retry(countdown=_countdown(self.request.retries))
+            body = get_payload_cache().render([delivery.alert], delivery.event)[delivery.alert_id]
 
-            else:
-                logger.error(
-                    "webhook_non_retryable_error",
-                    delivery_id=delivery_id,
-                    webhook_id=wh.id,
-                    url=wh.url,
-                    status_code=code
-                )
-                circuit_breaker.record_failure(wh.url)  # Record failure
-                mark_failed(db, delivery.id, code, f"non_retryable_status_{code}")
-                return "failed_non_retryable"
+        headers = build_headers(wh.secret, body)
 
+        webhook_id, attempt = wh.id, delivery.attempts  # outcome commits expire the instances
+        started = time.perf_counter()
+        try:
+            # Pooled per-origin client: keep-alive connections are reused across deliveries
+            client = get_webhook_http_pool().client_for(wh.url)
+            resp = client.post(wh.url, content=body, headers=headers)
         except httpx.HTTPError as e:
+            duration_ms = _elapsed_ms(started)
             circuit_breaker.record_failure(wh.url)  # Record failure
-            mark_retrying(db, delivery.id, None, f"http_error:{type(e).__name__}")
-            try:
-                raise self.retry(exc=e, countdown=_countdown(self.request.retries))
-            except MaxRetriesExceededError:
-                mark_failed(db, delivery.id, None, "max_retries_exceeded:http_error")
-                return "failed_max_retries"
+            result = _retry_or_fail(db, delivery, None, f"http_error:{type(e).__name__}", duration_ms)
+            _record_attempt(webhook_id, duration_ms, result, [attempt])
+            return result
 
-        except MaxRetriesExceededError:
-            mark_failed(db, delivery.id, None, "max_retries_exceeded")
-            return "failed_max_retries"
+        duration_ms = _elapsed_ms(started)
+        code = resp.status_code
+        outcome = classify_status(code)
+
+        if outcome == "success":
+            logger.info(
+                "webhook_delivered",
+                delivery_id=delivery_id,
+                webhook_id=wh.id,
+                url=wh.url,
+                status_code=code,
+                attempt=delivery.attempts,
+                duration_ms=duration_ms
+            )
+            circuit_breaker.record_success(wh.url)  # Record success
+            mark_success(db, delivery.id, code, duration_ms)
+            result = "success"
+
+        elif outcome == "retry":
+            logger.warning(
+                "webhook_retryable_error",
+                delivery_id=delivery_id,
+                webhook_id=wh.id,
+                url=wh.url,
+                status_code=code,
+                attempt=delivery.attempts,
+                max_retries=MAX_RETRIES
+            )
+            circuit_breaker.record_failure(wh.url)  # Record failure
+            result = _retry_or_fail(db, delivery, code, f"retryable_status_{code}", duration_ms)
+
+        else:
+            logger.error(
+                "webhook_non_retryable_error",
+                delivery_id=delivery_id,
+                webhook_id=wh.id,
+                url=wh.url,
+                status_code=code
+            )
+            circuit_breaker.record_failure(wh.url)  # Record failure
+            mark_failed(db, delivery.id, code, f"non_retryable_status_{code}", duration_ms)
+            result = "failed_non_retryable"
+
+        _record_attempt(webhook_id, duration_ms, result, [attempt])
+        return result
 
     finally:
+        if held:
+            get_endpoint_limiter().release(*held)
         db.close()
-        logger.info(
-            "webhook_delivery_finished",
-            delivery_id=delivery_id,
-            attempt=self.request.retries + 1
-        )
\ No newline at end of file
+        logger.info("webhook_delivery_finished", delivery_id=delivery_id)
@@ -0,0 +1,62 @@
+# tools/bench_webhook_delivery.py
+"""
+Deliveries/sec of one worker process posting signed webhook payloads, with a fresh
+httpx.Client per delivery (the old behaviour) and with the pooled per-origin client.
+
+    uvicorn tools.webhook_receiver.main:app --port 9000 &
+    python -m tools.bench_webhook_delivery --url http://localhost:9000/webhooks/alerts -n 2000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from app.services.http_pool import WEBHOOK_TIMEOUT, WebhookHttpPool
+from app.services.webhook_dispatch import sign
+
+def _request(i: int) -> tuple[str, dict]:
+    body = json.dumps(
+        {"alert_id": i, "device_id": 1, "rule_id": 1, "details": {"temperature": 90.0}},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    ts = datetime.now(timezone.utc).isoformat()
+    headers = {
+        "Content-Type": "application/json",
+        "X-Telemetry-Timestamp": ts,
+        "X-Telemetry-Signature": sign("bench-secret", ts, body),
+    }
+    return body, headers
+
+def per_delivery_client(url: str, n: int) -> float:
+    started = time.perf_counter()
+    for i in range(n):
+        body, headers = _request(i)
+        with httpx.Client(timeout=WEBHOOK_TIMEOUT) as client:
+            client.post(url, content=body, headers=headers).raise_for_status()
+    return n / (time.perf_counter() - started)
+
+def pooled_client(url: str, n: int, http2: bool) -> float:
+    pool = WebhookHttpPool(http2=http2)
+    try:
+        started = time.perf_counter()
+        for i in range(n):
+            body, headers = _request(i)
+            pool.client_for(url).post(url, content=body, headers=headers).raise_for_status()
+        return n / (time.perf_counter() - started)
+    finally:
+        pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:9000/webhooks/alerts")
+    parser.add_argument("-n", type=int, default=2000, help="deliveries per mode")
+    parser.add_argument("--http2", action="store_true", help="pooled client negotiates HTTP/2 (TLS endpoints)")
+    args = parser.parse_args()
+
+    before = per_delivery_client(args.url, args.n)
+    after = pooled_client(args.url, args.n, args.http2)
+    print(f"client per delivery: {before:8.1f} deliveries/s")
+    print(f"pooled client:       {after:8.1f} deliveries/s  ({after / before:.1f}x)")